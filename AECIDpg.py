@@ -26,9 +26,16 @@ __maintainer__ = "Markus Wurzenberger"
 __status__ = "Production"
 __version__ = "1.0.0"
 
-from source import LogLine, Node, GlobalID
+from source import LogImporter, Node, TimeStampDetector, LineSampler, DatatypeClassifier, TreeState, TreeSnapshot, OutputWriter, \
+    StageCache, ShardCoordinator
 import PGConfig
 from collections import Counter
+import os
+import sys
+try:
+    import resource
+except ImportError:
+    resource = None
 
 
 # Function that draws the graph in a hierarchical structure
@@ -77,118 +84,293 @@ def hierarchy_pos(G, root, levels=None, width=1., height=1.):
     return make_pos({}, levels)
 
 
+# Function that prints the estimated memory usage of the log lines and the vocabulary and the peak memory usage of the process
+def print_memory_usage(stage, log_line_dict, vocabulary):
+    log_lines_size = sys.getsizeof(log_line_dict)
+    for log_line in log_line_dict.values():
+        log_lines_size += sys.getsizeof(log_line) + sys.getsizeof(log_line.words)
+        if log_line.line_text is not None:
+            log_lines_size += sys.getsizeof(log_line.line_text)
+    vocabulary_size = sys.getsizeof(vocabulary.ids) + sys.getsizeof(vocabulary.tokens) + sum(
+        sys.getsizeof(token) for token in vocabulary.tokens)
+    message = 'Memory usage ' + stage + ': log lines ' + str(log_lines_size // 1024) + ' KiB, vocabulary ' + \
+        str(vocabulary_size // 1024) + ' KiB'
+    if resource is not None:
+        peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        # The peak resident set size is given in bytes on macOS and in kilobytes on other platforms
+        if sys.platform == 'darwin':
+            peak //= 1024
+        message += ', peak ' + str(peak // 1024) + ' MiB'
+    print(message)
+
+
 # import log data and preprocess
 input_file = PGConfig.input_file
 delimiters = PGConfig.delimiters
 time_stamp_length = PGConfig.time_stamp_length
-line_id = 0
-log_line_list = []
-log_line_unedited_list = []
 log_line_dict = {}
 
 print('Import ' + str(input_file) + '!')
 
-counter = 0
-with open(input_file) as f:
-    for line in f:
-        if (line_id + 1) % 100000 == 0:
-            print(str(line_id + 1) + ' lines have been imported!')
-
-        if len(line) < 2:
-            # Do not process empty log lines
-            continue
-
-        # Remove characters that should not occur in log data. According to RFC3164 only ascii code symbols 32-126
-        # should occur in log data.
-        line = ''.join([x for x in line if (31 < ord(x) < 127 or ord(x) == 9)])
-        line = line.strip(' \t\n\r')
-        log_line_unedited_list.append(line)
-
-        # Replace text in "" with wildcards
-        # line = re.sub(r'".*?"', '§', line)
-
-        # Split at delimiters, but make delimiters also words
-        word = ''
-        words = []
-        for c in line[time_stamp_length + 1:]:
-            if c in delimiters:
-                # Start new word
-                if word != '':
-                    words.append(word)
-                words.append(c)
-                word = ''
+# If the state of a previously built tree is stored, the log lines of the input file are inserted into that tree
+build_parameters = (delimiters, PGConfig.collapse_delimiters, PGConfig.theta1, PGConfig.theta2, PGConfig.theta3, PGConfig.theta4,
+                    PGConfig.theta5, PGConfig.theta6, PGConfig.damping, PGConfig.force_branch, PGConfig.force_var)
+tree_state = None
+vocabulary = None
+if PGConfig.tree_state_file is not None:
+    if PGConfig.sample_size > 0:
+        raise ValueError('The tree state can not be stored when the tree is built from a sample of the log lines')
+    if PGConfig.stage_cache_dir is not None:
+        raise ValueError('The stages can not be cached when the tree state is stored, because the tree depends on the stored state')
+    Node.Node.keep_statistics = True
+    if os.path.exists(PGConfig.tree_state_file):
+        tree_state = TreeState.TreeState()
+        tree_state.load(PGConfig.tree_state_file)
+        if tree_state.parameters != build_parameters:
+            raise ValueError('The tree in ' + PGConfig.tree_state_file + ' was built with other parameters')
+        vocabulary = tree_state.vocabulary
+        print('Insert the log lines into the tree stored in ' + PGConfig.tree_state_file)
+
+# The unique log lines can be sorted on disk instead of stored in memory
+line_sorter = None
+if PGConfig.external_sort_dir is not None:
+    if PGConfig.sample_size > 0 or PGConfig.tree_state_file is not None or PGConfig.stage_cache_dir is not None:
+        raise ValueError('The log lines can not be sorted on disk together with sample_size, tree_state_file or stage_cache_dir')
+    if PGConfig.build_processes > 1 or PGConfig.build_engine != 'lines':
+        raise ValueError('The tree is built from the log lines sorted on disk in a single process with the lines engine')
+
+# Log lines with identical words are only stored once and their occurrence is counted, the tree is built from the unique log lines
+unique_log_lines = {}
+time_stamp_detector = None
+if PGConfig.time_stamp_detection:
+    time_stamp_detector = TimeStampDetector.TimeStampDetector()
+log_importer = LogImporter.LogImporter(delimiters, time_stamp_length, PGConfig.chunk_size, PGConfig.import_processes,
+                                       vocabulary=vocabulary, time_stamp_detector=time_stamp_detector,
+                                       collapse_delimiters=PGConfig.collapse_delimiters)
+
+# The results of the stages are cached under keys that are built from the contents of the input files and the parameters of the
+# stages. The run resumes after the latest stage whose result is cached
+stage_cache = StageCache.StageCache()
+cached_result = None
+if PGConfig.stage_cache_dir is not None:
+    input_files = log_importer.get_input_files(input_file)
+    if '-' in input_files:
+        raise ValueError('The stages can not be cached when log lines are read from stdin, because the input has no fingerprint')
+    stage_parameters = {
+        'import': (delimiters, time_stamp_length, PGConfig.time_stamp_detection, PGConfig.collapse_delimiters, PGConfig.sample_size,
+                   PGConfig.sampling_method),
+        'build_tree': build_parameters,
+        'insert_variables': (PGConfig.merge_similarity,),
+        'merge_similar_branches': (PGConfig.merge_branches, PGConfig.merge_subtrees_min_similarity),
+        'insert_lists': (),
+        'match_lists': (PGConfig.element_list_similarity,),
+        'get_subtrees': (PGConfig.find_subtrees, PGConfig.subtree_min_height),
+        'aggregate_sequences': ()}
+    stage_cache = StageCache.StageCache(PGConfig.stage_cache_dir, PGConfig.stage_cache_size, input_files, stage_parameters)
+    if PGConfig.stage_cache_invalidate:
+        print('Clear stage cache ' + PGConfig.stage_cache_dir)
+        stage_cache.clear()
+    cached_result = stage_cache.restore()
+    if stage_cache.restored_stage is not None:
+        print('Resume after cached stage ' + stage_cache.restored_stage)
+
+if not stage_cache.skips('import'):
+    if PGConfig.sample_size > 0:
+        # The tree is built from a sample of the log lines. Only the sampled lines are added to the vocabulary, so that the memory usage
+        # depends on the sample size rather than on the size of the input
+        if '-' in log_importer.get_input_files(input_file):
+            raise ValueError('Log lines from stdin can not be sampled, because the input is read a second time to count the occurrences')
+        line_sampler = LineSampler.LineSampler(PGConfig.sample_size, PGConfig.sampling_method)
+        for log_line in log_importer.import_words(input_file):
+            line_sampler.add(log_line)
+        log_lines = line_sampler.get_log_lines()
+        line_sampler = None
+        for log_line in log_lines:
+            log_line.words = log_importer.vocabulary.get_ids(log_line.words)
+        print('Sampled log lines: ' + str(len(log_lines)))
+    else:
+        log_lines = log_importer.import_file(input_file)
+    if PGConfig.external_sort_dir is not None:
+        print('Sort log lines in ' + PGConfig.external_sort_dir)
+        line_sorter = Node.sort_log_lines(log_lines, delimiters, log_importer.vocabulary, PGConfig.external_sort_dir,
+                                          PGConfig.external_sort_memory)
+    else:
+        for log_line in log_lines:
+            words = log_line.words.tobytes()
+            if words in unique_log_lines:
+                unique_log_lines[words].occurrence += log_line.occurrence
             else:
-                word += c
-
-        if word != '':
-            words.append(word)
-
-        log_line = LogLine.LogLine(line_id, line[0:time_stamp_length], line[time_stamp_length + 1:], words)
-        line_id += 1
-        log_line_dict[line_id] = log_line
-        log_line_list.append(log_line)
-        counter += 1
-f.close()
-
-print('Total amount of log lines read: ' + str(counter))
-
-print('Build tree')
-# Create root node for the tree
-root = Node.Node()
-root.occurrence = len(log_line_dict)
-# Build tree recursively
-root.build_tree(0, log_line_dict, delimiters, PGConfig.theta1, PGConfig.theta2, PGConfig.theta3, PGConfig.theta4, PGConfig.theta5,
-                PGConfig.theta6, PGConfig.damping, PGConfig.force_branch, PGConfig.force_var)
-
-# Sort fixed elements after branches because the AMiner takes the wrong path if elements are subsets of each other
-print('Sort branches')
-root.sort_children()
-
-# Insert variables when branches are followed by similar paths
-print('Refine tree by aggregating similar paths')
-root.insert_variables(PGConfig.merge_similarity, delimiters, 0, PGConfig.force_branch)
-
-if PGConfig.merge_branches:
-    root.merge_similar_branches(delimiters, PGConfig.merge_subtrees_min_similarity)
-
-# Create lists instead of branches if following paths are equal
-print('Replace equal branches with lists')
-root.insert_lists()
-
-# Compares the element lists and expands them to enable a bigger coverage of values
-print('Match list elements')
-root.match_lists(PGConfig.element_list_similarity)
-
-if PGConfig.find_subtrees:
-    # Get a list which includes the nodes of common subtrees
-    print('Generate the list of subtrees')
-    subtree_list = root.get_subtrees(PGConfig.subtree_min_height)
-else:
+                unique_log_lines[words] = log_line
+                log_line_dict[log_line.line_id + 1] = log_line
+    log_lines = None
+    counter = log_importer.lines_read
+    unique_log_lines = None
+
+    print(log_importer.get_statistics())
+    time_stamp_formats = None
+    if time_stamp_detector is not None:
+        time_stamp_formats = time_stamp_detector.formats
+        print('Detected time stamp formats: ' + str(time_stamp_formats))
+    stage_cache.save_log_lines(log_line_dict, log_importer.vocabulary, counter, time_stamp_formats)
+elif stage_cache.restored_stage == 'import':
+    log_line_dict, tokens, counter, time_stamp_formats = cached_result
+    log_importer.vocabulary.get_ids(tokens)
+    tokens = None
+    if time_stamp_detector is not None:
+        time_stamp_detector.set_formats(time_stamp_formats)
+
+if not stage_cache.skips('build_tree'):
+    print('Total amount of log lines read: ' + str(counter))
+    if line_sorter is not None:
+        print('Unique log lines: ' + str(len(line_sorter)))
+    else:
+        print('Unique log lines: ' + str(len(log_line_dict)))
+    print_memory_usage('after import', log_line_dict, log_importer.vocabulary)
+
+    print('Build tree')
+    Node.Node.max_exact_words = PGConfig.max_exact_words
+    Node.Node.datatype_classifier = DatatypeClassifier.DatatypeClassifier(PGConfig.datatype_cache_size, PGConfig.datatype_cache_file)
+    # The datetime formats are learned from the words of the log lines, so that most datetimes are checked without dateutil
+    Node.Node.datatype_classifier.datetime_detector.learn(log_importer.vocabulary.tokens)
+    if tree_state is None:
+        # Create root node for the tree
+        root = Node.Node()
+        root.occurrence = counter
+        # Build tree recursively
+        if line_sorter is not None:
+            try:
+                root.build_tree(0, line_sorter, delimiters, PGConfig.theta1, PGConfig.theta2, PGConfig.theta3, PGConfig.theta4,
+                                PGConfig.theta5, PGConfig.theta6, PGConfig.damping, PGConfig.force_branch, PGConfig.force_var,
+                                log_importer.vocabulary, PGConfig.build_order)
+            finally:
+                line_sorter.close()
+            line_sorter = None
+        else:
+            shards = None
+            if PGConfig.build_engine == 'shards':
+                # The log lines are distributed to the workers, which count the words of the nodes and build the subtrees of their shards
+                shards = ShardCoordinator.ShardCoordinator(PGConfig.build_shard_processes, PGConfig.build_shard_workers,
+                                                           PGConfig.build_shard_authkey, PGConfig.build_shard_prefix_words)
+            try:
+                root.build_tree(0, log_line_dict, delimiters, PGConfig.theta1, PGConfig.theta2, PGConfig.theta3, PGConfig.theta4,
+                                PGConfig.theta5, PGConfig.theta6, PGConfig.damping, PGConfig.force_branch, PGConfig.force_var,
+                                log_importer.vocabulary, PGConfig.build_order, PGConfig.build_processes,
+                                PGConfig.build_min_subtree_lines, PGConfig.build_engine, shards=shards)
+            finally:
+                if shards is not None:
+                    shards.close()
+            shards = None
+        stored_log_lines = list(log_line_dict.values())
+    else:
+        # Add the new log lines to the stored log lines, the new log lines are numbered after the stored log lines
+        root = tree_state.root
+        stored_log_lines = tree_state.log_lines
+        unique_log_lines = {log_line.words.tobytes(): log_line for log_line in stored_log_lines}
+        new_log_lines = list(log_line_dict.values())
+        for log_line in new_log_lines:
+            log_line.line_id += root.occurrence
+            words = log_line.words.tobytes()
+            if words in unique_log_lines:
+                unique_log_lines[words].occurrence += log_line.occurrence
+            else:
+                stored_log_lines.append(log_line)
+        unique_log_lines = None
+        root.occurrence += counter
+        updated_nodes, rebuilt_nodes = root.update_tree(
+            0, new_log_lines, stored_log_lines, delimiters, PGConfig.theta1, PGConfig.theta2, PGConfig.theta3, PGConfig.theta4,
+            PGConfig.theta5, PGConfig.theta6, PGConfig.damping, PGConfig.force_branch, PGConfig.force_var, log_importer.vocabulary)
+        new_log_lines = None
+        print('Updated nodes: ' + str(updated_nodes) + ', rebuilt nodes: ' + str(rebuilt_nodes))
+    if PGConfig.tree_state_file is not None:
+        # The tree is stored before it is refined, because new log lines can only be inserted into the tree created by build_tree
+        print('Store tree state in ' + PGConfig.tree_state_file)
+        TreeState.TreeState(root, stored_log_lines, log_importer.vocabulary, build_parameters).save(PGConfig.tree_state_file)
+    stored_log_lines = None
+    print_memory_usage('after building the tree', log_line_dict, log_importer.vocabulary)
+    print(Node.Node.datatype_classifier.get_statistics())
+    Node.Node.datatype_classifier.save()
+    log_line_dict = None
+
+    if PGConfig.sample_size > 0:
+        # The occurrences in the tree were estimated from the sample, therefore all log lines are read again and followed through the
+        # tree to count the exact occurrences and ending lines
+        print('Count occurrences')
+        root.reset_counts()
+        unmatched_lines = 0
+        delimiter_set = set(delimiters)
+        for log_line in log_importer.import_words(input_file):
+            if not root.count_line(log_line.words, delimiter_set):
+                if unmatched_lines < 10:
+                    print('Unmatched log line: ' + ''.join(log_line.words))
+                unmatched_lines += 1
+        print(log_importer.get_statistics())
+        print('Unmatched log lines: ' + str(unmatched_lines) + ' of ' + str(log_importer.lines_read))
     subtree_list = []
-
-# Sort fixed elements after branches because the AMiner takes the wrong path if elements are subsets of each other
-print('Sort branches')
-root.sort_children()
-
-# Reduce tree complexity by grouping subsequent fixed nodes into single nodes
-print('Aggregate fixed word elements')
-root.aggregate_sequences(subtree_list)
+    stage_cache.save_tree('build_tree', root, subtree_list, delimiters)
+else:
+    root, subtree_list = cached_result
+cached_result = None
+
+if not stage_cache.skips('insert_variables'):
+    # Sort fixed elements after branches because the AMiner takes the wrong path if elements are subsets of each other
+    print('Sort branches')
+    root.sort_children()
+
+    # Insert variables when branches are followed by similar paths
+    print('Refine tree by aggregating similar paths')
+    root.insert_variables(PGConfig.merge_similarity, delimiters, 0, PGConfig.force_branch)
+    stage_cache.save_tree('insert_variables', root, subtree_list, delimiters)
+
+if not stage_cache.skips('merge_similar_branches'):
+    if PGConfig.merge_branches:
+        root.merge_similar_branches(delimiters, PGConfig.merge_subtrees_min_similarity)
+    stage_cache.save_tree('merge_similar_branches', root, subtree_list, delimiters)
+
+if not stage_cache.skips('insert_lists'):
+    # Create lists instead of branches if following paths are equal
+    print('Replace equal branches with lists')
+    root.insert_lists()
+    stage_cache.save_tree('insert_lists', root, subtree_list, delimiters)
+
+if not stage_cache.skips('match_lists'):
+    # Compares the element lists and expands them to enable a bigger coverage of values
+    print('Match list elements')
+    root.match_lists(PGConfig.element_list_similarity)
+    stage_cache.save_tree('match_lists', root, subtree_list, delimiters)
+
+if not stage_cache.skips('get_subtrees'):
+    if PGConfig.find_subtrees:
+        # Get a list which includes the nodes of common subtrees
+        print('Generate the list of subtrees')
+        subtree_list = root.get_subtrees(PGConfig.subtree_min_height)
+    stage_cache.save_tree('get_subtrees', root, subtree_list, delimiters)
+
+if not stage_cache.skips('aggregate_sequences'):
+    # Sort fixed elements after branches because the AMiner takes the wrong path if elements are subsets of each other
+    print('Sort branches')
+    root.sort_children()
+
+    # Reduce tree complexity by grouping subsequent fixed nodes into single nodes
+    print('Aggregate fixed word elements')
+    root.aggregate_sequences(subtree_list)
+    stage_cache.save_tree('aggregate_sequences', root, subtree_list, delimiters)
+
+if PGConfig.snapshot_file is not None:
+    # The snapshot contains everything that is needed to write the output files again
+    print('Store snapshot in ' + PGConfig.snapshot_file)
+    TreeSnapshot.TreeSnapshot(root, subtree_list, delimiters).save(PGConfig.snapshot_file)
+
+output_writer = OutputWriter.OutputWriter(delimiters)
 
 # Print Tree in textual form using Depth First Search
 print('Store tree')
-with open(PGConfig.tree_file, 'wb') as file:
-    file.write(root.to_string(0).encode())
+output_writer.write_tree(root, PGConfig.tree_file)
 
 # Store clusters
 lists = root.get_clusters()
 print('Store ' + str(len(lists)) + ' clusters')
 
-with open(str(PGConfig.templates_file), 'wb') as file:
-    for template in root.get_templates(''):
-        file.write((template + '\n').encode())
-
-# Create id1
-ID = GlobalID.GlobalID()
+output_writer.write_templates(root, PGConfig.templates_file)
 
 # Print some relevant tree information
 print('Nodes: ' + str(root.count_nodes()))
@@ -200,44 +382,8 @@ print('Optional occurrences sum: ' + str(root.count_optional_occurrences()))
 counter = Counter(root.count_datatypes())
 print('Datatypes: ' + str(counter))
 
-# Build a alphabet of all characters except delimiters for the parser
-alphabet = ''
-for i in range(32, 127):
-    alphabet += chr(i)
-
-for delimiter in delimiters:
-    alphabet = alphabet.replace(delimiter, '')
-alphabet = alphabet.replace('\\', '\\\\')
-alphabet = alphabet.replace('\'', '\\\'')
-
-# Write config file using Depth First Search
 print('Write parser')
-config = '"""This module defines a generated parser model."""\n'
-config += '\n'
-config += 'from aminer.parsing.AnyByteDataModelElement import AnyByteDataModelElement\n'
-config += 'from aminer.parsing.Base64StringModelElement import Base64StringModelElement\n'
-config += 'from aminer.parsing.DateTimeModelElement import DateTimeModelElement\n'
-config += 'from aminer.parsing.DecimalFloatValueModelElement import DecimalFloatValueModelElement\n'
-config += 'from aminer.parsing.DecimalIntegerValueModelElement import DecimalIntegerValueModelElement\n'
-config += 'from aminer.parsing.FirstMatchModelElement import FirstMatchModelElement\n'
-config += 'from aminer.parsing.FixedDataModelElement import FixedDataModelElement\n'
-config += 'from aminer.parsing.FixedWordlistDataModelElement import FixedWordlistDataModelElement\n'
-config += 'from aminer.parsing.HexStringModelElement import HexStringModelElement\n'
-config += 'from aminer.parsing.IpAddressDataModelElement import IpAddressDataModelElement\n'
-config += 'from aminer.parsing.OptionalMatchModelElement import OptionalMatchModelElement\n'
-config += 'from aminer.parsing.SequenceModelElement import SequenceModelElement\n'
-config += 'from aminer.parsing.VariableByteDataModelElement import VariableByteDataModelElement\n'
-config += '\n'
-config += 'def get_model():\n'
-config += '\talphabet = b\'' + alphabet + '\'\n'
-# Add the subtrees to the config
-config += root.write_config_subtrees(ID, subtree_list)
-config += '\tmodel = ' + root.write_config(1, ID, subtree_list)[1:-2] + '\n\n'
-# [1:-2] removes newline and comma following last ModelElement and tabulator preceding first ModelElement
-config += '\treturn model'
-
-with open(PGConfig.parser_file, 'wb') as file:
-    file.write(config.encode())
+output_writer.write_parser(root, subtree_list, PGConfig.parser_file)
 
 print('Parser done')
 
@@ -0,0 +1,131 @@
+"""This program builds the parser tree of the AECID-parsergenerator (AECID-PG)
+for many configurations of the thresholds and reports the number of nodes, the
+number of templates, the fraction of parsed log lines and the runtime of every
+configuration. The log lines are only imported once. All parameters that are
+not swept are taken from PGConfig.py.
+
+This program is free software: you can redistribute it and/or modify it under
+the terms of the GNU General Public License as published by the Free Software
+Foundation, either version 3 of the License, or (at your option) any later
+version.
+This program is distributed in the hope that it will be useful, but WITHOUT
+ANY WARRANTY; without even the implied warranty of MERCHANTABILITY or FITNESS
+FOR A PARTICULAR PURPOSE. See the GNU General Public License for more details.
+You should have received a copy of the GNU General Public License along with
+this program. If not, see <http://www.gnu.org/licenses/>.
+"""
+
+import argparse
+import ast
+import csv
+
+import PGConfig
+from source import Node, SweepEngine
+
+RESULT_NAMES = ['nodes', 'templates', 'coverage', 'runtime']
+
+
+# This function parses a grid of values, e.g., theta1=[0.05, 0.1, 0.2]
+def parse_grid(argument):
+    name, _, values = argument.partition('=')
+    try:
+        values = ast.literal_eval(values)
+    except (ValueError, SyntaxError):
+        raise argparse.ArgumentTypeError('the values of ' + name + ' are not a list of python literals')
+    if not isinstance(values, list) or len(values) == 0:
+        raise argparse.ArgumentTypeError('the values of ' + name + ' are not a non-empty list')
+    return name.strip(), values
+
+
+# This function parses a range of values with a step, e.g., theta3=0.1:0.9:0.2. The end of the range is included
+def parse_range(argument):
+    name, _, values = argument.partition('=')
+    try:
+        start, stop, step = [float(value) for value in values.split(':')]
+    except ValueError:
+        raise argparse.ArgumentTypeError('the range of ' + name + ' is not start:stop:step')
+    if step <= 0 or stop < start:
+        raise argparse.ArgumentTypeError('the range of ' + name + ' is empty')
+    count = int(round((stop - start) / step, 9)) + 1
+    return name.strip(), [round(start + i * step, 9) for i in range(count)]
+
+
+# This function parses the interval of a search, e.g., 0.01:0.49
+def parse_interval(argument):
+    try:
+        low, high = [float(value) for value in argument.split(':')]
+    except ValueError:
+        raise argparse.ArgumentTypeError('the interval is not low:high')
+    return low, high
+
+
+def main(arguments=None):
+    parser = argparse.ArgumentParser(description='Build the tree of the AECID-PG for many configurations of the parameters.')
+    parser.add_argument('--grid', type=parse_grid, action='append', default=[], metavar='NAME=[VALUES]',
+                        help='list of values of a parameter, e.g., "theta1=[0.05, 0.1]"')
+    parser.add_argument('--range', type=parse_range, action='append', default=[], metavar='NAME=START:STOP:STEP',
+                        help='range of values of a parameter including the stop value, e.g., theta3=0.1:0.9:0.2')
+    parser.add_argument('--processes', type=int, default=1, help='number of processes that evaluate configurations in parallel')
+    parser.add_argument('--cache-lines', type=int, default=10000000,
+                        help='maximum number of line indices in the word statistics that every process caches')
+    parser.add_argument('--target-nodes', type=int, help='search the value of --target-parameter that results in this number of nodes')
+    parser.add_argument('--target-parameter', default='theta1', help='parameter that is searched in the target mode')
+    parser.add_argument('--target-interval', type=parse_interval, default=(0.01, 0.49), metavar='LOW:HIGH',
+                        help='interval of the values of the searched parameter')
+    parser.add_argument('--target-steps', type=int, default=5, help='number of refinements of the search interval')
+    parser.add_argument('--output', help='path to output the results as csv file')
+    arguments = parser.parse_args(arguments)
+    if PGConfig.sample_size > 0:
+        parser.error('the sweep builds the trees from all log lines, set sample_size = 0 in PGConfig.py')
+    grid = arguments.grid + arguments.range
+    try:
+        configurations = SweepEngine.get_configurations(grid)
+    except ValueError as e:
+        parser.error(str(e))
+    names = [name for name, _ in grid]
+    if arguments.target_nodes is not None:
+        if arguments.target_parameter in names:
+            parser.error('the searched parameter ' + arguments.target_parameter + ' can not be swept at the same time')
+        names.append(arguments.target_parameter)
+
+    parameters = {name: getattr(PGConfig, name) for name in dir(PGConfig) if not name.startswith('_')}
+    sweep_engine = SweepEngine.SweepEngine(parameters, arguments.processes, arguments.cache_lines)
+    print('Import ' + str(PGConfig.input_file) + '!')
+    print(sweep_engine.import_log_lines(PGConfig.input_file))
+    print('Unique log lines: ' + str(len(sweep_engine.log_line_dict)))
+
+    results = []
+    try:
+        if arguments.target_nodes is None:
+            print('Evaluate ' + str(len(configurations)) + ' configurations')
+            results = list(zip(configurations, sweep_engine.evaluate_all(configurations)))
+        else:
+            low, high = arguments.target_interval
+            for configuration in configurations:
+                print('Search ' + arguments.target_parameter + ' for ' + str(arguments.target_nodes) + ' nodes with ' + str(configuration))
+                evaluated = sweep_engine.search(configuration, arguments.target_parameter, low, high, arguments.target_nodes,
+                                                arguments.target_steps)
+                value, result = min(evaluated, key=lambda entry: abs(entry[1]['nodes'] - arguments.target_nodes))
+                best_configuration = dict(configuration)
+                best_configuration[arguments.target_parameter] = value
+                results.append((best_configuration, result))
+    finally:
+        sweep_engine.close()
+    if arguments.processes <= 1:
+        # Every worker process has its own cache, therefore the statistics are only printed if the sweep ran in this process
+        print(Node.Node.word_count_cache.get_statistics())
+
+    print('\t'.join(names + RESULT_NAMES))
+    for configuration, result in results:
+        print('\t'.join([str(configuration[name]) for name in names] + [str(result['nodes']), str(result['templates']), '%.4f' % result[
+            'coverage'], '%.3f' % result['runtime']]))
+    if arguments.output is not None:
+        with open(arguments.output, 'w', newline='') as f:
+            writer = csv.writer(f)
+            writer.writerow(names + RESULT_NAMES)
+            for configuration, result in results:
+                writer.writerow([configuration[name] for name in names] + [result[name] for name in RESULT_NAMES])
+
+
+if __name__ == '__main__':
+    main()
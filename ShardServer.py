@@ -0,0 +1,41 @@
+"""This program starts a worker of the shards engine of the AECID-parsergenerator
+(AECID-PG), which stores a shard of the log lines and builds subtrees for the
+coordinator that builds the tree. Coordinators connect to the worker over TCP
+if its address is added to build_shard_workers in PGConfig.py. The messages
+are pickled, therefore the worker only accepts coordinators that know the
+authentication key and should only listen on trusted networks.
+
+This program is free software: you can redistribute it and/or modify it under
+the terms of the GNU General Public License as published by the Free Software
+Foundation, either version 3 of the License, or (at your option) any later
+version.
+This program is distributed in the hope that it will be useful, but WITHOUT
+ANY WARRANTY; without even the implied warranty of MERCHANTABILITY or FITNESS
+FOR A PARTICULAR PURPOSE. See the GNU General Public License for more details.
+You should have received a copy of the GNU General Public License along with
+this program. If not, see <http://www.gnu.org/licenses/>.
+"""
+
+import argparse
+from multiprocessing.connection import Listener
+import os
+
+from source import ShardWorker
+
+
+def main(arguments=None):
+    parser = argparse.ArgumentParser(description='Start a worker of the shards engine of the AECID-PG.')
+    parser.add_argument('--host', default='127.0.0.1', help='address on which the worker listens')
+    parser.add_argument('--port', type=int, default=6543, help='port on which the worker listens')
+    parser.add_argument('--authkey', default=os.environ.get('AECID_PG_SHARD_AUTHKEY'),
+                        help='key that the coordinators authenticate with, default is the environment variable AECID_PG_SHARD_AUTHKEY')
+    arguments = parser.parse_args(arguments)
+    if arguments.authkey is None:
+        parser.error('the authentication key is missing, set --authkey or AECID_PG_SHARD_AUTHKEY')
+    with Listener((arguments.host, arguments.port), authkey=arguments.authkey.encode()) as listener:
+        print('Shard worker listening on ' + arguments.host + ':' + str(arguments.port))
+        ShardWorker.serve(listener)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,44 @@
+"""This program writes the output files of the AECID-parsergenerator
+(AECID-PG) from a tree snapshot that was stored by AECIDpg.py, i.e., the tree
+in textual form, the log templates and the parser model for the AMiner. The
+tree is not built again from the log lines.
+
+This program is free software: you can redistribute it and/or modify it under
+the terms of the GNU General Public License as published by the Free Software
+Foundation, either version 3 of the License, or (at your option) any later
+version.
+This program is distributed in the hope that it will be useful, but WITHOUT
+ANY WARRANTY; without even the implied warranty of MERCHANTABILITY or FITNESS
+FOR A PARTICULAR PURPOSE. See the GNU General Public License for more details.
+You should have received a copy of the GNU General Public License along with
+this program. If not, see <http://www.gnu.org/licenses/>.
+"""
+
+import argparse
+
+from source import OutputWriter, TreeSnapshot
+
+
+def main(arguments=None):
+    parser = argparse.ArgumentParser(description='Write the output files of the AECID-PG from a tree snapshot.')
+    parser.add_argument('snapshot_file', help='path to the tree snapshot stored by AECIDpg.py')
+    parser.add_argument('--tree-file', help='path to output parser in tree format')
+    parser.add_argument('--templates-file', help='path to output list of templates')
+    parser.add_argument('--parser-file', help='path to output parser for AMiner')
+    arguments = parser.parse_args(arguments)
+    if arguments.tree_file is None and arguments.templates_file is None and arguments.parser_file is None:
+        parser.error('at least one of --tree-file, --templates-file and --parser-file is required')
+
+    tree_snapshot = TreeSnapshot.TreeSnapshot()
+    tree_snapshot.load(arguments.snapshot_file)
+    output_writer = OutputWriter.OutputWriter(tree_snapshot.delimiters)
+    if arguments.tree_file is not None:
+        output_writer.write_tree(tree_snapshot.root, arguments.tree_file)
+    if arguments.templates_file is not None:
+        output_writer.write_templates(tree_snapshot.root, arguments.templates_file)
+    if arguments.parser_file is not None:
+        output_writer.write_parser(tree_snapshot.root, tree_snapshot.subtree_list, arguments.parser_file)
+
+
+if __name__ == '__main__':
+    main()
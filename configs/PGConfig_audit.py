@@ -10,11 +10,17 @@ You should have received a copy of the GNU General Public License along with
 this program. If not, see <http://www.gnu.org/licenses/>.
 """
 
-input_file = 'data/in/audit.log' # Path to input log file
+input_file = 'data/in/audit.log' # Path to input log file, glob pattern of rotated log files, '-' for stdin or a list of them; .gz/.bz2/.xz are supported
 tree_file = 'data/out/tree.txt' # Path to output parser in tree format
 parser_file = 'data/out/GeneratedParserModel.py' # Path to output parser for AMiner
 templates_file = 'data/out/logTemplates.txt' # Path to output list of templates
+snapshot_file = None # Path to output binary snapshot of the refined tree, from which SnapshotExport.py writes the output files again [string, None]
+chunk_size = 1048576 # Number of bytes that are read from the input file at once [integer]
+import_processes = 1 # Number of processes that import and tokenize the input file in parallel; 1 imports sequentially [integer]
 time_stamp_length = -1 # Length of time stamp at beginning of log file that will be removed; set to -1 for no timestamp
+time_stamp_detection = False # Learn the formats of time stamps at the beginning of log lines and remove them instead of removing time_stamp_length characters; False uses time_stamp_length [True, False]
+sample_size = 0 # Number of log lines that are sampled to build the tree; the exact occurrences are counted in a second pass over the input; 0 builds the tree from all log lines [integer]
+sampling_method = 'reservoir' # Sample log lines uniformly or the same number of log lines for every line length and first word [reservoir, stratified]
 theta1 = 0.1 # Threshold for branches [0, 1]
 theta2 = 0.99 # Threshold for single child nodes [0, 1]
 theta3 = 0.5 # threshold for multiple child nodes [0, 1]
@@ -22,8 +28,26 @@ theta4 = 0.0001 # Threshold for optional nodes [0, 1]
 theta5 = 0.0001 # Threshold for nodes with few lines [0, 1]
 theta6 = 0.001 # Threshold for optional nodes in branches [0, 1]
 damping = 0.1 # Factor to increase thresholds for higher tree depths [-inf, inf]
+build_order = 'dfs' # Order in which the nodes of the tree are built, depth first or breadth first; both result in the same tree [dfs, bfs]
+build_processes = 1 # Number of processes that build independent subtrees in parallel; 1 builds the tree in a single process [integer]
+build_min_subtree_lines = 10000 # Minimum number of unique log lines of a subtree that is built by another process [integer]
+build_engine = 'lines' # Engine that counts the words while the tree is built; trie inserts the log lines into a prefix trie first, so that log lines with the same first words are counted together; numpy counts the words of all nodes of a depth together and requires numpy; shards distributes the log lines to worker processes or remote workers and merges their counts; trie, numpy and shards require build_processes = 1; all result in the same tree [lines, trie, numpy, shards]
+build_shard_processes = 2 # Number of local worker processes of the shards engine, which store shards of the log lines [integer]
+build_shard_workers = [] # Addresses of remote workers of the shards engine as 'host:port', which are started with ShardServer.py [list of strings]
+build_shard_authkey = None # Key that authenticates the shards engine to the remote workers, which must be started with the same key [string, None]
+build_shard_prefix_words = 2 # Number of first words that are not delimiters by whose hash the log lines are assigned to the workers of the shards engine; log lines with the same first words are stored by one worker, which builds the subtrees below these words [integer]
+max_exact_words = 0 # Maximum number of distinct words that are counted exactly at a node; at nodes with more distinct words, only the words that may exceed theta1 are counted exactly, which bounds the number of counters and results in the same tree; 0 counts all words exactly [integer]
+external_sort_dir = None # Directory in which the unique log lines are sorted on disk, so that the tree is built without storing the log lines in memory; requires sample_size = 0, build_processes = 1 and build_engine = 'lines' and can not be used with tree_state_file or stage_cache_dir; None stores the log lines in memory [string, None]
+external_sort_memory = 268435456 # Maximum number of bytes of log lines that are sorted in memory before they are written to a file in external_sort_dir [integer]
+datatype_cache_size = 1000000 # Maximum number of distinct words whose datatypes are cached [integer]
+datatype_cache_file = None # Path to a file that stores the cached datatypes between runs; None does not store the cache [string, None]
+tree_state_file = None # Path to a file that stores the tree and the log lines; if the file exists, the log lines of the input file are inserted into the stored tree instead of building a new tree [string, None]
+stage_cache_dir = None # Path to a directory that caches the results of the stages, a re-run resumes after the latest stage whose input file contents and parameters are unchanged; None does not cache the stages [string, None]
+stage_cache_size = 1073741824 # Maximum number of bytes of the cached stage results, the least recently used results are removed [integer]
+stage_cache_invalidate = False # Remove all cached stage results before the run [True, False]
 merge_similarity = 0.8 # Minimum similarity threshold to merge similar branches [0, 1]
 delimiters = [' ', '=', '(', ')'] # Delimiters for tokenizing log lines [list of single characters]
+collapse_delimiters = True # Combine consecutive delimiters to one word when the log lines are tokenized instead of while the tree is built; both result in the same tree [True, False]
 force_branch = [2] # Parser tree depths where all branches are generated for all tokens, starts with 0 and also counts delimiters [list of integers]
 force_var = [] # Parser tree depths where all tokens are merged to variable, starts with 0 and also counts delimiters [list of integers]
 merge_branches = False # Merge similar branches to one branch [True, False]
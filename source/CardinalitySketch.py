@@ -0,0 +1,57 @@
+"""This class estimates the number of distinct words with a k minimum values
+(KMV) sketch. The word ids are hashed to 32 bits and only the size smallest
+hashes are kept; if there are more distinct words, their number is estimated
+from the largest kept hash. The hash function is a bijection of the 32 bit
+word ids, therefore the words are counted exactly as long as there are not
+more than size distinct words.
+
+This program is free software: you can redistribute it and/or modify it under
+the terms of the GNU General Public License as published by the Free Software
+Foundation, either version 3 of the License, or (at your option) any later
+version.
+This program is distributed in the hope that it will be useful, but WITHOUT
+ANY WARRANTY; without even the implied warranty of MERCHANTABILITY or FITNESS
+FOR A PARTICULAR PURPOSE. See the GNU General Public License for more details.
+You should have received a copy of the GNU General Public License along with
+this program. If not, see <http://www.gnu.org/licenses/>.
+"""
+
+import heapq
+
+HASH_RANGE = 1 << 32
+
+
+class CardinalitySketch:
+    """This class describes the smallest hashes of the distinct words"""
+    def __init__(self, size=1024):
+        self.size = size  # Number of kept hashes; the relative standard error of the estimate is about 1 / sqrt(size - 2)
+        self.heap = []  # Negated kept hashes, so that the largest kept hash is the first element
+        self.hashes = set()
+
+    # This method adds a word id
+    def add(self, word):
+        word_hash = get_hash(word)
+        if len(self.heap) < self.size:
+            if word_hash not in self.hashes:
+                self.hashes.add(word_hash)
+                heapq.heappush(self.heap, -word_hash)
+        elif word_hash < -self.heap[0] and word_hash not in self.hashes:
+            self.hashes.remove(-heapq.heapreplace(self.heap, -word_hash))
+            self.hashes.add(word_hash)
+
+    # This method returns the estimated number of distinct words
+    def estimate(self):
+        if len(self.heap) < self.size:
+            return len(self.heap)
+        return (self.size - 1) * HASH_RANGE / float(-self.heap[0] + 1)
+
+    # This method returns whether the number of distinct words is known exactly, i.e., whether fewer than size distinct words were added
+    def is_exact(self):
+        return len(self.heap) < self.size
+
+
+# This function returns the hash of a word id with the finalizer of MurmurHash3, which is a bijection of the 32 bit integers
+def get_hash(word):
+    word = ((word ^ (word >> 16)) * 0x85ebca6b) & 0xffffffff
+    word = ((word ^ (word >> 13)) * 0xc2b2ae35) & 0xffffffff
+    return word ^ (word >> 16)
@@ -0,0 +1,231 @@
+"""This class determines the datatypes of words. The results are cached for
+every distinct word, because the same words occur in many nodes of the tree.
+
+This program is free software: you can redistribute it and/or modify it under
+the terms of the GNU General Public License as published by the Free Software
+Foundation, either version 3 of the License, or (at your option) any later
+version.
+This program is distributed in the hope that it will be useful, but WITHOUT
+ANY WARRANTY; without even the implied warranty of MERCHANTABILITY or FITNESS
+FOR A PARTICULAR PURPOSE. See the GNU General Public License for more details.
+You should have received a copy of the GNU General Public License along with
+this program. If not, see <http://www.gnu.org/licenses/>.
+"""
+
+from collections import OrderedDict
+from source import DatetimeDetector
+import base64
+import binascii
+import json
+import os
+import re
+import socket
+
+# Every datatype except 'string' is a bit of the datatype masks. The datatypes are checked in this order
+DATATYPES = ['float', 'integer', 'hex', 'datetime', 'base64', 'ipaddress']
+DATATYPE_BITS = {datatype: 1 << i for i, datatype in enumerate(DATATYPES)}
+CACHE_FILE_VERSION = 1
+# Number of words that are classified at once. The datatypes of a node are not checked any more after a batch ruled all of them out
+BATCH_SIZE = 256
+
+# Words that only consist of printable ascii characters and tabulators are classified with the regular expressions below, which are
+# matched against all words of a batch with map
+SIMPLE_WORD = re.compile(r'[\t -~]*')
+NOT_SIMPLE_CHARACTER = re.compile(r'[^\t -~]')
+# Words that are accepted by is_float and is_integer
+FLOAT_PATTERN = re.compile(r'[0-9]*\.?[0-9]+')
+INTEGER_PATTERN = re.compile(r'-?[0-9]+')
+# Words that are accepted by int(word, 16), which allows whitespace, a sign, the 0x prefix and single underscores between digits
+HEX_PATTERN = re.compile(r'[ \t]*[+-]?(?:0[xX](?:_?[0-9a-fA-F])+|[0-9a-fA-F](?:_?[0-9a-fA-F])*)[ \t]*')
+# IPv4 addresses without leading zeros are accepted by inet_pton on all platforms. Other words that look like IPv4 addresses and all
+# words with colons, which may be IPv6 addresses, are checked with inet_pton
+IPV4_OCTET = '(?:25[0-5]|2[0-4][0-9]|1[0-9][0-9]|[1-9]?[0-9])'
+IPV4_PATTERN = re.compile(IPV4_OCTET + r'(?:\.' + IPV4_OCTET + '){3}')
+IP_CANDIDATE_PATTERN = re.compile(r'[0-9]{1,3}(?:\.[0-9]{1,3}){3}|.*:.*')
+# Correctly padded base64 strings are accepted by base64.decodebytes, words that only consist of base64 characters without padding are
+# rejected if their length is not a multiple of 4. Words with other padding are decided by the number of characters and padding
+# characters. All other words are checked with base64.decodebytes, which ignores invalid characters
+BASE64_PATTERN = re.compile(r'(?:[A-Za-z0-9+/]{4})*(?:[A-Za-z0-9+/]{2}==|[A-Za-z0-9+/]{3}=)?')
+BASE64_PADDED_PATTERN = re.compile(r'[A-Za-z0-9+/]*=+')
+BASE64_CANDIDATE_PATTERN = re.compile(r'(?![A-Za-z0-9+/]*=*\Z).*')
+
+
+class DatatypeClassifier:
+    """This class describes the classification of words into datatypes"""
+    def __init__(self, max_size=1000000, cache_file=None):
+        self.max_size = max_size  # Maximum number of words in the cache; the least recently used words are removed first
+        self.cache_file = cache_file  # The cache is loaded from and stored to this file if it is not None
+        # For every word, the mask of the datatypes that were checked and the mask of the datatypes the word belongs to. Datatypes are
+        # only checked when a node asks for them, because the checks of some datatypes are expensive
+        self.cache = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+        self.datetime_detector = DatetimeDetector.DatetimeDetector()
+        self.checks = {'float': self.is_float, 'integer': self.is_integer, 'hex': self.is_hex, 'datetime': self.is_datetime,
+                       'base64': self.is_base64, 'ipaddress': self.is_ipaddress}
+        if cache_file is not None and os.path.exists(cache_file):
+            self.load()
+
+    # This method returns the datatypes of a list of datatypes that all words belong to. 'string' is always kept and the order of the
+    # datatypes is not changed. The words are not checked any more once all datatypes except 'string' are ruled out
+    def filter_datatypes(self, datatype, words):
+        candidates = 0
+        for typ in datatype:
+            candidates |= DATATYPE_BITS.get(typ, 0)
+        for start in range(0, len(words), BATCH_SIZE):
+            if candidates == 0:
+                break
+            candidates &= self.classify(words[start:start + BATCH_SIZE], candidates)
+        return [typ for typ in datatype if typ not in DATATYPE_BITS or candidates & DATATYPE_BITS[typ]]
+
+    # This method returns the mask of the candidate datatypes that all words belong to. The words that are not in the cache or were
+    # not checked for all candidates are classified in one batch
+    def classify(self, words, candidates):
+        mask = candidates
+        unknown_words = []
+        unknown_word_set = set()
+        for word in words:
+            entry = self.cache.get(word)
+            if entry is not None and candidates & ~entry[0] == 0:
+                self.hits += 1
+                self.cache.move_to_end(word)
+                mask &= entry[1]
+            elif word not in unknown_word_set:
+                self.misses += 1
+                unknown_words.append(word)
+                unknown_word_set.add(word)
+        if len(unknown_words) > 0:
+            for word, word_mask in zip(unknown_words, self.classify_batch(unknown_words, candidates)):
+                mask &= word_mask
+                checked, valid = self.cache.get(word, (0, 0))
+                self.cache[word] = (checked | candidates, (valid & ~candidates) | word_mask)
+                self.cache.move_to_end(word)
+                if len(self.cache) > self.max_size:
+                    self.cache.popitem(last=False)
+        return mask
+
+    # This method returns the masks of the candidate datatypes that the words belong to. The regular expressions are matched against
+    # all simple words at once; the checks of the datatypes are only used for other words and for words that can not be decided by the
+    # regular expressions
+    def classify_batch(self, words, candidates):
+        masks = [0] * len(words)
+        if NOT_SIMPLE_CHARACTER.search(''.join(words)) is None:
+            simple_indices = range(len(words))
+            simple_words = words
+        else:
+            simple_indices = []
+            for i, word in enumerate(words):
+                if SIMPLE_WORD.fullmatch(word) is None:
+                    for typ in DATATYPES:
+                        if candidates & DATATYPE_BITS[typ] and self.checks[typ](word):
+                            masks[i] |= DATATYPE_BITS[typ]
+                else:
+                    simple_indices.append(i)
+            simple_words = [words[i] for i in simple_indices]
+
+        def get_indices(pattern):
+            return [i for i, match in zip(simple_indices, map(pattern.fullmatch, simple_words)) if match is not None]
+
+        for typ, pattern in [('float', FLOAT_PATTERN), ('integer', INTEGER_PATTERN), ('hex', HEX_PATTERN), ('ipaddress', IPV4_PATTERN),
+                             ('base64', BASE64_PATTERN)]:
+            if candidates & DATATYPE_BITS[typ]:
+                for i in get_indices(pattern):
+                    masks[i] |= DATATYPE_BITS[typ]
+        if candidates & DATATYPE_BITS['base64']:
+            for i in get_indices(BASE64_PADDED_PATTERN):
+                data_length = len(words[i].rstrip('='))
+                padding_length = len(words[i]) - data_length
+                if data_length % 4 == 0 or (data_length % 4 == 2 and padding_length >= 2) or (data_length % 4 == 3 and padding_length >= 1):
+                    masks[i] |= DATATYPE_BITS['base64']
+        for typ, pattern in [('ipaddress', IP_CANDIDATE_PATTERN), ('base64', BASE64_CANDIDATE_PATTERN)]:
+            bit = DATATYPE_BITS[typ]
+            if candidates & bit:
+                for i in get_indices(pattern):
+                    if not masks[i] & bit and self.checks[typ](words[i]):
+                        masks[i] |= bit
+        if candidates & DATATYPE_BITS['datetime']:
+            # is_datetime only accepts words with colons
+            for i in simple_indices:
+                if ':' in words[i] and self.checks['datetime'](words[i]):
+                    masks[i] |= DATATYPE_BITS['datetime']
+        return masks
+
+    # This method loads the cache from the cache file
+    def load(self):
+        with open(self.cache_file, 'r') as f:
+            data = json.load(f)
+        if data.get('version') != CACHE_FILE_VERSION or data.get('datatypes') != DATATYPES:
+            # The masks of other versions can not be interpreted
+            return
+        for word, checked, valid in data['words'][-self.max_size:]:
+            self.cache[word] = (checked, valid)
+
+    # This method stores the cache in the cache file, the least recently used words first
+    def save(self):
+        if self.cache_file is None:
+            return
+        data = {'version': CACHE_FILE_VERSION, 'datatypes': DATATYPES,
+                'words': [[word, checked, valid] for word, (checked, valid) in self.cache.items()]}
+        with open(self.cache_file, 'w') as f:
+            json.dump(data, f)
+
+    # This method returns the datetime format of the words, which is not cached, because it is only needed for the nodes that remain
+    # datetimes. If datetime formats are given, the first of them that all words match is returned
+    def get_datetime_format(self, words, datetime_formats=None):
+        return self.datetime_detector.get_format(words, datetime_formats)
+
+    # This method returns the datetime formats that all words match, so that the formats of many words can be narrowed down in parts
+    def filter_datetime_formats(self, datetime_formats, words):
+        return self.datetime_detector.filter_formats(datetime_formats, words)
+
+    # This method returns the cache statistics as a string
+    def get_statistics(self):
+        return 'Datatype cache: ' + str(len(self.cache)) + ' words, ' + str(self.hits) + ' hits, ' + str(self.misses) + ' misses\n' + \
+            self.datetime_detector.get_statistics()
+
+    def is_float(self, s):
+        try:
+            if not s[-1:].isdigit():
+                return False
+            float(s)
+            return s.replace('.', '').isdigit()
+        except ValueError:
+            return False
+
+    def is_integer(self, s):
+        try:
+            int(s)
+            if s[0] == '-':
+                s = s[1:]
+            return s.isdigit()
+        except ValueError:
+            return False
+
+    def is_hex(self, s):
+        try:
+            int(s, 16)
+            return True
+        except ValueError:
+            return False
+
+    def is_datetime(self, s):
+        return self.datetime_detector.is_datetime(s)
+
+    def is_base64(self, s):
+        # base64.decodestring was removed in Python 3.9, base64.decodebytes decodes in the same way
+        try:
+            base64.decodebytes(s.encode('utf-8'))
+            return True
+        except binascii.Error:
+            return False
+
+    def is_ipaddress(self, s):
+        try:
+            socket.inet_pton(socket.AF_INET, s)
+            return True
+        except socket.error:
+            try:
+                socket.inet_pton(socket.AF_INET6, s)
+                return True
+            except socket.error:
+                return False
@@ -0,0 +1,114 @@
+"""This class learns the formats of the datetime words in the log lines from a
+sample and checks if words are datetimes. Only words that do not match a
+learned format are parsed with dateutil.
+
+This program is free software: you can redistribute it and/or modify it under
+the terms of the GNU General Public License as published by the Free Software
+Foundation, either version 3 of the License, or (at your option) any later
+version.
+This program is distributed in the hope that it will be useful, but WITHOUT
+ANY WARRANTY; without even the implied warranty of MERCHANTABILITY or FITNESS
+FOR A PARTICULAR PURPOSE. See the GNU General Public License for more details.
+You should have received a copy of the GNU General Public License along with
+this program. If not, see <http://www.gnu.org/licenses/>.
+"""
+
+from dateutil.parser import parse as datetimeparse
+from datetime import datetime
+import re
+
+# Regular expressions of the format directives, which are also supported by the DateTimeModelElement of the aminer. Formats without
+# a year are not used, because dateutil checks them against the current year
+DIRECTIVE_PATTERNS = {'%Y': r'\d{4}', '%m': r'(?:0[1-9]|1[0-2])', '%d': r'(?:0[1-9]|[12]\d|3[01])', '%H': r'(?:[01]\d|2[0-3])',
+                      '%M': r'[0-5]\d', '%S': r'[0-5]\d', '%f': r'\d{1,6}', '%z': r'[+-](?:[01]\d|2[0-3]):?[0-5]\d'}
+# Formats that are tried when the formats are learned. A word that matches a format is also accepted by dateutil
+DATETIME_FORMATS = ['%H:%M:%S', '%H:%M:%S.%f', '%H:%M', '%Y-%m-%dT%H:%M:%S', '%Y-%m-%dT%H:%M:%S.%f', '%Y-%m-%dT%H:%M:%S%z',
+                    '%Y-%m-%dT%H:%M:%S.%f%z', '%Y-%m-%dT%H:%M:%SZ', '%Y-%m-%dT%H:%M:%S.%fZ', '%Y-%m-%d %H:%M:%S', '%Y-%m-%d %H:%M:%S.%f',
+                    '%Y/%m/%d %H:%M:%S']
+
+
+# This function compiles a format into a regular expression that matches the words of the format
+def compile_format(datetime_format):
+    pattern = ''
+    for part in re.split('(%[a-zA-Z])', datetime_format):
+        pattern += DIRECTIVE_PATTERNS.get(part, re.escape(part))
+    return re.compile(pattern)
+
+
+DATETIME_PATTERNS = {datetime_format: compile_format(datetime_format) for datetime_format in DATETIME_FORMATS}
+
+
+class DatetimeDetector:
+    """This class describes the detection of datetime words"""
+    def __init__(self, sample_size=10000, min_fraction=0.01):
+        self.sample_size = sample_size  # Number of words with colons that are used to learn the formats
+        self.min_fraction = min_fraction  # Minimum fraction of sample words that must match a format
+        # Formats that are checked before dateutil, ordered by the number of matching sample words. All formats are checked until the
+        # formats are learned
+        self.formats = list(DATETIME_FORMATS)
+        self.matches = 0
+        self.fallbacks = 0
+
+    # This method learns the datetime formats that occur in the sample words
+    def learn(self, words):
+        counts = {}
+        sample_count = 0
+        for word in words:
+            if ':' not in word:
+                continue
+            sample_count += 1
+            if sample_count > self.sample_size:
+                break
+            datetime_format = self.match_format(word, DATETIME_FORMATS)
+            if datetime_format is not None:
+                counts[datetime_format] = counts.get(datetime_format, 0) + 1
+        min_count = max(1, self.min_fraction * min(sample_count, self.sample_size))
+        self.formats = sorted((name for name in counts if counts[name] >= min_count), key=lambda name: counts[name], reverse=True)
+
+    # This method returns the first of the formats that the word matches or None if the word does not match any format
+    def match_format(self, word, formats):
+        for datetime_format in formats:
+            if DATETIME_PATTERNS[datetime_format].fullmatch(word) is not None:
+                # The regular expression does not check the number of days of the month
+                try:
+                    datetime.strptime(word, datetime_format)
+                except ValueError:
+                    continue
+                return datetime_format
+        return None
+
+    # This method checks if a word is a datetime. Only datetimes with colons are accepted
+    def is_datetime(self, s):
+        if ':' not in s:
+            return False
+        if self.match_format(s, self.formats) is not None:
+            self.matches += 1
+            return True
+        self.fallbacks += 1
+        try:
+            datetimeparse(s)
+            return True
+        except ValueError:
+            return False
+        except OverflowError:
+            return False
+
+    # This method returns the first of the formats that all words match or None if there is no such format. If no formats are given,
+    # the learned formats are used
+    def get_format(self, words, formats=None):
+        if formats is None:
+            formats = self.formats
+        for datetime_format in formats:
+            if all(self.match_format(word, [datetime_format]) is not None for word in words):
+                return datetime_format
+        return None
+
+    # This method returns the formats that all words match in the order of the formats
+    def filter_formats(self, formats, words):
+        return [datetime_format for datetime_format in formats if all(
+            self.match_format(word, [datetime_format]) is not None for word in words)]
+
+    # This method returns the statistics of the checks as a string
+    def get_statistics(self):
+        return 'Datetime formats: ' + str(self.formats) + ', ' + str(self.matches) + ' words matched a format, ' + str(
+            self.fallbacks) + ' words parsed with dateutil'
@@ -0,0 +1,97 @@
+"""This class draws a sample of bounded size from a stream of log lines. The
+tree can be built from the sample instead of all log lines.
+
+This program is free software: you can redistribute it and/or modify it under
+the terms of the GNU General Public License as published by the Free Software
+Foundation, either version 3 of the License, or (at your option) any later
+version.
+This program is distributed in the hope that it will be useful, but WITHOUT
+ANY WARRANTY; without even the implied warranty of MERCHANTABILITY or FITNESS
+FOR A PARTICULAR PURPOSE. See the GNU General Public License for more details.
+You should have received a copy of the GNU General Public License along with
+this program. If not, see <http://www.gnu.org/licenses/>.
+"""
+
+import random
+
+SAMPLING_METHODS = ['reservoir', 'stratified']
+# Stratum of all log lines for reservoir sampling and stratum of the log lines that do not get a stratum of their own
+ALL_LINES = 'all'
+OTHER_LINES = 'other'
+
+
+class LineSampler:
+    """This class describes the sampling of log lines"""
+    def __init__(self, sample_size, method='reservoir', seed=0):
+        if method not in SAMPLING_METHODS:
+            raise ValueError('Unknown sampling method ' + str(method) + ', use one of ' + str(SAMPLING_METHODS))
+        self.sample_size = sample_size
+        # The reservoir method samples all lines uniformly. The stratified method samples the same number of lines for every
+        # combination of line length and first word, so that rare kinds of log lines are also part of the sample
+        self.method = method
+        self.random = random.Random(seed)  # A fixed seed makes the sample and therefore the tree reproducible
+        self.lines_seen = 0
+        self.reservoirs = {}  # Sampled log lines of every stratum
+        self.counts = {}  # Number of log lines of every stratum
+
+    # This method returns the stratum of a log line. At most half as many strata as sampled lines are created, the log lines of all
+    # further strata are combined to one stratum
+    def get_stratum(self, log_line):
+        if self.method == 'reservoir':
+            return ALL_LINES
+        words = log_line.words
+        if len(words) == 0:
+            stratum = (0, None)
+        else:
+            stratum = (len(words), words[0])
+        if stratum not in self.counts and len(self.counts) >= self.sample_size // 2:
+            return OTHER_LINES
+        return stratum
+
+    # This method returns the number of sampled log lines of a stratum. If the strata are exhausted, half of the sample is used for the
+    # combined stratum, because it may contain many log lines of frequent kinds that only occur later in the input
+    def get_capacity(self, stratum):
+        if OTHER_LINES in self.counts:
+            if stratum == OTHER_LINES:
+                return self.sample_size - self.sample_size // 2
+            return max(1, (self.sample_size // 2) // (len(self.counts) - 1))
+        return max(1, self.sample_size // max(1, len(self.counts)))
+
+    # This method adds a log line to the sample with reservoir sampling, i.e., the n-th line of a stratum replaces a sampled line of
+    # the stratum with probability capacity / n
+    def add(self, log_line):
+        self.lines_seen += 1
+        stratum = self.get_stratum(log_line)
+        if stratum not in self.counts:
+            self.counts[stratum] = 0
+            self.reservoirs[stratum] = []
+            self.shrink_reservoirs()
+        self.counts[stratum] += 1
+        reservoir = self.reservoirs[stratum]
+        capacity = self.get_capacity(stratum)
+        if len(reservoir) < capacity:
+            reservoir.append(log_line)
+        else:
+            index = self.random.randrange(self.counts[stratum])
+            if index < capacity:
+                reservoir[index] = log_line
+
+    # This method removes randomly chosen log lines from all reservoirs that are larger than the capacity. A random subset of a
+    # uniform sample is again a uniform sample
+    def shrink_reservoirs(self):
+        for stratum in self.reservoirs:
+            reservoir = self.reservoirs[stratum]
+            capacity = self.get_capacity(stratum)
+            if len(reservoir) > capacity:
+                self.reservoirs[stratum] = self.random.sample(reservoir, capacity)
+
+    # This method returns the sampled log lines ordered by their line ids. The occurrence of every sampled line is set to the number
+    # of log lines of its stratum that it represents, so that the occurrences sum up to the number of lines seen
+    def get_log_lines(self):
+        log_lines = []
+        for stratum in self.reservoirs:
+            reservoir = self.reservoirs[stratum]
+            for log_line in reservoir:
+                log_line.occurrence = self.counts[stratum] / float(len(reservoir))
+                log_lines.append(log_line)
+        return sorted(log_lines, key=lambda log_line: log_line.line_id)
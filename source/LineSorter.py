@@ -0,0 +1,240 @@
+"""This class sorts the unique log lines by their words on disk, so that the
+tree can be built from a file instead of log lines that are stored in memory.
+All log lines that start with the same words are a contiguous range of the
+sorted file.
+
+This program is free software: you can redistribute it and/or modify it under
+the terms of the GNU General Public License as published by the Free Software
+Foundation, either version 3 of the License, or (at your option) any later
+version.
+This program is distributed in the hope that it will be useful, but WITHOUT
+ANY WARRANTY; without even the implied warranty of MERCHANTABILITY or FITNESS
+FOR A PARTICULAR PURPOSE. See the GNU General Public License for more details.
+You should have received a copy of the GNU General Public License along with
+this program. If not, see <http://www.gnu.org/licenses/>.
+"""
+
+from array import array
+from collections import Counter
+import heapq
+import os
+import shutil
+import struct
+import sys
+import tempfile
+
+# Header of a log line in the runs: number of bytes of the words, number of the first occurrence and occurrence
+RUN_HEADER = struct.Struct('<IQQ')
+# Header of a log line in the sorted file: number of leading words that are equal to the previous line, number of the first
+# occurrence, occurrence and number of words
+RECORD_HEADER = struct.Struct('<IQQI')
+OFFSET = struct.Struct('<Q')
+# Estimated number of bytes of a buffered log line in addition to its words
+LINE_OVERHEAD = 200
+
+
+class LineSorter:
+    """This class describes the external sort of log lines by their words"""
+    def __init__(self, directory=None, max_memory=268435456):
+        if directory is not None:
+            os.makedirs(directory, exist_ok=True)
+        self.directory = tempfile.mkdtemp(prefix='aecid-pg-', dir=directory)
+        self.max_memory = max_memory  # Maximum number of bytes of buffered log lines, which are sorted and written as a run when exceeded
+        self.buffer = {}  # First occurrence and occurrence of every buffered log line with the words as big-endian bytes as key
+        self.buffer_size = 0
+        self.run_files = []
+        self.lines_added = 0
+        self.line_count = 0  # Number of unique log lines in the sorted file
+        self.records_file = None
+        self.offsets_file = None
+
+    # This method adds a log line, which stands for occurrence identical lines. The words are converted to big-endian bytes, so that
+    # bytes are ordered like the words and lines are ordered before the lines that continue them
+    def add(self, words, occurrence=1):
+        words = array('I', words)
+        if sys.byteorder == 'little':
+            words.byteswap()
+        key = words.tobytes()
+        entry = self.buffer.get(key)
+        if entry is None:
+            self.buffer[key] = [self.lines_added, occurrence]
+            self.buffer_size += len(key) + LINE_OVERHEAD
+        else:
+            entry[1] += occurrence
+        self.lines_added += 1
+        if self.buffer_size > self.max_memory:
+            self.write_run()
+
+    # This method writes the buffered log lines sorted by their words to a new run file and clears the buffer
+    def write_run(self):
+        file_name = os.path.join(self.directory, 'run%d' % len(self.run_files))
+        with open(file_name, 'wb') as f:
+            for key in sorted(self.buffer):
+                first, occurrence = self.buffer[key]
+                f.write(RUN_HEADER.pack(len(key), first, occurrence))
+                f.write(key)
+        self.run_files.append(file_name)
+        self.buffer = {}
+        self.buffer_size = 0
+
+    # This method merges the runs to the sorted file. Identical log lines of different runs are combined. For every log line, the number
+    # of leading words that are equal to the previous log line is stored, which marks the ends of the ranges of all first words
+    def finish(self):
+        if len(self.buffer) > 0 or len(self.run_files) == 0:
+            self.write_run()
+        self.buffer = None
+        run_files = [open(file_name, 'rb') for file_name in self.run_files]
+        try:
+            with open(os.path.join(self.directory, 'records'), 'wb') as records_file, \
+                    open(os.path.join(self.directory, 'offsets'), 'wb') as offsets_file:
+                offset = 0
+                previous_key = None
+                line = None
+                for key, first, occurrence in heapq.merge(*[read_run(f) for f in run_files]):
+                    if key == previous_key:
+                        # The runs are merged by the words and the first occurrence, therefore the first line has the first occurrence
+                        line[2] += occurrence
+                        continue
+                    if line is not None:
+                        offset += self.write_record(records_file, offsets_file, offset, *line)
+                    line = [get_common_words(previous_key, key), first, occurrence, key]
+                    previous_key = key
+                if line is not None:
+                    offset += self.write_record(records_file, offsets_file, offset, *line)
+        finally:
+            for f in run_files:
+                f.close()
+        for file_name in self.run_files:
+            os.remove(file_name)
+        self.run_files = []
+        self.records_file = open(os.path.join(self.directory, 'records'), 'rb')
+        self.offsets_file = open(os.path.join(self.directory, 'offsets'), 'rb')
+
+    # This method writes a log line to the sorted file and its offset to the offsets file and returns the number of written bytes
+    def write_record(self, records_file, offsets_file, offset, common_words, first, occurrence, key):
+        words = array('I')
+        words.frombytes(key)
+        if sys.byteorder == 'little':
+            words.byteswap()
+        offsets_file.write(OFFSET.pack(offset))
+        records_file.write(RECORD_HEADER.pack(common_words, first, occurrence, len(words)))
+        records_file.write(words.tobytes())
+        self.line_count += 1
+        return RECORD_HEADER.size + len(key)
+
+    # This method yields the numbers, the numbers of common words with the previous log line of the range (0 for the first line), the
+    # first occurrences, the occurrences and the words of the log lines in the ranges that start with the given numbers of log lines,
+    # which are ascending. A range contains all following log lines that have at least depth words in common with the first line.
+    # Consecutive ranges are read without seeking
+    def read_ranges(self, starts, depth):
+        records_file = self.records_file
+        pending = None
+        for start in starts:
+            if pending is None or pending[0] != start:
+                self.offsets_file.seek(start * OFFSET.size)
+                records_file.seek(OFFSET.unpack(self.offsets_file.read(OFFSET.size))[0])
+                pending = (start,) + read_record(records_file)
+            yield (start, 0) + pending[2:]
+            position = start + 1
+            pending = None
+            while position < self.line_count:
+                record = (position,) + read_record(records_file)
+                if record[1] < depth:
+                    pending = record
+                    break
+                yield record
+                position += 1
+
+    # This method counts the words at this depth of the log lines in the ranges that start with the given numbers. It returns the same
+    # word statistics as Node.count_words, except that the groups contain the numbers of the first log lines of the ranges with the
+    # continuing lines of every word. The words are counted in the order of their first occurrence
+    def count_words(self, depth, starts, delimiter_run_ids):
+        delimiter_flag = False
+        counter = Counter()
+        ending_counter = Counter()
+        continuing_counter = Counter()
+        first_occurrences = {}  # First occurrence of every word, which orders the counter at the end
+        groups = {}
+        line_count = 0
+        range_start = None
+        group_added = False
+        for position, common_words, first, occurrence, words in self.read_ranges(starts, depth):
+            if len(words) <= depth:
+                # Only empty log lines at the root pass over a node without a word at its depth, the other log lines ended before
+                if depth == 0:
+                    line_count += occurrence
+                continue
+            line_count += occurrence
+            word = words[depth]
+            # The log lines with the same word at this depth are a range of the log lines, which is passed to the child of the word
+            if common_words <= depth:
+                range_start = position
+                group_added = False
+            first_occurrence = first_occurrences.get(word)
+            if first_occurrence is None:
+                first_occurrences[word] = first
+                if word in delimiter_run_ids:
+                    delimiter_flag = True
+            elif first < first_occurrence:
+                first_occurrences[word] = first
+            counter[word] += occurrence
+            if len(words) == depth + 1:
+                ending_counter[word] += occurrence
+            elif not group_added:
+                continuing_counter[word] += occurrence
+                group = groups.get(word)
+                if group is None:
+                    group = groups[word] = array('I')
+                group.append(range_start)
+                group_added = True
+            else:
+                continuing_counter[word] += occurrence
+        counter = Counter({word: counter[word] for word in sorted(first_occurrences, key=first_occurrences.__getitem__)})
+        return counter, ending_counter, continuing_counter, groups, line_count, delimiter_flag
+
+    # This method removes the files of the sort
+    def close(self):
+        for f in [self.records_file, self.offsets_file]:
+            if f is not None:
+                f.close()
+        self.records_file = None
+        self.offsets_file = None
+        shutil.rmtree(self.directory, ignore_errors=True)
+
+    # This method returns the number of unique log lines in the sorted file
+    def __len__(self):
+        return self.line_count
+
+
+# This function yields the words, the first occurrences and the occurrences of the log lines of a run
+def read_run(f):
+    while True:
+        header = f.read(RUN_HEADER.size)
+        if len(header) < RUN_HEADER.size:
+            return
+        length, first, occurrence = RUN_HEADER.unpack(header)
+        yield f.read(length), first, occurrence
+
+
+# This function reads a log line of the sorted file and returns the number of common words, the first occurrence, the occurrence and
+# the words
+def read_record(f):
+    common_words, first, occurrence, length = RECORD_HEADER.unpack(f.read(RECORD_HEADER.size))
+    words = array('I')
+    words.frombytes(f.read(4 * length))
+    return common_words, first, occurrence, words
+
+
+# This function returns the number of leading words that two keys of big-endian words have in common
+def get_common_words(key1, key2):
+    if key1 is None:
+        return 0
+    low = 0
+    high = min(len(key1), len(key2)) // 4
+    while low < high:
+        middle = (low + high + 1) // 2
+        if key1[:4 * middle] == key2[:4 * middle]:
+            low = middle
+        else:
+            high = middle - 1
+    return low
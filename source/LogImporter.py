@@ -0,0 +1,270 @@
+"""This class imports log data in large binary chunks and converts every line
+into a LogLine object.
+
+This program is free software: you can redistribute it and/or modify it under
+the terms of the GNU General Public License as published by the Free Software
+Foundation, either version 3 of the License, or (at your option) any later
+version.
+This program is distributed in the hope that it will be useful, but WITHOUT
+ANY WARRANTY; without even the implied warranty of MERCHANTABILITY or FITNESS
+FOR A PARTICULAR PURPOSE. See the GNU General Public License for more details.
+You should have received a copy of the GNU General Public License along with
+this program. If not, see <http://www.gnu.org/licenses/>.
+"""
+
+import bz2
+import glob
+import gzip
+import itertools
+import lzma
+import multiprocessing
+import os
+import re
+import sys
+import time
+
+from source import LogLine, Tokenizer, Vocabulary
+
+# According to RFC3164 only ascii code symbols 32-126 should occur in log data. Tabulators are kept as well. All other bytes are
+# removed with a single bytes.translate call, which also removes all bytes of multi-byte UTF-8 characters.
+DELETE_BYTES = bytes(c for c in range(256) if not (31 < c < 127 or c == 9))
+# Same as DELETE_BYTES, but keeps the line feeds. Used to check whether a whole chunk needs to be sanitized at all
+DELETE_BYTES_KEEP_NEWLINE = DELETE_BYTES.replace(b'\n', b'')
+# Magic bytes at the beginning of compressed files and the functions to open them
+COMPRESSIONS = [(b'\x1f\x8b', gzip.open), (b'BZh', bz2.open), (b'\xfd7zXZ\x00', lzma.open)]
+# Extensions of compressed files, which are removed to get the rotation number of a file
+COMPRESSION_EXTENSIONS = re.compile(r'(\.(gz|bz2|xz))+$')
+ROTATION_NUMBER = re.compile(r'\.(\d+)$')
+# Number of byte ranges per process; more ranges than processes keep the processes busy if the ranges need different times
+RANGES_PER_PROCESS = 4
+
+
+class LogImporter:
+    """This class describes the import of log files"""
+    def __init__(self, delimiters, time_stamp_length, chunk_size=1048576, processes=1, vocabulary=None, time_stamp_detector=None,
+                 keep_line_text=False, collapse_delimiters=False):
+        if vocabulary is None:
+            vocabulary = Vocabulary.Vocabulary()
+        self.vocabulary = vocabulary  # The words of the log lines are stored as ids of this vocabulary
+        self.delimiters = delimiters
+        self.collapse_delimiters = collapse_delimiters
+        self.tokenizer = Tokenizer.Tokenizer(delimiters, collapse_delimiters)
+        self.time_stamp_length = time_stamp_length
+        # If a time stamp detector is used, the time stamps are detected instead of removing time_stamp_length characters
+        self.time_stamp_detector = time_stamp_detector
+        # The line texts are only stored in the log lines if they are needed, because they are not used to build the tree
+        self.keep_line_text = keep_line_text
+        self.chunk_size = chunk_size
+        self.processes = processes
+        self.bytes_read = 0
+        self.lines_read = 0
+        self.duration = 0.0
+
+    # This method reads log files in binary chunks and yields a LogLine object for every line that is not empty. The input is a path, a
+    # glob pattern, '-' for stdin or a list of them. Compressed files are decompressed while they are read
+    def import_file(self, input_file):
+        for log_line in self.import_words(input_file):
+            log_line.words = self.vocabulary.get_ids(log_line.words)
+            yield log_line
+
+    # This method works like import_file, but the words of the LogLine objects are not added to the vocabulary and remain strings
+    def import_words(self, input_file):
+        start_time = time.time()
+        self.bytes_read = 0
+        self.lines_read = 0
+        line_id = 0
+        for path in self.get_input_files(input_file):
+            if self.processes > 1 and 'fork' in multiprocessing.get_all_start_methods() and path != '-' and os.path.isfile(path) and \
+                    self.get_open_function(path) is None:
+                log_lines = self.import_file_parallel(path)
+            else:
+                log_lines = self.import_file_sequential(path)
+            for time_stamp, line_text, words in log_lines:
+                if not self.keep_line_text:
+                    line_text = None
+                yield LogLine.LogLine(line_id, time_stamp, line_text, words)
+                line_id += 1
+                if line_id % 100000 == 0:
+                    print(str(line_id) + ' lines have been imported!')
+        self.lines_read = line_id
+        self.duration = time.time() - start_time
+
+    # This method returns the paths of all input files. The files matching a glob pattern are a rotated set and are ordered oldest first
+    def get_input_files(self, input_file):
+        if isinstance(input_file, str):
+            input_file = [input_file]
+        input_files = []
+        for pattern in input_file:
+            if pattern == '-':
+                input_files.append(pattern)
+                continue
+            if os.path.exists(pattern):
+                paths = [pattern]
+            else:
+                paths = glob.glob(pattern)
+            if len(paths) == 0:
+                raise FileNotFoundError('No input file matches ' + pattern)
+            input_files.extend(sorted(paths, key=self.get_rotation_key))
+        return input_files
+
+    # This method returns the sort key of a rotated file. Files with higher rotation numbers (e.g., mainlog.2.gz) are older, files
+    # without rotation number (e.g., mainlog-20200229.gz or the current mainlog) are ordered by their modification time
+    def get_rotation_key(self, path):
+        match = ROTATION_NUMBER.search(COMPRESSION_EXTENSIONS.sub('', path))
+        if match is None:
+            return 0, os.path.getmtime(path), path
+        return -int(match.group(1)), 0, path
+
+    # This method returns the function to open a compressed file, which is detected by its magic bytes, or None for uncompressed files
+    def get_open_function(self, path):
+        with open(path, 'rb') as f:
+            magic = f.read(6)
+        for magic_bytes, open_function in COMPRESSIONS:
+            if magic.startswith(magic_bytes):
+                return open_function
+        return None
+
+    # This method imports a log file, a compressed log file or stdin in the current process
+    def import_file_sequential(self, input_file):
+        if input_file == '-':
+            for line in self.learn_time_stamp_formats(self.read_lines(sys.stdin.buffer, None)):
+                yield self.split_line(line)
+            return
+        open_function = self.get_open_function(input_file)
+        if open_function is None:
+            open_function = open
+        with open_function(input_file, 'rb') as f:
+            for line in self.learn_time_stamp_formats(self.read_lines(f, None)):
+                yield self.split_line(line)
+
+    # This method learns the time stamp formats from the first lines if this was not done yet and returns an iterator over all lines
+    def learn_time_stamp_formats(self, lines):
+        if self.time_stamp_detector is None or self.time_stamp_detector.formats_learned:
+            return lines
+        sample = list(itertools.islice(lines, self.time_stamp_detector.sample_size))
+        self.time_stamp_detector.learn(sample)
+        return itertools.chain(sample, lines)
+
+    # This method splits the log file into byte ranges that start and end at line breaks. The ranges are sanitized and tokenized in a
+    # process pool. The results are returned in the order of the ranges, so that the line ids are the same as in the sequential import
+    def import_file_parallel(self, input_file):
+        if self.time_stamp_detector is not None and not self.time_stamp_detector.formats_learned:
+            bytes_read = self.bytes_read
+            with open(input_file, 'rb') as f:
+                self.learn_time_stamp_formats(self.read_lines(f, None))
+            self.bytes_read = bytes_read
+        ranges = self.get_ranges(input_file, self.processes * RANGES_PER_PROCESS)
+        arguments = [(input_file, start, end, self.delimiters, self.time_stamp_length, self.time_stamp_detector, self.chunk_size,
+                      self.collapse_delimiters) for start, end in ranges]
+        # The workers are forked, because spawned workers would import and run the main script again
+        with multiprocessing.get_context('fork').Pool(min(self.processes, len(ranges))) as pool:
+            for time_stamps, words_list in pool.imap(import_range, arguments):
+                for i in range(len(time_stamps)):
+                    if self.keep_line_text:
+                        yield time_stamps[i], ''.join(words_list[i]), words_list[i]
+                    else:
+                        yield time_stamps[i], None, words_list[i]
+        self.bytes_read += os.path.getsize(input_file)
+
+    # This method returns up to count byte ranges of the file. Every range except the first starts right after a line break
+    def get_ranges(self, input_file, count):
+        size = os.path.getsize(input_file)
+        range_size = max(size // count, self.chunk_size)
+        boundaries = [0]
+        with open(input_file, 'rb') as f:
+            offset = range_size
+            while offset < size:
+                f.seek(offset)
+                # Move the boundary behind the next line break
+                while True:
+                    block = f.read(self.chunk_size)
+                    if len(block) == 0:
+                        offset = size
+                        break
+                    positions = [pos for pos in (block.find(b'\n'), block.find(b'\r')) if pos != -1]
+                    if len(positions) > 0:
+                        offset += min(positions) + 1
+                        break
+                    offset += len(block)
+                if offset < size:
+                    boundaries.append(offset)
+                offset += range_size
+        boundaries.append(size)
+        return [(boundaries[i], boundaries[i + 1]) for i in range(len(boundaries) - 1)]
+
+    # This method reads up to length bytes (or the whole file if length is None) in chunks and yields all sanitized lines
+    def read_lines(self, f, length):
+        remainder = b''
+        while length is None or length > 0:
+            if length is None:
+                chunk = f.read(self.chunk_size)
+            else:
+                chunk = f.read(min(self.chunk_size, length))
+                length -= len(chunk)
+            self.bytes_read += len(chunk)
+            if len(chunk) == 0:
+                break
+            chunk = self.normalize_line_breaks(remainder + chunk)
+            # Most chunks only contain valid characters; in this case the lines do not have to be translated one by one
+            needs_translation = len(chunk.translate(None, DELETE_BYTES_KEEP_NEWLINE)) != len(chunk)
+            lines = chunk.split(b'\n')
+            # The last element is an incomplete line, which is continued by the next chunk
+            remainder = lines.pop()
+            for line in self.sanitize_lines(lines, needs_translation):
+                yield line
+
+        # The last line is not terminated by a line break. Lines that consist of less than two characters are not processed
+        if len(remainder.decode('utf-8', 'replace')) >= 2:
+            for line in self.sanitize_lines([remainder], True):
+                yield line
+
+    # This method replaces all line breaks with '\n'. Like files opened in text mode, '\n', '\r\n' and '\r' are all line breaks
+    def normalize_line_breaks(self, chunk):
+        if b'\r' in chunk:
+            # A '\r\n' that is split between two chunks results in an additional empty line, which is skipped anyway
+            chunk = chunk.replace(b'\r\n', b'\n').replace(b'\r', b'\n')
+        return chunk
+
+    # This method removes the characters that should not occur in log data from all lines and returns the non-empty lines as strings
+    def sanitize_lines(self, lines, needs_translation):
+        sanitized_lines = []
+        for line in lines:
+            if len(line) == 0:
+                # Do not process empty log lines
+                continue
+            if needs_translation:
+                line = line.translate(None, DELETE_BYTES)
+            sanitized_lines.append(line.strip(b' \t').decode('ascii'))
+        return sanitized_lines
+
+    # This method splits a sanitized line into time stamp, line text and words
+    def split_line(self, line):
+        if self.time_stamp_detector is None:
+            time_stamp = line[0:self.time_stamp_length]
+            line = line[self.time_stamp_length + 1:]
+        else:
+            time_stamp, line = self.time_stamp_detector.split(line)
+        return time_stamp, line, self.tokenizer.tokenize(line)
+
+    # This method returns the import statistics as a string
+    def get_statistics(self):
+        duration = max(self.duration, 1e-9)
+        return 'Imported ' + str(self.lines_read) + ' lines (' + str(self.bytes_read) + ' bytes) in ' + '%.2f' % self.duration + \
+               ' seconds: ' + str(int(self.lines_read / duration)) + ' lines/s, ' + str(int(self.bytes_read / duration)) + ' bytes/s'
+
+
+# This function imports a byte range of a log file in a worker process. Only the time stamps and words are returned, because the line
+# text is the concatenation of the words
+def import_range(arguments):
+    input_file, start, end, delimiters, time_stamp_length, time_stamp_detector, chunk_size, collapse_delimiters = arguments
+    log_importer = LogImporter(delimiters, time_stamp_length, chunk_size, time_stamp_detector=time_stamp_detector,
+                               collapse_delimiters=collapse_delimiters)
+    time_stamps = []
+    words_list = []
+    with open(input_file, 'rb') as f:
+        f.seek(start)
+        for line in log_importer.read_lines(f, end - start):
+            time_stamp, _, words = log_importer.split_line(line)
+            time_stamps.append(time_stamp)
+            words_list.append(words)
+    return time_stamps, words_list
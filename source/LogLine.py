@@ -13,9 +13,12 @@ this program. If not, see <http://www.gnu.org/licenses/>.
 
 class LogLine:
     """This class describes log lines"""
+    # Slots avoid a dictionary per log line, which makes up a large part of the memory used for big log files
+    __slots__ = ['line_id', 'time_stamp', 'line_text', 'words', 'occurrence']
+
     def __init__(self, line_id, time_stamp, line_text, words):
         self.line_id = line_id
         self.time_stamp = time_stamp
-        self.line_text = line_text
+        self.line_text = line_text  # None if the line text is not needed
         self.words = words
-        self.cluster = ''
+        self.occurrence = 1  # Number of log lines with identical words that are represented by this log line
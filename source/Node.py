@@ -12,14 +12,34 @@ You should have received a copy of the GNU General Public License along with
 this program. If not, see <http://www.gnu.org/licenses/>.
 """
 
-from collections import Counter
-from dateutil.parser import parse as datetimeparse
-import base64
-import binascii
-import socket
+from array import array
+from collections import Counter, deque
+import itertools
+import multiprocessing
+import sys
+
+from source import CardinalitySketch, DatatypeClassifier, LineSorter, LogLine, OtherWords, PrefixTrie, ShardCoordinator, TokenMatrix, \
+    Vocabulary
+
+
+# Word id that stands for all words that are not counted exactly by count_frequent_words
+OTHER_WORDS = -1
+# Datatypes that the words of a new node may belong to
+NODE_DATATYPES = ['string', 'integer', 'float', 'ipaddress', 'datetime']  # , 'base64', 'hex']
 
 
 class Node:
+    # The datatypes of the words are cached in a classifier that is shared by all nodes. The pipeline sets it with the cache size and the
+    # cache file of the configuration, otherwise a classifier with the default cache is created when it is needed first
+    datatype_classifier = None
+    # If this is True, build_tree stores the word statistics of every node, so that new log lines can be inserted by update_tree
+    keep_statistics = False
+    # If this is set, build_children takes the word statistics from this cache, which is shared by the trees of a parameter sweep
+    word_count_cache = None
+    # If this is larger than 0, nodes with more distinct words are counted with a bounded number of counters: only the words that can
+    # exceed theta1 are counted exactly, all other words are aggregated
+    max_exact_words = 0
+
     def __init__(self, optional_node_pairs=None, merge_tuple=None):
         if optional_node_pairs is None:
             optional_node_pairs = []
@@ -34,7 +54,10 @@ class Node:
         self.children = []
         self.theta1 = 0
         self.ending_lines = 0
-        self.datatype = ['string', 'integer', 'float', 'ipaddress']  # , 'datetime', 'base64', 'hex']
+        self.continuing_lines = 0  # Number of log lines that build_tree passed over this node to its children
+        self.statistics = None  # Word statistics of the log lines passed to this node, which are only stored if keep_statistics is set
+        self.datatype = list(NODE_DATATYPES)
+        self.datetime_format = None  # Format of the datetimes, which is written to the DateTimeModelElement
         self.ending_line_numbers = []  # Used for evaluation
         self.ID = 1
         self.optional_node_pairs = optional_node_pairs  # List of the First and the last
@@ -59,6 +82,7 @@ class Node:
         new_node.ending_lines = self.ending_lines
         new_node.datatype = []
         new_node.datatype.extend(self.datatype)
+        new_node.datetime_format = self.datetime_format
 
         if self != end_node:
             for child in self.children:
@@ -76,39 +100,43 @@ class Node:
 
         return [new_node, new_end_node]
 
-    # This method returns a textual representation of the parser tree, with additional node information (line occurrences, end node, theta)
+    # This method returns a textual representation of the parser tree, with additional node information (line occurrences, end node, theta).
+    # The nodes are visited depth first from a stack instead of recursive calls, so that the depth of the tree is not limited by the
+    # recursion limit
     def to_string(self, depth):
-        return_string = ''
-
-        numberstring = ''
-        if len(self.ending_line_numbers) > 0:
-            numberstring = ' EndingLineNumbers = ['
-            for ending_linenumber in self.ending_line_numbers:
-                numberstring += str(ending_linenumber) + ','
-            numberstring += ']'
-
-        if self.element is None:
-            return_string += 'root (' + str(self.occurrence) + ')\n'
-        else:
-            if self.is_list:
-                if self.end:
-                    return_string += ' ' * depth + '- ' + str(self.element) + ' (' + str(self.occurrence) + ') - End (' + str(
-                        self.ending_lines) + ') - Theta=' + str(self.theta1) + numberstring + '\n'
-                else:
-                    return_string += ' ' * depth + '- ' + str(self.element) + ' (' + str(self.occurrence) + ') - Theta=' + str(
-                        self.theta1) + numberstring + '\n'
+        return_strings = []
+        stack = [(self, depth)]
+        while len(stack) > 0:
+            node, depth = stack.pop()
+
+            numberstring = ''
+            if len(node.ending_line_numbers) > 0:
+                numberstring = ' EndingLineNumbers = ['
+                for ending_linenumber in node.ending_line_numbers:
+                    numberstring += str(ending_linenumber) + ','
+                numberstring += ']'
+
+            if node.element is None:
+                return_strings.append('root (' + str(node.occurrence) + ')\n')
             else:
-                if self.end:
-                    return_string += ' ' * depth + '- ' + self.element + ' (' + str(self.occurrence) + ') - End (' + str(
-                        self.ending_lines) + ') - Theta=' + str(self.theta1) + numberstring + '\n'
+                if node.is_list:
+                    if node.end:
+                        return_strings.append(' ' * depth + '- ' + str(node.element) + ' (' + str(node.occurrence) + ') - End (' + str(
+                            node.ending_lines) + ') - Theta=' + str(node.theta1) + numberstring + '\n')
+                    else:
+                        return_strings.append(' ' * depth + '- ' + str(node.element) + ' (' + str(node.occurrence) + ') - Theta=' + str(
+                            node.theta1) + numberstring + '\n')
                 else:
-                    return_string += ' ' * depth + '- ' + self.element + ' (' + str(self.occurrence) + ') - Theta=' + str(
-                        self.theta1) + numberstring + '\n'
+                    if node.end:
+                        return_strings.append(' ' * depth + '- ' + node.element + ' (' + str(node.occurrence) + ') - End (' + str(
+                            node.ending_lines) + ') - Theta=' + str(node.theta1) + numberstring + '\n')
+                    else:
+                        return_strings.append(' ' * depth + '- ' + node.element + ' (' + str(node.occurrence) + ') - Theta=' + str(
+                            node.theta1) + numberstring + '\n')
 
-        for child in self.children:
-            return_string += child.to_string(depth + 1)
+            stack.extend((child, depth + 1) for child in reversed(node.children))
 
-        return return_string
+        return ''.join(return_strings)
 
     # This method returns the total amount of nodes in the parser tree
     def count_nodes(self):
@@ -199,6 +227,14 @@ class Node:
             else:
                 return sum1
 
+    # This method returns the total amount of log lines that end in a node of the tree built by build_tree, i.e., all log lines except
+    # the ones that were cut by theta4 or theta5
+    def count_ending_lines(self):
+        sum1 = self.ending_lines
+        for child in self.children:
+            sum1 += child.count_ending_lines()
+        return sum1
+
     # This method returns an array of all node datatypes. A counter could be used to aggregate the result
     def count_datatypes(self):
         if self.is_variable:
@@ -208,7 +244,7 @@ class Node:
                 this_datatype = 'base64'
             elif 'hex' in self.datatype:
                 this_datatype = 'hex'
-            elif 'datetime' in self.datatype:
+            elif 'datetime' in self.datatype and self.datetime_format is not None:
                 this_datatype = 'datetime'
             elif 'integer' in self.datatype:
                 this_datatype = 'integer'
@@ -458,6 +494,7 @@ class Node:
                     for i in range(1, len(self.children)):
                         compare_child.datatype = [typ for typ in compare_child.datatype if typ in self.children[i].datatype]
                         compare_child.merge_similar_paths_enhanced(self.children[i], True)
+                    compare_child.remove_datetime_without_format()
                     self.children = [compare_child]
 
             for child in self.children:
@@ -1149,6 +1186,9 @@ class Node:
     # This method changes the attributes of self to allow matching of both self and node
     def merge_node(self, node):
         self.datatype = [typ for typ in self.datatype if typ in node.datatype]
+        if self.datetime_format != node.datetime_format:
+            self.datetime_format = None
+        self.remove_datetime_without_format()
 
         # Updating variable/list element
         if node.is_variable and not self.is_variable:
@@ -1278,8 +1318,13 @@ class Node:
                             if parents_list[0].is_variable:
                                 tmp_list = [typ for typ in parents_list[0].datatype if all(
                                         typ in parents_list[k].datatype for k in range(1,len(parents_list)))]
+                                if any(parents_list[k].datetime_format != parents_list[0].datetime_format for k in
+                                       range(1, len(parents_list))):
+                                    for k in range(len(parents_list)):
+                                        parents_list[k].datetime_format = None
                                 for k in range(len(parents_list)):
                                     parents_list[k].datatype = tmp_list
+                                    parents_list[k].remove_datetime_without_format()
 
                             if any(parents_list[k].end for k in range(len(parents_list))):
                                 for k in range(len(parents_list)):
@@ -1351,78 +1396,404 @@ class Node:
                 lists.extend(child.get_clusters())
             return lists
 
+    # This method returns the templates of all paths through the tree in depth first order. The nodes are visited from a stack like in
+    # to_string, so that the depth of the tree is not limited by the recursion limit
     def get_templates(self, string):
-        if self.element is not None:
-            new_string = string + str(self.element)
-        else:
-            new_string = ''
-
-        if len(self.children) == 0:
-            return [new_string]
-        elif len(self.children) == 1:
-            child = self.children[0]
-            list1 = []
-
-            if self.end is True:
-                list1.append(new_string)
-
-            list1.extend(child.get_templates(new_string))
-            return list1
-        else:
-            list1 = []
-            for child in self.children:
-                list1.extend(child.get_templates(new_string))
-            return list1
+        templates = []
+        stack = [(self, string)]
+        while len(stack) > 0:
+            node, string = stack.pop()
+            if node.element is not None:
+                new_string = string + str(node.element)
+            else:
+                new_string = ''
 
-    # This method builds the parser tree recursively
+            if len(node.children) == 0:
+                templates.append(new_string)
+            else:
+                if len(node.children) == 1 and node.end is True:
+                    templates.append(new_string)
+                stack.extend((child, new_string) for child in reversed(node.children))
+        return templates
+
+    # This method builds the tree below this node from the log lines. The nodes are built from a work queue instead of recursive calls,
+    # so that the depth of the tree is not limited by the recursion limit and the log lines of a node are released as soon as they are
+    # passed to its children. The queue is processed depth first ('dfs') or breadth first ('bfs'); both result in the same tree. If
+    # more than one process is used, subtrees with at least min_subtree_lines log lines are built in a process pool. The 'lines' engine
+    # counts the words of the log lines at every node, the 'trie' engine inserts the log lines into a prefix trie first and counts the
+    # words of the trie nodes instead, so that log lines with the same first words are only counted once. The 'numpy' engine counts the
+    # words of all nodes of a depth together with numpy and builds the tree breadth first. The 'shards' engine distributes the log
+    # lines to the workers of the shard coordinator, merges their word counts of the nodes and builds the tree breadth first; the
+    # subtrees of nodes whose log lines are all stored by one worker are built by the worker. All engines result in the same tree.
+    # A trie that was built by build_prefix_trie from the same log lines and depth can be passed to build several trees from it. Instead
+    # of the dictionary of the log lines, a line sorter that was filled by sort_log_lines can be passed to build the tree from the log
+    # lines that are sorted on disk, which also results in the same tree
     def build_tree(self, depth, log_line_dict, delimiters, theta1, theta2, theta3, theta4, theta5, theta6, damping, force_branch,
-                   force_var):
-        # Theta1 is increased in every recursion, however, should be limited. If theta1 > 0.5, only 1 child would be possible
+                   force_var, vocabulary, order='dfs', processes=1, min_subtree_lines=10000, engine='lines', trie=None, shards=None):
+        if order not in ['dfs', 'bfs']:
+            raise ValueError('Unknown build order ' + str(order) + ', use dfs or bfs')
+        if engine not in ['lines', 'trie', 'numpy', 'shards']:
+            raise ValueError('Unknown build engine ' + str(engine) + ', use lines, trie, numpy or shards')
+        if engine != 'lines' and processes > 1:
+            raise ValueError('The ' + engine + ' engine builds the tree in a single process')
+        if engine == 'shards' and shards is None:
+            raise ValueError('The shards engine requires a shard coordinator')
+        if isinstance(log_line_dict, LineSorter.LineSorter):
+            if depth != 0 or engine != 'lines' or processes > 1:
+                raise ValueError('The sorted log lines are only read by the lines engine in a single process from the root')
+            # The nodes refer to ranges of the sorted log lines by the numbers of their first lines, starting with all lines
+            log_lines = log_line_dict
+            queue = deque([(self, depth, array('I', [0] if len(log_lines) > 0 else []), theta1)])
+        else:
+            # The nodes refer to the log lines by their indices in this list, which keeps the order of the log lines
+            log_lines = list(log_line_dict.values())
+            queue = deque([(self, depth, array('I', range(len(log_lines))), theta1)])
+        if engine == 'trie':
+            if trie is None:
+                trie = build_prefix_trie(log_lines, depth, delimiters, vocabulary)
+            # The nodes refer to trie nodes instead of log lines, starting with the root of the trie
+            queue = deque([(self, depth, array('I', [0] if len(log_lines) > 0 else []), theta1)])
+            log_lines = trie
+        elif engine == 'numpy':
+            # The nodes refer to pairs of their parents and words, starting with the root
+            queue = deque([(self, depth, array('I', [0] if len(log_lines) > 0 else []), theta1)])
+            log_lines = build_token_matrix(log_lines, depth, delimiters, vocabulary)
+            order = 'bfs'
+        parameters = (delimiters, theta2, theta3, theta4, theta5, theta6, damping, force_branch, force_var)
+        delimiter_ids, delimiter_run_ids = get_delimiter_ids(delimiters, vocabulary)
+        if engine == 'lines' and not isinstance(log_lines, LineSorter.LineSorter):
+            log_lines = get_collapsed_log_lines(log_lines, depth, delimiter_ids, delimiter_run_ids, vocabulary)
+        if engine == 'shards':
+            # The nodes refer to pairs of their parents and words, starting with the root
+            queue = deque([(self, depth, array('I', [0] if len(log_lines) > 0 else []), theta1)])
+            shards.distribute(get_collapsed_words(log_lines, delimiter_ids, delimiter_run_ids, vocabulary), depth, parameters,
+                              delimiter_run_ids, vocabulary, Node.keep_statistics, Node.max_exact_words)
+            log_lines = shards
+            order = 'bfs'
+        pool = None
+        if processes > 1 and 'fork' in multiprocessing.get_all_start_methods() and len(log_lines) >= 2 * min_subtree_lines:
+            # The workers are forked, because spawned workers would import and run the main script again
+            pool = multiprocessing.get_context('fork').Pool(processes)
+        try:
+            subtree_results = []
+            if pool is not None:
+                queue, subtree_results = self.schedule_subtrees(queue, log_lines, parameters, delimiter_ids, delimiter_run_ids,
+                                                                vocabulary, pool, processes, min_subtree_lines)
+            while len(queue) > 0:
+                if isinstance(log_lines, TokenMatrix.TokenMatrix) and queue[0][1] != log_lines.depth:
+                    # Breadth first, the queue contains all nodes of the next depth when the first of them is built
+                    log_lines.count_level(queue[0][1], [entry[2] for entry in queue])
+                elif isinstance(log_lines, ShardCoordinator.ShardCoordinator) and queue[0][1] != log_lines.depth:
+                    # The subtrees that the workers built are grafted, the other nodes of the depth are built from the merged counts
+                    queue, shard_results = log_lines.count_level(queue[0][1], queue)
+                    for node, result in shard_results:
+                        node.add_subtree(result, vocabulary)
+                    if len(queue) == 0:
+                        continue
+                if order == 'dfs':
+                    node, depth, line_indices, theta1 = queue.pop()
+                else:
+                    node, depth, line_indices, theta1 = queue.popleft()
+                children = node.build_children(depth, line_indices, log_lines, delimiter_ids, delimiter_run_ids, theta1, theta2, theta3,
+                                               theta4, theta5, theta6, damping, force_branch, force_var, vocabulary)
+                line_indices = None
+                if order == 'dfs':
+                    # The children are taken from the end of the queue, therefore they are added in reverse order
+                    children.reverse()
+                queue.extend(children)
+            # Graft the subtrees that were built by the workers
+            for node, result in subtree_results:
+                node.add_subtree(result.get(), vocabulary)
+        finally:
+            if pool is not None:
+                pool.close()
+                pool.join()
+
+    # This method expands the nodes of the queue that have more log lines than a fair share of the processes and hands the subtrees
+    # with at least min_subtree_lines log lines to the process pool. The subtrees are submitted largest first, so that the remaining
+    # small subtrees balance the load of the workers at the end. The method returns the queue of the subtrees that are built serially
+    # and the pending results of the workers
+    def schedule_subtrees(self, queue, log_lines, parameters, delimiter_ids, delimiter_run_ids, vocabulary, pool, processes,
+                          min_subtree_lines):
+        delimiters, theta2, theta3, theta4, theta5, theta6, damping, force_branch, force_var = parameters
+        max_subtree_lines = max(min_subtree_lines, len(log_lines) // processes)
+        serial_queue = deque()
+        subtrees = []
+        while len(queue) > 0:
+            node, depth, line_indices, theta1 = queue.popleft()
+            if len(line_indices) > max_subtree_lines or node is self:
+                children = node.build_children(depth, line_indices, log_lines, delimiter_ids, delimiter_run_ids, theta1, theta2, theta3,
+                                               theta4, theta5, theta6, damping, force_branch, force_var, vocabulary)
+                queue.extend(children)
+            elif len(line_indices) >= min_subtree_lines:
+                subtrees.append((node, depth, line_indices, theta1))
+            else:
+                serial_queue.append((node, depth, line_indices, theta1))
+        subtrees.sort(key=lambda subtree: len(subtree[2]), reverse=True)
+        subtree_results = []
+        for node, depth, line_indices, theta1 in subtrees:
+            arguments = get_subtree_arguments(node.occurrence, depth, line_indices, theta1, log_lines, parameters, vocabulary)
+            subtree_results.append((node, pool.apply_async(build_subtree, (arguments,))))
+        return serial_queue, subtree_results
+
+    # This method inserts new log lines into a tree that was built with keep_statistics. The occurrences along the paths of the new log
+    # lines are updated and the decisions of build_tree are made again from the stored word statistics of the nodes that the new log
+    # lines pass and of the nodes whose theta1 changes. Only the subtrees below nodes whose children change are built again from all log
+    # lines, which contain the new log lines at the end. The method returns the number of updated nodes and the number of rebuilt nodes
+    def update_tree(self, depth, new_log_lines, log_lines, delimiters, theta1, theta2, theta3, theta4, theta5, theta6, damping,
+                    force_branch, force_var, vocabulary):
+        delimiter_ids, delimiter_run_ids = get_delimiter_ids(delimiters, vocabulary)
+        new_log_lines = get_collapsed_log_lines(new_log_lines, depth, delimiter_ids, delimiter_run_ids, vocabulary)
+        log_lines = get_collapsed_log_lines(log_lines, depth, delimiter_ids, delimiter_run_ids, vocabulary)
+        # The indices of the queue refer to the new log lines if the node is updated and to all log lines if the node is built again
+        queue = deque([(self, depth, array('I', range(len(new_log_lines))), theta1, True)])
+        updated_nodes = 0
+        rebuilt_nodes = 0
+        while len(queue) > 0:
+            node, depth, line_indices, theta1, update = queue.pop()
+            if update:
+                updated_nodes += 1
+                children = node.update_children(depth, line_indices, new_log_lines, log_lines, delimiter_ids, delimiter_run_ids, theta1,
+                                                theta2, theta3, theta4, theta5, theta6, damping, force_branch, force_var, vocabulary)
+            else:
+                rebuilt_nodes += 1
+                children = [child + (False,) for child in node.build_children(
+                    depth, line_indices, log_lines, delimiter_ids, delimiter_run_ids, theta1, theta2, theta3, theta4, theta5, theta6,
+                    damping, force_branch, force_var, vocabulary)]
+            children.reverse()
+            queue.extend(children)
+        return updated_nodes, rebuilt_nodes
+
+    # This method sets theta1, the word statistics and the nodes below this node from the result of build_subtree, whose words are
+    # added to the vocabulary
+    def add_subtree(self, result, vocabulary):
+        self.theta1, statistics, states, tokens = result
+        token_ids = vocabulary.get_ids(tokens)
+        self.statistics = translate_statistics(statistics, token_ids)
+        self.add_descendants(states, token_ids)
+
+    # This method returns the nodes below this node in preorder as tuples of the position of the parent in the list (-1 for this node)
+    # and the attributes that are set by build_tree. The flat list can be pickled regardless of the depth of the tree
+    def get_descendants(self):
+        states = []
+        stack = [(-1, child) for child in reversed(self.children)]
+        while len(stack) > 0:
+            parent_position, node = stack.pop()
+            states.append((parent_position, node.element, node.is_variable, node.datatype, node.datetime_format, node.occurrence,
+                           node.end, node.ending_lines, node.continuing_lines, node.theta1, node.statistics))
+            position = len(states) - 1
+            stack.extend((position, child) for child in reversed(node.children))
+        return states
+
+    # This method adds the nodes returned by get_descendants below this node. The new nodes share the optional node pairs and merge
+    # tuples of this node. If the word statistics refer to the words of another vocabulary, token_ids maps them to the ids of this one
+    def add_descendants(self, states, token_ids=None):
+        nodes = []
+        for parent_position, element, is_variable, datatype, datetime_format, occurrence, end, ending_lines, continuing_lines, theta1, \
+                statistics in states:
+            node = Node(self.optional_node_pairs, self.merge_tuple)
+            node.element = element
+            node.is_variable = is_variable
+            node.datatype = datatype
+            node.datetime_format = datetime_format
+            node.occurrence = occurrence
+            node.end = end
+            node.ending_lines = ending_lines
+            node.continuing_lines = continuing_lines
+            node.theta1 = theta1
+            node.statistics = translate_statistics(statistics, token_ids)
+            if parent_position == -1:
+                node.parent = self
+            else:
+                node.parent = nodes[parent_position]
+            node.parent.children.append(node)
+            nodes.append(node)
+
+    # This method creates the children of this node from the log lines with the given indices, which pass over this node. It returns a
+    # list of tuples with the children, their depths, the indices of the log lines that pass to them and their theta1, which are built
+    # next. The words of the log lines are ids of the vocabulary, the words are only looked up when the elements of the nodes are set.
+    # The delimiter ids are the ids of the single delimiters, the delimiter run ids are the ids of all words that consist of delimiters
+    def build_children(self, depth, line_indices, log_lines, delimiter_ids, delimiter_run_ids, theta1, theta2, theta3, theta4, theta5,
+                       theta6, damping, force_branch, force_var, vocabulary):
+        # Theta1 is increased in every depth, however, should be limited. If theta1 > 0.5, only 1 child would be possible
         theta1 = min(theta1, 0.49)
 
         self.theta1 = theta1  # Store theta1 for every node, this information is printed in the textual tree
 
-        # End the recursion if all lines end at this node
-        if len(log_line_dict) == 0:
+        # Do not create children if all lines end at this node
+        if len(line_indices) == 0:
             self.end = False
-            return
+            return []
 
-        # Check for multiple consecutive delimiters and combine them
+        word_counts = None
+        other_words = None
+        if isinstance(log_lines, (PrefixTrie.PrefixTrie, LineSorter.LineSorter, TokenMatrix.TokenMatrix,
+                                  ShardCoordinator.ShardCoordinator)):
+            # The line indices are numbers of trie nodes, of the first lines of ranges of sorted log lines or of keys of pairs of the parent
+            # and a word, whose words are always counted exactly
+            word_counts = log_lines.count_words(depth, line_indices, delimiter_run_ids)
+        elif Node.word_count_cache is not None:
+            word_counts = Node.word_count_cache.get(depth, line_indices)
+        if word_counts is None:
+            # The words can not be aggregated if all words get branches or if the statistics are stored for update_tree
+            if Node.max_exact_words > 0 and depth not in force_branch and theta1 > 0 and not Node.keep_statistics:
+                word_counts = self.count_words(depth, line_indices, log_lines, delimiter_ids, delimiter_run_ids, vocabulary,
+                                               Node.max_exact_words)
+                if word_counts is None:
+                    word_counts, other_words = self.count_frequent_words(depth, line_indices, log_lines, delimiter_ids,
+                                                                         delimiter_run_ids, vocabulary, theta1)
+            else:
+                word_counts = self.count_words(depth, line_indices, log_lines, delimiter_ids, delimiter_run_ids, vocabulary)
+            # The aggregated words depend on theta1, therefore only exact word statistics are cached
+            if Node.word_count_cache is not None and other_words is None:
+                Node.word_count_cache.add(depth, line_indices, word_counts)
+        counter, ending_counter, continuing_counter, groups, line_count, delimiter_flag = word_counts
+        if Node.keep_statistics:
+            self.statistics = (counter, ending_counter, continuing_counter, line_count, delimiter_flag)
+        return self.create_children(depth, counter, ending_counter, continuing_counter, groups, line_count, delimiter_flag, delimiter_ids,
+                                    theta1, theta2, theta3, theta4, theta5, theta6, damping, force_branch, force_var, vocabulary,
+                                    other_words)
+
+    # This method groups the log lines with the given indices by their words at this depth in a single pass. Every log line stands for
+    # log_line.occurrence identical lines. For every word, the lines that end with the word and the lines that continue are counted, and
+    # the indices of the continuing lines are collected. The children take the indices of the words they represent. If there are more
+    # than max_words distinct words, the counting is stopped and None is returned
+    def count_words(self, depth, line_indices, log_lines, delimiter_ids, delimiter_run_ids, vocabulary, max_words=sys.maxsize):
         delimiter_flag = False
-        for log_line_id in log_line_dict:
-            log_line = log_line_dict[log_line_id]
-            if depth < len(log_line.words):
-                if log_line.words[depth] in delimiters:
-                    more_delimiters = True
-                    delimiter_flag = True
-                    while more_delimiters:
-                        if depth < len(log_line.words) - 1:
-                            if log_line.words[depth + 1] in delimiters:
-                                log_line.words[depth] += log_line.words[depth + 1]
-                                del log_line.words[depth + 1]
-                            else:
-                                more_delimiters = False
-                        else:
-                            more_delimiters = False
-
-        words = []
+        counter = Counter()
+        ending_counter = Counter()
+        continuing_counter = Counter()
+        groups = {}
+        line_count = 0
+        for index in line_indices:
+            log_line = log_lines[index]
+            words = log_line.words
+            occurrence = log_line.occurrence
+            line_count += occurrence
+            if depth >= len(words):
+                continue
+            word = words[depth]
+            if word in delimiter_run_ids:
+                delimiter_flag = True
+            counter[word] += occurrence
+            if len(counter) > max_words:
+                return None
+            if depth < len(words) - 1:
+                continuing_counter[word] += occurrence
+                group = groups.get(word)
+                if group is None:
+                    group = groups[word] = array('I')
+                group.append(index)
+            else:
+                ending_counter[word] += occurrence
+        return counter, ending_counter, continuing_counter, groups, line_count, delimiter_flag
+
+    # This method counts the words of the log lines with the given indices at this depth with a bounded number of counters. In a first
+    # pass, a Misra-Gries sketch with size counters finds all words that may make up a fraction of at least theta1 of the log lines:
+    # whenever the sketch has more than 2 * size counters, the (size + 1)-th largest count is subtracted from all counters and the
+    # counters that are not positive any more are removed. Every count is underestimated by at most the sum of the subtracted counts,
+    # which is less than theta1 * line_count for size > 1 / theta1 - 1. The first pass also counts the distinct words with a cardinality
+    # sketch; as every distinct word occurs at least once, the most frequent word can not occur in more lines than the other distinct
+    # words leave. This is only used while the sketch counts exactly, because its estimate is no bound of the number of distinct words.
+    # If no word is a candidate or the distinct words leave too few lines, no word can exceed theta1 and all words are aggregated as
+    # OTHER_WORDS from the statistics of the first pass, so that the node becomes a variable without a second pass. Otherwise, the candidates are counted exactly in a second pass and all other words are aggregated as OTHER_WORDS,
+    # which always fail theta1. The word statistics are returned like by count_words together with the summary of the other words,
+    # which is needed to determine the datatype
+    def count_frequent_words(self, depth, line_indices, log_lines, delimiter_ids, delimiter_run_ids, vocabulary, theta1):
+        size = int(1 / theta1) + 1
+        sketch = {}
+        error = 0
+        cardinality_sketch = CardinalitySketch.CardinalitySketch()
+        other_words = OtherWords.OtherWords(get_datatype_classifier(), vocabulary, NODE_DATATYPES)
+        delimiter_flag = False
+        line_count = 0
+        word_lines = 0
+        ending_lines = 0
+        continuing_lines = 0
+        continuing_indices = array('I')
+        min_occurrence = None
+        for index in line_indices:
+            log_line = log_lines[index]
+            words = log_line.words
+            occurrence = log_line.occurrence
+            line_count += occurrence
+            if depth >= len(words):
+                continue
+            word = words[depth]
+            if word in delimiter_run_ids:
+                delimiter_flag = True
+            word_lines += occurrence
+            if depth < len(words) - 1:
+                continuing_lines += occurrence
+                continuing_indices.append(index)
+            else:
+                ending_lines += occurrence
+            if min_occurrence is None or occurrence < min_occurrence:
+                min_occurrence = occurrence
+            cardinality_sketch.add(word)
+            other_words.add(word)
+            sketch[word] = sketch.get(word, 0) + occurrence
+            if len(sketch) > 2 * size:
+                decrement = sorted(sketch.values(), reverse=True)[size]
+                error += decrement
+                sketch = {word: count - decrement for word, count in sketch.items() if count > decrement}
+        candidates = set(word for word, count in sketch.items() if (count + error) / float(line_count) >= theta1)
+        sketch = None
+
+        counter = Counter()
+        ending_counter = Counter()
+        continuing_counter = Counter()
+        groups = {}
+        max_lines = word_lines
+        if word_lines > 0 and cardinality_sketch.is_exact():
+            max_lines -= (cardinality_sketch.estimate() - 1) * min_occurrence
+        if len(candidates) == 0 or max_lines / float(line_count) < theta1:
+            if word_lines > 0:
+                counter[OTHER_WORDS] = word_lines
+            if ending_lines > 0:
+                ending_counter[OTHER_WORDS] = ending_lines
+            if continuing_lines > 0:
+                continuing_counter[OTHER_WORDS] = continuing_lines
+                groups[OTHER_WORDS] = continuing_indices
+            return (counter, ending_counter, continuing_counter, groups, line_count, delimiter_flag), other_words
+        continuing_indices = None
+        cardinality_sketch = None
+
+        other_words = OtherWords.OtherWords(get_datatype_classifier(), vocabulary, NODE_DATATYPES)
+        for index in line_indices:
+            log_line = log_lines[index]
+            words = log_line.words
+            if depth >= len(words):
+                continue
+            word = words[depth]
+            if word not in candidates:
+                other_words.add(word)
+                word = OTHER_WORDS
+            counter[word] += log_line.occurrence
+            if depth < len(words) - 1:
+                continuing_counter[word] += log_line.occurrence
+                group = groups.get(word)
+                if group is None:
+                    group = groups[word] = array('I')
+                group.append(index)
+            else:
+                ending_counter[word] += log_line.occurrence
+        return (counter, ending_counter, continuing_counter, groups, line_count, delimiter_flag), other_words
+
+    # This method decides which children this node gets from the word statistics of the log lines that pass over this node and creates
+    # them. The groups contain the indices of the continuing log lines of every word, which are passed to the children
+    def create_children(self, depth, counter, ending_counter, continuing_counter, groups, line_count, delimiter_flag, delimiter_ids,
+                        theta1, theta2, theta3, theta4, theta5, theta6, damping, force_branch, force_var, vocabulary, other_words=None):
+        children = []
         list1 = []
         list_failed_elem = []  # List of the log lines, which do not end and are not in list
-        # Assemble a list of words of all log lines that pass over this node
-        for log_line_id in log_line_dict:
-            log_line = log_line_dict[log_line_id]
-            if depth < len(log_line.words):
-                words.append(log_line.words[depth])
-
-        counter = Counter(words)
-        
         sum_frequency = 0
         sum_frequency2 = 0  # Sum of the frequency of log lines, which did not surpass theta1
         max_count = -1
         for elem in counter:
             max_count = max(max_count, counter[elem])
             # Determine the potential succeeding nodes, i.e., words that make up a high fraction of all words
-            if counter[elem] / float(len(log_line_dict)) >= theta1 or depth in force_branch:
+            if elem != OTHER_WORDS and (counter[elem] / float(line_count) >= theta1 or depth in force_branch):
                 sum_frequency += counter[elem]  # sum_frequency is needed in Case 3
                 list1.append(elem)
             else:
@@ -1430,256 +1801,301 @@ class Node:
                 list_failed_elem.append(elem)
 
         new_node = Node(self.optional_node_pairs, self.merge_tuple)
-        new_node.determine_datatype(words)
+        # In Case 3 a) the new node is replaced by fixed nodes of datatype string. If it is certain that Case 3 a) applies, the datatype
+        # is not needed
+        if not (len(list1) > 1 and (sum_frequency / float(line_count) > theta3 or delimiter_flag) and (
+                delimiter_flag or (depth in force_branch and depth not in force_var))):
+            new_node.determine_datatype(get_word_tokens(counter, other_words, vocabulary), other_words)
         special_datatype = False
         if depth not in force_branch:  # Branches can be forced also on special data types
             for dt in new_node.datatype:
                 if dt in ['integer', 'float', 'datetime', 'ipaddress', 'base64', 'hex']:
                     special_datatype = True
-        
+
         # Always do a variable if all branches are unique, i.e., max_count == 1
         # Also, never do a variable for delimiters
         if not delimiter_flag and (len(list1) == 0 or special_datatype or depth in force_var):
             # Case 1
             new_node.element = '§'
             new_node.is_variable = True
-            new_node.parent = self
-            self.children.append(new_node)
-            new_dict = {}
-            ending_lines = 0
-            # Determine log lines passing to next node(s) that will be analyzed in the next recursion
-            for log_line_id in log_line_dict:
-                log_line = log_line_dict[log_line_id]
-                if depth < len(log_line.words) - 1:
-                    new_dict[log_line_id] = log_line  # Log line has more words, give it to next node
-                elif depth == len(log_line.words) - 1:
-                    ending_lines += 1
-                    # Log line ends at this node
-                    # new_node.ending_line_numbers.append(log_line_id)
-                    # For Evaluation, comment out if not needed
             # It is a variable node, so all log lines received from parent node in previous step occur here
-            new_node.occurrence = len(log_line_dict)
-            if ending_lines / float(self.occurrence) >= theta4:
-                new_node.end = True
-                new_node.ending_lines = ending_lines
-            if depth not in force_branch and len(new_dict) / float(self.occurrence) < theta5:
-                # If almost all lines stop, do not make a subsequent node. This is accomplished by clearing the dict, i.e.,
-                # no lines are passed to the next node
-                new_dict = {}
-            if new_node.occurrence != 0:
-                new_node.theta1 = self.theta1 * (1 + (1 - new_node.occurrence / float(self.occurrence)) * damping)
-            new_node.build_tree(depth + 1, new_dict, delimiters, new_node.theta1, theta2, theta3, theta4, theta5, theta6, damping,
-                                force_branch, force_var)
+            self.add_child(children, new_node, depth, list(counter), line_count, groups, ending_counter, continuing_counter, theta4,
+                           theta5, damping, force_branch)
         elif len(list1) == 1:
             # Case 2
-            if counter[list1[0]] / float(len(log_line_dict)) >= theta2 or delimiter_flag == True:
+            if counter[list1[0]] / float(line_count) >= theta2 or delimiter_flag == True:
                 # Case 2 a)
-                new_node.element = list1[0]
-                new_node.parent = self
-                self.children.append(new_node)
-                new_dict = {}
-                occurrences = 0
-                ending_lines = 0
-                for log_line_id in log_line_dict:
-                    log_line = log_line_dict[log_line_id]
-                    if log_line.words[depth] == list1[0]:
-                        occurrences += 1
-                        if depth < len(log_line.words) - 1:
-                            new_dict[log_line_id] = log_line
-                        elif depth == len(log_line.words) - 1:
-                            ending_lines += 1
-                            # new_node.ending_line_numbers.append(log_line_id)
-                            # For Evaluation, comment out if not needed
-                new_node.occurrence = occurrences
-                if ending_lines / float(self.occurrence) >= theta4:
-                    new_node.end = True
-                    new_node.ending_lines = ending_lines
-                if depth not in force_branch and len(new_dict) / float(self.occurrence) < theta5:
-                    # If almost all lines stop, do not make a subsequent node. This is accomplished by clearing the dict, i.e.,
-                    # no lines are passed to the next node
-                    new_dict = {}
-                if new_node.occurrence != 0:
-                    new_node.theta1 = self.theta1 * (1 + (1 - new_node.occurrence / float(self.occurrence)) * damping)
-                new_node.build_tree(depth + 1, new_dict, delimiters, new_node.theta1, theta2, theta3, theta4, theta5, theta6, damping,
-                                    force_branch, force_var)
-
-                if sum_frequency2 / float(len(log_line_dict)) >= theta6 and list_failed_elem[0] not in delimiters:
+                new_node.element = vocabulary.get_token(list1[0])
+                self.add_child(children, new_node, depth, list1, counter[list1[0]], groups, ending_counter, continuing_counter, theta4,
+                               theta5, damping, force_branch)
+
+                if sum_frequency2 / float(line_count) >= theta6 and get_first_word(list_failed_elem, other_words) not in delimiter_ids:
                     # Adding a variable node at the end of the children
                     new_node = Node(self.optional_node_pairs, self.merge_tuple)
-                    new_node.determine_datatype(list_failed_elem)
+                    new_node.determine_datatype(get_word_tokens(list_failed_elem, other_words, vocabulary), other_words)
                     new_node.element = '§'
                     new_node.is_variable = True
-                    new_node.parent = self
-                    self.children.append(new_node)
-                    new_dict = {}
-                    occurrences = 0
-                    ending_lines = 0
-                    for log_line_id in log_line_dict:
-                        log_line = log_line_dict[log_line_id]
-                        if len(log_line.words) > depth and log_line.words[depth] in list_failed_elem:
-                            occurrences += 1
-                            if depth < len(log_line.words) - 1:
-                                new_dict[log_line_id] = log_line
-                            elif depth == len(log_line.words) - 1:
-                                ending_lines += 1
-                                # new_node.ending_line_numbers.append(log_line_id)
-                                # For Evaluation, comment out if not needed
-                    new_node.occurrence = sum_frequency2
-                    if ending_lines / float(self.occurrence) >= theta4:
-                        new_node.end = True
-                        new_node.ending_lines = ending_lines
-                    if depth not in force_branch and len(new_dict) / float(self.occurrence) < theta5:
-                        # If almost all lines stop, do not make a subsequent node. This is accomplished by clearing the dict, i.e.,
-                        # no lines are passed to the next node
-                        new_dict = {}
-                    if new_node.occurrence != 0:
-                        new_node.theta1 = self.theta1 * (1 + (1 - new_node.occurrence / float(self.occurrence)) * damping)
-                    new_node.build_tree(depth + 1, new_dict, delimiters, new_node.theta1, theta2, theta3, theta4, theta5, theta6, damping,
-                                        force_branch, force_var)
+                    self.add_child(children, new_node, depth, list_failed_elem, sum_frequency2, groups, ending_counter,
+                                   continuing_counter, theta4, theta5, damping, force_branch)
             else:
                 # Case 2 b)
                 new_node.element = '§'
                 new_node.is_variable = True
-                new_node.parent = self
-                self.children.append(new_node)
-                new_dict = {}
-                ending_lines = 0
-                for log_line_id in log_line_dict:
-                    log_line = log_line_dict[log_line_id]
-                    if depth < len(log_line.words) - 1:
-                        new_dict[log_line_id] = log_line
-                    elif depth == len(log_line.words) - 1:
-                        ending_lines += 1
-                new_node.occurrence = len(log_line_dict)
-                if ending_lines / float(self.occurrence) >= theta4:
-                    new_node.end = True
-                    new_node.ending_lines = ending_lines
-                if depth not in force_branch and len(new_dict) / float(self.occurrence) < theta5:
-                    # If almost all lines stop, do not make a subsequent node. This is accomplished by clearing the dict, i.e.,
-                    # no lines are passed to the next node
-                    new_dict = {}
-                if new_node.occurrence != 0:
-                    new_node.theta1 = self.theta1 * (1 + (1 - new_node.occurrence / float(self.occurrence)) * damping)
-                new_node.build_tree(depth + 1, new_dict, delimiters, new_node.theta1, theta2, theta3, theta4, theta5, theta6, damping,
-                                    force_branch, force_var)
+                self.add_child(children, new_node, depth, list(counter), line_count, groups, ending_counter, continuing_counter, theta4,
+                               theta5, damping, force_branch)
         elif len(list1) > 1:
             # Case 3
-            if sum_frequency / float(len(log_line_dict)) > theta3 or delimiter_flag:
+            if sum_frequency / float(line_count) > theta3 or delimiter_flag:
                 # Case 3 a)
                 for element in list1:
                     new_node = Node(self.optional_node_pairs, self.merge_tuple)
                     new_node.datatype = ['string']
-                    new_node.element = element
-                    new_node.parent = self
-                    new_dict = {}
-                    occurrences = 0
-                    ending_lines = 0
-                    for log_line_id in log_line_dict:
-                        log_line = log_line_dict[log_line_id]
-                        if len(log_line.words) > depth and log_line.words[depth] == element:
-                            occurrences += 1
-                            if depth < len(log_line.words) - 1:
-                                new_dict[log_line_id] = log_line
-                            elif depth == len(log_line.words) - 1:
-                                ending_lines += 1
-                    new_node.occurrence = occurrences
-                    self.children.append(new_node)
-                    if ending_lines / float(self.occurrence) >= theta4:
-                        new_node.end = True
-                        new_node.ending_lines = ending_lines
-                    if depth not in force_branch and len(new_dict) / float(self.occurrence) < theta5:
-                        # If almost all lines stop, do not make a subsequent node. This is accomplished by clearing the dict, i.e.,
-                        # no lines are passed to the next node
-                        new_dict = {}
-                    if new_node.occurrence != 0:
-                        new_node.theta1 = self.theta1 * (1 + (1 - new_node.occurrence / float(self.occurrence)) * damping)
-                    new_node.build_tree(depth + 1, new_dict, delimiters, new_node.theta1, theta2, theta3, theta4, theta5, theta6, damping,
-                                        force_branch, force_var)
-
-                if sum_frequency2 / float(len(log_line_dict)) >= theta6 and list_failed_elem[0] not in delimiters:
+                    new_node.element = vocabulary.get_token(element)
+                    self.add_child(children, new_node, depth, [element], counter[element], groups, ending_counter, continuing_counter,
+                                   theta4, theta5, damping, force_branch)
+
+                if sum_frequency2 / float(line_count) >= theta6 and get_first_word(list_failed_elem, other_words) not in delimiter_ids:
                     # Adding a variable node at the end of the children
                     new_node = Node(self.optional_node_pairs, self.merge_tuple)
-                    new_node.determine_datatype(list_failed_elem)
+                    new_node.determine_datatype(get_word_tokens(list_failed_elem, other_words, vocabulary), other_words)
                     new_node.element = '§'
                     new_node.is_variable = True
-                    new_node.parent = self
-                    self.children.append(new_node)
-                    new_dict = {}
-                    occurrences = 0
-                    ending_lines = 0
-                    for log_line_id in log_line_dict:
-                        log_line = log_line_dict[log_line_id]
-                        if len(log_line.words) > depth and log_line.words[depth] in list_failed_elem:
-                            occurrences += 1
-                            if depth < len(log_line.words) - 1:
-                                new_dict[log_line_id] = log_line
-                            elif depth == len(log_line.words) - 1:
-                                ending_lines += 1
-                    new_node.occurrence = sum_frequency2
-                    if ending_lines / float(self.occurrence) >= theta4:
-                        new_node.end = True
-                        new_node.ending_lines = ending_lines
-                    if depth not in force_branch and len(new_dict) / float(self.occurrence) < theta5:
-                        # If almost all lines stop, do not make a subsequent node. This is accomplished by clearing the dict, i.e.,
-                        # no lines are passed to the next node
-                        new_dict = {}
-                    if new_node.occurrence != 0:
-                        new_node.theta1 = self.theta1 * (1 + (1 - new_node.occurrence / float(self.occurrence)) * damping)
-                    new_node.build_tree(depth + 1, new_dict, delimiters, new_node.theta1, theta2, theta3, theta4, theta5, theta6, damping,
-                                        force_branch, force_var)
+                    self.add_child(children, new_node, depth, list_failed_elem, sum_frequency2, groups, ending_counter,
+                                   continuing_counter, theta4, theta5, damping, force_branch)
             else:
                 # Case 3 b)
                 new_node.element = '§'
                 new_node.is_variable = True
-                new_node.parent = self
-                self.children.append(new_node)
-                new_dict = {}
-                ending_lines = 0
-                for log_line_id in log_line_dict:
-                    log_line = log_line_dict[log_line_id]
-                    if depth < len(log_line.words) - 1:
-                        new_dict[log_line_id] = log_line
-                    elif depth == len(log_line.words) - 1:
-                        ending_lines += 1
-                new_node.occurrence = len(log_line_dict)
-                if ending_lines / float(self.occurrence) >= theta4:
-                    new_node.end = True
-                    new_node.ending_lines = ending_lines
-                if depth not in force_branch and len(new_dict) / float(self.occurrence) < theta5:
-                    # If almost all lines stop, do not make a subsequent node. This is accomplished by clearing the dict, i.e.,
-                    # no lines are passed to the next node
-                    new_dict = {}
-                if new_node.occurrence != 0:
-                    new_node.theta1 = self.theta1 * (1 + (1 - new_node.occurrence / float(self.occurrence)) * damping)
-                new_node.build_tree(depth + 1, new_dict, delimiters, new_node.theta1, theta2, theta3, theta4, theta5, theta6, damping,
-                                    force_branch, force_var)
-
-    # This method returns the parser model for the AMiner
+                self.add_child(children, new_node, depth, list(counter), line_count, groups, ending_counter, continuing_counter, theta4,
+                               theta5, damping, force_branch)
+        return children
+
+    # This method adds the new log lines with the given indices to the word statistics of this node and decides again which children
+    # this node gets. The children that did not change keep their subtrees, their attributes are updated and the tuples of the children
+    # that need to be updated are returned with the indices of the new log lines that pass to them. The other children are built again
+    # from all log lines that pass over this node. A variable child only keeps its subtree if it did not lose or gain any stored log
+    # lines to or from fixed children
+    def update_children(self, depth, line_indices, new_log_lines, log_lines, delimiter_ids, delimiter_run_ids, theta1, theta2, theta3,
+                        theta4, theta5, theta6, damping, force_branch, force_var, vocabulary):
+        self.theta1 = min(theta1, 0.49)
+        counter, ending_counter, continuing_counter, line_count, delimiter_flag = self.statistics
+        new_counter, new_ending_counter, new_continuing_counter, groups, new_line_count, new_delimiter_flag = self.count_words(
+            depth, line_indices, new_log_lines, delimiter_ids, delimiter_run_ids, vocabulary)
+        counter.update(new_counter)
+        ending_counter.update(new_ending_counter)
+        continuing_counter.update(new_continuing_counter)
+        line_count += new_line_count
+        delimiter_flag = delimiter_flag or new_delimiter_flag
+        self.statistics = (counter, ending_counter, continuing_counter, line_count, delimiter_flag)
+        parameters = (delimiter_ids, self.theta1, theta2, theta3, theta4, theta5, theta6, damping, force_branch, force_var, vocabulary)
+
+        old_children = {(child.element, child.is_variable): child for child in self.children}
+        old_fixed_elements = set(child.element for child in self.children if not child.is_variable)
+        self.children = []
+        children = self.create_children(depth, counter, ending_counter, continuing_counter, groups, line_count, delimiter_flag,
+                                        *parameters)
+        new_fixed_elements = set(child.element for child in self.children if not child.is_variable)
+        keep_variable = old_fixed_elements.issubset(new_fixed_elements) and all(
+            counter[vocabulary.get_id(element)] == new_counter[vocabulary.get_id(element)] for element in
+            new_fixed_elements - old_fixed_elements)
+        kept_children = []
+        for new_node in self.children:
+            old_node = old_children.get((new_node.element, new_node.is_variable))
+            if old_node is None or (old_node.continuing_lines > 0) != (new_node.continuing_lines > 0) or (
+                    new_node.is_variable and not keep_variable):
+                old_node = None
+            kept_children.append(old_node)
+
+        if None in kept_children:
+            # The children that changed are created from the groups of all log lines that pass over this node
+            groups = self.count_words(depth, self.get_line_indices(depth, log_lines, vocabulary), log_lines, delimiter_ids,
+                                      delimiter_run_ids, vocabulary)[3]
+            self.children = []
+            built_children = self.create_children(depth, counter, ending_counter, continuing_counter, groups, line_count, delimiter_flag,
+                                                  *parameters)
+        else:
+            built_children = children
+
+        updates = []
+        for i, (new_node, child_depth, child_line_indices, child_theta1) in enumerate(children):
+            old_node = kept_children[i]
+            if old_node is None:
+                self.children[i] = built_children[i][0]
+                updates.append(built_children[i] + (False,))
+                continue
+            self.children[i] = old_node
+            changed = new_node.occurrence != old_node.occurrence or min(child_theta1, 0.49) != old_node.theta1
+            old_node.occurrence = new_node.occurrence
+            old_node.end = new_node.end
+            old_node.ending_lines = new_node.ending_lines
+            old_node.continuing_lines = new_node.continuing_lines
+            old_node.datatype = new_node.datatype
+            old_node.datetime_format = new_node.datetime_format
+            if new_node.continuing_lines == 0:
+                # Like build_children does for nodes without log lines
+                old_node.theta1 = min(child_theta1, 0.49)
+                old_node.end = False
+            elif changed or len(child_line_indices) > 0:
+                updates.append((old_node, child_depth, child_line_indices, child_theta1, True))
+        return updates
+
+    # This method returns the indices of all log lines that build_tree passed to this node. The log lines are followed from the root
+    # along the path to this node; a fixed child takes the log lines with its word and a variable child takes all other words
+    def get_line_indices(self, depth, log_lines, vocabulary):
+        path = [self]
+        while path[-1].parent is not None:
+            path.append(path[-1].parent)
+        path.reverse()
+        start_depth = depth - len(path) + 1
+        steps = []
+        for parent, child in zip(path, path[1:]):
+            fixed_ids = set(vocabulary.get_id(sibling.element) for sibling in parent.children if not sibling.is_variable)
+            if child.is_variable:
+                steps.append((None, fixed_ids))
+            else:
+                steps.append((vocabulary.get_id(child.element), fixed_ids))
+        line_indices = array('I')
+        for index, log_line in enumerate(log_lines):
+            words = log_line.words
+            # The log line must continue after the word of every step
+            if len(words) <= depth:
+                continue
+            for step_depth, (word_id, fixed_ids) in enumerate(steps, start_depth):
+                word = words[step_depth]
+                if word_id is None:
+                    if word in fixed_ids:
+                        break
+                elif word != word_id:
+                    break
+            else:
+                line_indices.append(index)
+        return line_indices
+
+    # This method appends a new child for the log lines with the given words at this depth and adds the tuple for building the child
+    # to the list of children
+    def add_child(self, children, new_node, depth, words, occurrence, groups, ending_counter, continuing_counter, theta4, theta5,
+                  damping, force_branch):
+        new_node.parent = self
+        new_node.occurrence = occurrence
+        self.children.append(new_node)
+        ending_lines = 0
+        continuing_lines = 0
+        for word in words:
+            ending_lines += ending_counter[word]
+            continuing_lines += continuing_counter[word]
+        if ending_lines / float(self.occurrence) >= theta4:
+            new_node.end = True
+            new_node.ending_lines = ending_lines
+        if depth not in force_branch and continuing_lines / float(self.occurrence) < theta5:
+            # If almost all lines stop, do not make a subsequent node. This is accomplished by passing no lines to the next node
+            line_indices = array('I')
+            continuing_lines = 0
+        elif len(words) == 1:
+            line_indices = groups.get(words[0], array('I'))
+        else:
+            # The indices of every group are ascending, therefore the sorted indices keep the order of the log lines
+            line_indices = array('I', sorted(itertools.chain.from_iterable(groups[word] for word in words if word in groups)))
+        new_node.continuing_lines = continuing_lines
+        if new_node.occurrence != 0:
+            new_node.theta1 = self.theta1 * (1 + (1 - new_node.occurrence / float(self.occurrence)) * damping)
+        children.append((new_node, depth + 1, line_indices, new_node.theta1))
+
+    # This method sets the occurrences and ending lines of all nodes below this node to 0, so that they can be counted by count_line. The
+    # nodes are visited from a stack, so that the depth of the tree is not limited by the recursion limit
+    def reset_counts(self):
+        stack = list(self.children)
+        while len(stack) > 0:
+            node = stack.pop()
+            node.occurrence = 0
+            node.ending_lines = 0
+            stack.extend(node.children)
+
+    # This method follows the words of a log line from this node through the tree created by build_tree and counts the line in the
+    # occurrences of all nodes on its path and in the ending lines of the node where it ends. Consecutive delimiters are combined in
+    # the same way as in build_tree. The method returns True if the line ends at a node where lines can end, i.e., it matches the tree
+    def count_line(self, words, delimiters):
+        node = self
+        position = 0
+        while position < len(words):
+            word = words[position]
+            position += 1
+            if word in delimiters:
+                while position < len(words) and words[position] in delimiters:
+                    word += words[position]
+                    position += 1
+            next_node = None
+            for child in node.children:
+                if child.is_variable:
+                    next_node = child
+                elif child.element == word:
+                    next_node = child
+                    break
+            if next_node is None:
+                return False
+            node = next_node
+            node.occurrence += 1
+        if node is self:
+            return False
+        # Leaves do not have the end flag, because build_tree resets it when no lines are passed to the next node
+        if node.end or len(node.children) == 0:
+            node.ending_lines += 1
+            return True
+        return False
+
+    # This method returns the parser model for the AMiner. The model elements are written from a stack of tasks instead of recursive
+    # calls, so that the depth of the tree is not limited by the recursion limit. A task writes a node, the element of a node after its
+    # optional nodes, or the start of a sequence, or it closes the enclosing model elements after the last written model element
     def write_config(self, depth, id1, subtree_list=None, ignore_first_subtree=False):
-        # Insert a subtree if the node is root of any of the subtrees
         if subtree_list is None:
             subtree_list = []
-        return_string = ''
+        return_strings = []
+        stack = [('node', self, depth, ignore_first_subtree)]
+        while len(stack) > 0:
+            task = stack.pop()
+            if task[0] == 'node':
+                task[1].write_config_node(task[2], id1, subtree_list, task[3], return_strings, stack)
+            elif task[0] == 'element':
+                task[1].write_config_element(task[2], id1, return_strings, stack)
+            elif task[0] == 'sequence':
+                # The sequences of the children of a branch get a new id, the sequence after the optional nodes reuses the last id
+                if task[2]:
+                    id1.value += 1
+                return_strings.append('\t' * task[1] + 'SequenceModelElement(\'sequence' + str(id1.value) + '\', [\n')
+            else:
+                close_model_element(return_strings, task[1])
+        return ''.join(return_strings)
 
+    # This method writes the model element of the node or the subtree that starts with the node. The optional nodes and the element of
+    # the node are pushed to the stack of write_config
+    def write_config_node(self, depth, id1, subtree_list, ignore_first_subtree, return_strings, stack):
+        # Insert a subtree if the node is root of any of the subtrees
         if not ignore_first_subtree and (
                 any(self in subtree for subtree in subtree_list) or any(self == pair[1] for pair in self.optional_node_pairs)):
             subtree_number = next((i for i in range(len(subtree_list)) if self in subtree_list[i]), None)
-            return_string += '\t' * depth + 'subtree_' + str(subtree_number) + ',\n'
-            return return_string
+            return_strings.append('\t' * depth + 'subtree_' + str(subtree_number) + ',\n')
+            return
 
         if any(self == pair[0] for pair in self.optional_node_pairs):
             id1.value += 1
-            return_string += '\t' * depth + 'AnyMatchModelElement(\'anymatch' + str(id1.value) + '\', [\n'
+            return_strings.append('\t' * depth + 'AnyMatchModelElement(\'anymatch' + str(id1.value) + '\', [\n')
             depth += 1
+            tasks = []
             used_nodes = []
             for i in range(len(self.optional_node_pairs)):
                 if self == self.optional_node_pairs[i][0] and self.optional_node_pairs[i][1] not in used_nodes:
-                    return_string += self.optional_node_pairs[i][1].write_config(depth, id1, subtree_list)
+                    tasks.append(('node', self.optional_node_pairs[i][1], depth, False))
                     used_nodes.append(self.optional_node_pairs[i][1])
             if self.element is not None and len(self.children) == 1:
-                return_string += '\t' * depth + 'SequenceModelElement(\'sequence' + str(id1.value) + '\', [\n'
+                tasks.append(('sequence', depth, False))
                 depth += 1
+            tasks.append(('element', self, depth))
+            stack.extend(reversed(tasks))
+        else:
+            self.write_config_element(depth, id1, return_strings, stack)
 
+    # This method writes the model element of the element of the node. The children of the node and the closing of the enclosing model
+    # elements are pushed to the stack of write_config
+    def write_config_element(self, depth, id1, return_strings, stack):
         # Escape the escape characters
         if self.element is not None:
             if self.is_list:
@@ -1709,14 +2125,17 @@ class Node:
                 variable_parser_model = 'Base64StringModelElement(\'base64encoded' + str(id1.value) + '\'),\n'
             elif 'hex' in self.datatype:
                 variable_parser_model = 'HexStringModelElement(\'hexstring' + str(id1.value) + '\'),\n'
-            elif 'datetime' in self.datatype:
-                variable_parser_model = 'DateTimeModelElement(\'datetime' + str(id1.value) + '\'),\n'
+            elif 'datetime' in self.datatype and self.datetime_format is not None:
+                # The DateTimeModelElement needs the format of the datetimes, datetimes without a common format are not classified as
+                # datetimes
+                variable_parser_model = 'DateTimeModelElement(\'datetime' + str(id1.value) + '\', b\'' + self.datetime_format + '\'),\n'
             elif 'float' in self.datatype:
                 variable_parser_model = 'DecimalFloatValueModelElement(\'float' + str(
                 id1.value) + '\', value_sign_type=DecimalFloatValueModelElement.SIGN_TYPE_OPTIONAL),\n'
             else:
                 variable_parser_model = 'VariableByteDataModelElement(\'string' + str(id1.value) + '\', alphabet),\n'
 
+        tasks = []
         if len(self.children) == 0:
             # Node is a leaf node, return node info and do nothing else
             if self.element is None:
@@ -1724,42 +2143,21 @@ class Node:
             elif self.is_list:
                 id1.value += 1
                 self.ID = id1.value
-                return_string += '\t' * depth + 'FixedWordlistDataModelElement(\'fixed' + str(id1.value) + '\', ' + str(
-                    agg_elements) + '),\n'
-
-                if any(self == pair[0] for pair in self.optional_node_pairs):
-                    if self.element is not None and len(self.children) == 1:
-                        return_string = return_string[:-2] + '])]),\n'  # Closing first_match and AnyMatch
-                    else:
-                        return_string = return_string[:-2] + ']),\n'  # Closing AnyMatch
-                return return_string
+                return_strings.append('\t' * depth + 'FixedWordlistDataModelElement(\'fixed' + str(id1.value) + '\', ' + str(
+                    agg_elements) + '),\n')
             elif self.is_variable:
-                return_string += '\t' * depth + variable_parser_model
-
-                if any(self == pair[0] for pair in self.optional_node_pairs):
-                    if self.element is not None and len(self.children) == 1:
-                        return_string = return_string[:-2] + '])]),\n'  # Closing first_match and AnyMatch
-                    else:
-                        return_string = return_string[:-2] + ']),\n'  # Closing AnyMatch
-                return return_string
+                return_strings.append('\t' * depth + variable_parser_model)
             else:
                 id1.value += 1
                 self.ID = id1.value
-                return_string += '\t' * depth + 'FixedDataModelElement(\'fixed' + str(id1.value) + '\', b\'' + self.element + '\'),\n'
-
-                if any(self == pair[0] for pair in self.optional_node_pairs):
-                    if self.element is not None and len(self.children) == 1:
-                        return_string = return_string[:-2] + '])]),\n'  # Closing first_match and AnyMatch
-                    else:
-                        return_string = return_string[:-2] + ']),\n'  # Closing AnyMatch
-                return return_string
+                return_strings.append('\t' * depth + 'FixedDataModelElement(\'fixed' + str(id1.value) + '\', b\'' + self.element + '\'),\n')
         elif len(self.children) == 1:
             # Node has exactly 1 child
 
             # Start a new sequence
             if self.element is None:
                 id1.value += 1
-                return_string += '\t' * depth + 'SequenceModelElement(\'sequence' + str(id1.value) + '\', [\n'
+                return_strings.append('\t' * depth + 'SequenceModelElement(\'sequence' + str(id1.value) + '\', [\n')
                 depth += 1
 
             if self.element is None:
@@ -1767,41 +2165,33 @@ class Node:
             elif self.is_list:
                 id1.value += 1
                 self.ID = id1.value
-                return_string += '\t' * depth + 'FixedWordlistDataModelElement(\'fixed' + str(id1.value) + '\', ' + str(
-                    agg_elements) + '),\n'
+                return_strings.append('\t' * depth + 'FixedWordlistDataModelElement(\'fixed' + str(id1.value) + '\', ' + str(
+                    agg_elements) + '),\n')
             elif self.is_variable:
-                return_string += '\t' * depth + variable_parser_model
+                return_strings.append('\t' * depth + variable_parser_model)
             else:
                 id1.value += 1
                 self.ID = id1.value
-                return_string += '\t' * depth + 'FixedDataModelElement(\'fixed' + str(id1.value) + '\', b\'' + self.element + '\'),\n'
+                return_strings.append('\t' * depth + 'FixedDataModelElement(\'fixed' + str(id1.value) + '\', b\'' + self.element + '\'),\n')
 
             # If this is an end node, put everything that follows in an optional element
             if self.end and self.element is not None:
                 id1.value += 1
-                return_string += '\t' * depth + 'OptionalMatchModelElement(\'optional' + str(id1.value) + '\', \n'
+                return_strings.append('\t' * depth + 'OptionalMatchModelElement(\'optional' + str(id1.value) + '\', \n')
                 depth += 1
                 id1.value += 1
-                return_string += '\t' * depth + 'SequenceModelElement(\'sequence' + str(id1.value) + '\', [\n'
+                return_strings.append('\t' * depth + 'SequenceModelElement(\'sequence' + str(id1.value) + '\', [\n')
                 depth += 1
 
-            return_string += self.children[0].write_config(depth, id1, subtree_list)
+            tasks.append(('node', self.children[0], depth, False))
 
             # End Optional Element
             if self.end and self.element is not None:
-                return_string = return_string[:-2] + '])),\n'
+                tasks.append(('close', '])),\n'))
 
             # End the sequence
             if self.element is None:
-                return_string = return_string[:-2] + ']),\n'  # [:-2] removes newline and comma following last ModelElement
-
-            if any(self == pair[0] for pair in self.optional_node_pairs):
-                if self.element is not None and len(self.children) == 1:
-                    return_string = return_string[:-2] + '])]),\n'  # Closing first_match and AnyMatch
-                else:
-                    return_string = return_string[:-2] + ']),\n'  # Closing AnyMatch
-
-            return return_string
+                tasks.append(('close', ']),\n'))
         else:
             # Node has > 1 children
             # Note that its not possible that one of the children is a wildcard - there would be no branch then
@@ -1811,51 +2201,46 @@ class Node:
             elif self.is_list:
                 id1.value += 1
                 self.ID = id1.value
-                return_string += '\t' * depth + 'FixedWordlistDataModelElement(\'fixed' + str(id1.value) + '\', ' + str(
-                    self.element) + '),\n'
+                return_strings.append('\t' * depth + 'FixedWordlistDataModelElement(\'fixed' + str(id1.value) + '\', ' + str(
+                    self.element) + '),\n')
             elif self.is_variable:
-                return_string += '\t' * depth + variable_parser_model
+                return_strings.append('\t' * depth + variable_parser_model)
             else:
                 id1.value += 1
                 self.ID = id1.value
-                return_string += '\t' * depth + 'FixedDataModelElement(\'fixed' + str(id1.value) + '\', b\'' + self.element + '\'),\n'
+                return_strings.append('\t' * depth + 'FixedDataModelElement(\'fixed' + str(id1.value) + '\', b\'' + self.element + '\'),\n')
             # If this is an end node, put everything that follows in an optional element
             if self.end and self.element is not None:
                 id1.value += 1
-                return_string += '\t' * depth + 'OptionalMatchModelElement(\'optional' + str(id1.value) + '\', \n'
+                return_strings.append('\t' * depth + 'OptionalMatchModelElement(\'optional' + str(id1.value) + '\', \n')
                 depth += 1
                 id1.value += 1
-                return_string += '\t' * depth + 'SequenceModelElement(\'sequence' + str(id1.value) + '\', [\n'
+                return_strings.append('\t' * depth + 'SequenceModelElement(\'sequence' + str(id1.value) + '\', [\n')
                 depth += 1
 
-            # Get info about all children through recursion
+            # Get info about all children from the stack
             id1.value += 1
-            return_string += '\t' * depth + 'FirstMatchModelElement(\'firstmatch' + str(id1.value) + '\', [\n'
+            return_strings.append('\t' * depth + 'FirstMatchModelElement(\'firstmatch' + str(id1.value) + '\', [\n')
             for child in self.children:
                 if self.element is None or len(child.children) > 0:
-                    id1.value += 1
-                    depth += 1
-                    return_string += '\t' * depth + 'SequenceModelElement(\'sequence' + str(id1.value) + '\', [\n'
-
-                return_string += child.write_config(depth + 1, id1, subtree_list)
-
-                if self.element is None or len(child.children) > 0:
-                    return_string = return_string[:-2] + ']),\n'  # [:-2] removes newline and comma following last ModelElement
-                    depth -= 1
+                    tasks.append(('sequence', depth + 1, True))
+                    tasks.append(('node', child, depth + 2, False))
+                    tasks.append(('close', ']),\n'))
+                else:
+                    tasks.append(('node', child, depth + 1, False))
 
-            return_string = return_string[:-2] + ']),\n'  # [:-2] removes newline and comma following last ModelElement
+            tasks.append(('close', ']),\n'))
 
             # End Optional Element
             if self.end and self.element is not None:
-                return_string = return_string[:-2] + '])),\n'
-
-            if any(self == pair[0] for pair in self.optional_node_pairs):
-                if self.element is not None and len(self.children) == 1:
-                    return_string = return_string[:-2] + '])]),\n'  # Closing first_match and AnyMatch
-                else:
-                    return_string = return_string[:-2] + ']),\n'  # Closing AnyMatch
+                tasks.append(('close', '])),\n'))
 
-            return return_string
+        if any(self == pair[0] for pair in self.optional_node_pairs):
+            if self.element is not None and len(self.children) == 1:
+                tasks.append(('close', '])]),\n'))  # Closing first_match and AnyMatch
+            else:
+                tasks.append(('close', ']),\n'))  # Closing AnyMatch
+        stack.extend(reversed(tasks))
 
     # this method returns the assigning of the subtrees for the AMiner
     def write_config_subtrees(self, ID, subtree_list):
@@ -1876,26 +2261,26 @@ class Node:
         subtree_list.sort(key=lambda x: x[0].subtree_height())
         return
 
-    # This method checks whether the words occurring at a node have a specific data type
-    def determine_datatype(self, words):
-        for elem in words:
-            if 'float' in self.datatype and not Node.is_float(self, elem):
-                self.datatype.remove('float')
-
-            if 'integer' in self.datatype and not Node.is_integer(self, elem):
-                self.datatype.remove('integer')
-
-            if 'hex' in self.datatype and not Node.is_hex(self, elem):
-                self.datatype.remove('hex')
-
-            if 'datetime' in self.datatype and not Node.is_datetime(self, elem):
-                self.datatype.remove('datetime')
-
-            if 'base64' in self.datatype and not Node.is_base64(self, elem):
-                self.datatype.remove('base64')
-
-            if 'ipaddress' in self.datatype and not Node.is_ipaddress(self, elem):
-                self.datatype.remove('ipaddress')
+    # This method removes all datatypes from the datatypes of this node that not all words belong to
+    # If the summary of the words that were aggregated as OTHER_WORDS is given, the datatypes and the datetime formats of these words are
+    # taken from it
+    def determine_datatype(self, words, other_words=None):
+        datatype_classifier = get_datatype_classifier()
+        self.datatype = datatype_classifier.filter_datatypes(self.datatype, words)
+        datetime_formats = None
+        if other_words is not None:
+            other_words.classify()
+            self.datatype = [typ for typ in self.datatype if typ in other_words.datatype]
+            datetime_formats = other_words.datetime_formats
+        if 'datetime' in self.datatype:
+            self.datetime_format = datatype_classifier.get_datetime_format(words, datetime_formats)
+        self.remove_datetime_without_format()
+
+    # This method removes the datatype datetime if the datetimes have no common format, because the DateTimeModelElement needs the
+    # format. The node is then classified with the next datatype, which is at least string
+    def remove_datetime_without_format(self):
+        if self.datetime_format is None and 'datetime' in self.datatype:
+            self.datatype = [typ for typ in self.datatype if typ != 'datetime']
 
     def check_consistency(self):
         for child in self.children:
@@ -1909,61 +2294,192 @@ class Node:
             if child.parent != self:
                 child.parent = self
 
-    def is_float(self, s):
-        try:
-            if not s[-1:].isdigit():
-                return False
-            float(s)
-            return s.replace('.', '').isdigit()
-        except ValueError:
-            return False
-
-    def is_integer(self, s):
-        try:
-            int(s)
-            if s[0] == '-':
-                s = s[1:]
-            return s.isdigit()
-        except ValueError:
-            return False
-
-    def is_hex(self, s):
-        try:
-            int(s, 16)
-            return True
-        except ValueError:
-            return False
-
-    def is_datetime(self, s):
-        try:
-            datetimeparse(s)
-            if ':' in s:
-                return True
-        except ValueError:
-            return False
-        except OverflowError:
-            return False
-        return False
-
-    def is_base64(self, s):
-        try:
-            base64.decodestring(s)
-            return True
-        except binascii.Error:
-            return False
-
-    def is_ipaddress(self, s):
-        try:
-            socket.inet_pton(socket.AF_INET, s)
-            return True
-        except socket.error:
-            try:
-                socket.inet_pton(socket.AF_INET6, s)
-                return True
-            except socket.error:
-                return False
-
     def __str__(self):
         """Get a string representation of this match element excluding
         the children"""
         return self.to_string(0)[1:]
+
+
+# This function returns the arguments for building a subtree in a worker process. Only the words of the log lines from the depth of the
+# subtree on are passed, and the words are converted to the ids of a vocabulary that only contains the words of the subtree
+def get_subtree_arguments(occurrence, depth, line_indices, theta1, log_lines, parameters, vocabulary):
+    delimiters, theta2, theta3, theta4, theta5, theta6, damping, force_branch, force_var = parameters
+    subtree_vocabulary = Vocabulary.Vocabulary()
+    words_list = []
+    occurrences = []
+    for index in line_indices:
+        log_line = log_lines[index]
+        words_list.append(subtree_vocabulary.get_ids(vocabulary.get_tokens(log_line.words[depth:])))
+        occurrences.append(log_line.occurrence)
+    # The depths of the subtree start with 0
+    force_branch = [force_depth - depth for force_depth in force_branch if force_depth >= depth]
+    force_var = [force_depth - depth for force_depth in force_var if force_depth >= depth]
+    return (subtree_vocabulary.tokens, words_list, occurrences, occurrence, theta1, delimiters, theta2, theta3, theta4, theta5,
+            theta6, damping, force_branch, force_var)
+
+
+# This function builds a subtree in a worker process and returns theta1 and the word statistics of the root of the subtree, the nodes
+# below it and the words of the vocabulary of the subtree
+def build_subtree(arguments):
+    tokens, words_list, occurrences, occurrence, theta1, delimiters, theta2, theta3, theta4, theta5, theta6, damping, force_branch, \
+        force_var = arguments
+    vocabulary = Vocabulary.Vocabulary()
+    vocabulary.get_ids(tokens)
+    log_line_dict = {}
+    for i in range(len(words_list)):
+        log_line = LogLine.LogLine(i, None, None, words_list[i])
+        log_line.occurrence = occurrences[i]
+        log_line_dict[i + 1] = log_line
+    root = Node()
+    root.occurrence = occurrence
+    root.build_tree(0, log_line_dict, delimiters, theta1, theta2, theta3, theta4, theta5, theta6, damping, force_branch, force_var,
+                    vocabulary)
+    return root.theta1, root.statistics, root.get_descendants(), vocabulary.tokens
+
+
+# This function inserts the words of the log lines from the depth on into a prefix trie. Consecutive delimiters are combined in copies
+# of the words like count_words combines them in the words of the log lines, which are not changed. The combined delimiters are added to
+# the vocabulary
+def build_prefix_trie(log_lines, depth, delimiters, vocabulary):
+    delimiter_ids, delimiter_run_ids = get_delimiter_ids(delimiters, vocabulary)
+    trie = PrefixTrie.PrefixTrie()
+    for log_line in log_lines:
+        words = log_line.words[depth:]
+        collapse_all_delimiters(words, delimiter_ids, delimiter_run_ids, vocabulary)
+        trie.insert(words, log_line.occurrence)
+    trie.finish()
+    return trie
+
+
+# This function stores the words of the log lines from the depth on in a token matrix. Consecutive delimiters are combined like by
+# build_prefix_trie
+def build_token_matrix(log_lines, depth, delimiters, vocabulary):
+    delimiter_ids, delimiter_run_ids = get_delimiter_ids(delimiters, vocabulary)
+    words_list = []
+    for log_line in log_lines:
+        words = log_line.words[depth:]
+        collapse_all_delimiters(words, delimiter_ids, delimiter_run_ids, vocabulary)
+        words_list.append(words)
+    return TokenMatrix.TokenMatrix(words_list, [log_line.occurrence for log_line in log_lines], len(vocabulary), depth)
+
+
+# This function yields copies of the words of the log lines, in which consecutive delimiters are combined like by build_prefix_trie, and
+# the occurrences of the log lines
+def get_collapsed_words(log_lines, delimiter_ids, delimiter_run_ids, vocabulary):
+    for log_line in log_lines:
+        words = log_line.words[:]
+        collapse_all_delimiters(words, delimiter_ids, delimiter_run_ids, vocabulary)
+        yield words, log_line.occurrence
+
+
+# This function sorts the words of the log lines on disk with a line sorter and returns it. The log lines are consumed one by one, so
+# that they can be read from a generator without storing them in memory. Consecutive delimiters are combined like by build_prefix_trie
+def sort_log_lines(log_lines, delimiters, vocabulary, directory=None, max_memory=268435456):
+    delimiter_ids, delimiter_run_ids = get_delimiter_ids(delimiters, vocabulary)
+    line_sorter = LineSorter.LineSorter(directory, max_memory)
+    try:
+        for log_line in log_lines:
+            words = log_line.words[:]
+            collapse_all_delimiters(words, delimiter_ids, delimiter_run_ids, vocabulary)
+            line_sorter.add(words, log_line.occurrence)
+        line_sorter.finish()
+    except BaseException:
+        line_sorter.close()
+        raise
+    return line_sorter
+
+
+# This function returns a list of the log lines, in which the log lines with consecutive delimiters from the depth on are replaced by
+# copies whose delimiters are combined like by build_prefix_trie. Consecutive delimiters are usually combined by the tokenizer; if
+# every delimiter is a word of its own, the depths of the tree refer to the combined words. The words of the log lines are not changed,
+# because they are shared with the process pool, the word count cache and stored tree states
+def get_collapsed_log_lines(log_lines, depth, delimiter_ids, delimiter_run_ids, vocabulary):
+    collapsed_log_lines = []
+    for log_line in log_lines:
+        words = log_line.words[depth:]
+        if has_delimiter_runs(words, delimiter_ids):
+            collapse_all_delimiters(words, delimiter_ids, delimiter_run_ids, vocabulary)
+            collapsed_log_line = LogLine.LogLine(log_line.line_id, log_line.time_stamp, log_line.line_text, log_line.words[:depth] + words)
+            collapsed_log_line.occurrence = log_line.occurrence
+            log_line = collapsed_log_line
+        collapsed_log_lines.append(log_line)
+    return collapsed_log_lines
+
+
+# This function combines the delimiter at a depth of the words with the following delimiters and returns the id of the combined word
+def collapse_delimiters(words, depth, delimiter_ids, delimiter_run_ids, vocabulary):
+    word = words[depth]
+    while depth < len(words) - 1 and words[depth + 1] in delimiter_ids:
+        word = vocabulary.get_id(vocabulary.get_token(word) + vocabulary.get_token(words[depth + 1]))
+        delimiter_run_ids.add(word)
+        words[depth] = word
+        del words[depth + 1]
+    return word
+
+
+# This function replaces the comma and the newline that follow the last written model element with the closing of the enclosing model
+# elements
+def close_model_element(return_strings, closing):
+    return_string = ''
+    while len(return_string) < 2 and len(return_strings) > 0:
+        return_string = return_strings.pop() + return_string
+    return_strings.append(return_string[:-2] + closing)
+
+
+# This function returns if the words contain consecutive delimiters. Most log lines have none, which is checked without a loop over the
+# words in python
+def has_delimiter_runs(words, delimiter_ids):
+    return b'\x01\x01' in bytes(map(delimiter_ids.__contains__, words))
+
+
+# This function combines all consecutive delimiters in the words
+def collapse_all_delimiters(words, delimiter_ids, delimiter_run_ids, vocabulary):
+    if not has_delimiter_runs(words, delimiter_ids):
+        return
+    position = 0
+    while position < len(words) - 1:
+        if words[position] in delimiter_ids:
+            collapse_delimiters(words, position, delimiter_ids, delimiter_run_ids, vocabulary)
+        position += 1
+
+
+# This function returns the tokens of the words without OTHER_WORDS, whose datatypes are determined from the summary of the other words
+def get_word_tokens(words, other_words, vocabulary):
+    if other_words is None:
+        return vocabulary.get_tokens(words)
+    return vocabulary.get_tokens([word for word in words if word != OTHER_WORDS])
+
+
+# This function returns the first of the words. If it is OTHER_WORDS, the first of the other words is returned
+def get_first_word(words, other_words):
+    if words[0] == OTHER_WORDS:
+        return other_words.first_word
+    return words[0]
+
+
+# This function returns the datatype classifier of the nodes. If the pipeline did not set it, a classifier with the default cache is
+# created
+def get_datatype_classifier():
+    if Node.datatype_classifier is None:
+        Node.datatype_classifier = DatatypeClassifier.DatatypeClassifier()
+    return Node.datatype_classifier
+
+
+# This function returns the ids of the single delimiters and the ids of all words that consist of delimiters only. The second set is
+# extended if build_children combines consecutive delimiters
+def get_delimiter_ids(delimiters, vocabulary):
+    delimiter_ids = set(vocabulary.get_ids(delimiters))
+    delimiter_characters = ''.join(delimiters)
+    delimiter_run_ids = set(token_id for token_id, token in enumerate(vocabulary.tokens) if
+                            token != '' and token.strip(delimiter_characters) == '')
+    return delimiter_ids, delimiter_run_ids
+
+
+# This function maps the words of word statistics to the ids of another vocabulary. The order of the words is kept
+def translate_statistics(statistics, token_ids):
+    if statistics is None or token_ids is None:
+        return statistics
+    counter, ending_counter, continuing_counter, line_count, delimiter_flag = statistics
+    return (Counter({token_ids[word]: count for word, count in counter.items()}),
+            Counter({token_ids[word]: count for word, count in ending_counter.items()}),
+            Counter({token_ids[word]: count for word, count in continuing_counter.items()}), line_count, delimiter_flag)
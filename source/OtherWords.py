@@ -0,0 +1,50 @@
+"""This class summarizes the words at a node that are aggregated as OTHER_WORDS,
+because none of them can exceed theta1. Instead of all words, only the first
+word, the datatypes that all words belong to and the datetime formats that all
+words match are kept, so that the memory does not grow with the number of log
+lines. The distinct words are collected in a bounded set, which is classified
+whenever it is full.
+
+This program is free software: you can redistribute it and/or modify it under
+the terms of the GNU General Public License as published by the Free Software
+Foundation, either version 3 of the License, or (at your option) any later
+version.
+This program is distributed in the hope that it will be useful, but WITHOUT
+ANY WARRANTY; without even the implied warranty of MERCHANTABILITY or FITNESS
+FOR A PARTICULAR PURPOSE. See the GNU General Public License for more details.
+You should have received a copy of the GNU General Public License along with
+this program. If not, see <http://www.gnu.org/licenses/>.
+"""
+
+
+class OtherWords:
+    """This class describes the first word and the common datatypes of the aggregated words"""
+    def __init__(self, datatype_classifier, vocabulary, datatype, max_words=10000):
+        self.datatype_classifier = datatype_classifier
+        self.vocabulary = vocabulary
+        self.max_words = max_words  # Maximum number of distinct words that are collected before they are classified
+        self.first_word = None  # First word in the order of the log lines
+        # Datatypes of the given datatypes that all classified words belong to and datetime formats that all of them match, in the order
+        # of the learned formats
+        self.datatype = list(datatype)
+        self.datetime_formats = list(datatype_classifier.datetime_detector.formats)
+        self.words = set()
+
+    # This method adds a word. The words are not collected any more once all datatypes except 'string' are ruled out
+    def add(self, word):
+        if self.first_word is None:
+            self.first_word = word
+        if len(self.datatype) > 1:
+            self.words.add(word)
+            if len(self.words) >= self.max_words:
+                self.classify()
+
+    # This method removes the datatypes and the datetime formats that not all collected words belong to and empties the collected words
+    def classify(self):
+        if len(self.words) == 0:
+            return
+        words = self.vocabulary.get_tokens(self.words)
+        self.words = set()
+        self.datatype = self.datatype_classifier.filter_datatypes(self.datatype, words)
+        if 'datetime' in self.datatype:
+            self.datetime_formats = self.datatype_classifier.filter_datetime_formats(self.datetime_formats, words)
@@ -0,0 +1,78 @@
+"""This class writes the refined tree to the output files, i.e., the tree in
+textual form, the log templates and the parser model for the AMiner.
+
+This program is free software: you can redistribute it and/or modify it under
+the terms of the GNU General Public License as published by the Free Software
+Foundation, either version 3 of the License, or (at your option) any later
+version.
+This program is distributed in the hope that it will be useful, but WITHOUT
+ANY WARRANTY; without even the implied warranty of MERCHANTABILITY or FITNESS
+FOR A PARTICULAR PURPOSE. See the GNU General Public License for more details.
+You should have received a copy of the GNU General Public License along with
+this program. If not, see <http://www.gnu.org/licenses/>.
+"""
+
+from source import GlobalID
+
+
+class OutputWriter:
+    """This class describes the output of a tree"""
+    def __init__(self, delimiters):
+        self.delimiters = delimiters  # The alphabet of the variables of the parser contains all printable characters except delimiters
+
+    # This method stores the tree in textual form using Depth First Search
+    def write_tree(self, root, file_name):
+        with open(file_name, 'wb') as file:
+            file.write(root.to_string(0).encode())
+
+    # This method stores the templates of all paths through the tree
+    def write_templates(self, root, file_name):
+        with open(str(file_name), 'wb') as file:
+            for template in root.get_templates(''):
+                file.write((template + '\n').encode())
+
+    # This method returns the parser model for the AMiner as a string
+    def get_parser(self, root, subtree_list):
+        # Create id1
+        ID = GlobalID.GlobalID()
+
+        # Build a alphabet of all characters except delimiters for the parser
+        alphabet = ''
+        for i in range(32, 127):
+            alphabet += chr(i)
+
+        for delimiter in self.delimiters:
+            alphabet = alphabet.replace(delimiter, '')
+        alphabet = alphabet.replace('\\', '\\\\')
+        alphabet = alphabet.replace('\'', '\\\'')
+
+        # Write config file using Depth First Search
+        config = '"""This module defines a generated parser model."""\n'
+        config += '\n'
+        config += 'from aminer.parsing.AnyByteDataModelElement import AnyByteDataModelElement\n'
+        config += 'from aminer.parsing.Base64StringModelElement import Base64StringModelElement\n'
+        config += 'from aminer.parsing.DateTimeModelElement import DateTimeModelElement\n'
+        config += 'from aminer.parsing.DecimalFloatValueModelElement import DecimalFloatValueModelElement\n'
+        config += 'from aminer.parsing.DecimalIntegerValueModelElement import DecimalIntegerValueModelElement\n'
+        config += 'from aminer.parsing.FirstMatchModelElement import FirstMatchModelElement\n'
+        config += 'from aminer.parsing.FixedDataModelElement import FixedDataModelElement\n'
+        config += 'from aminer.parsing.FixedWordlistDataModelElement import FixedWordlistDataModelElement\n'
+        config += 'from aminer.parsing.HexStringModelElement import HexStringModelElement\n'
+        config += 'from aminer.parsing.IpAddressDataModelElement import IpAddressDataModelElement\n'
+        config += 'from aminer.parsing.OptionalMatchModelElement import OptionalMatchModelElement\n'
+        config += 'from aminer.parsing.SequenceModelElement import SequenceModelElement\n'
+        config += 'from aminer.parsing.VariableByteDataModelElement import VariableByteDataModelElement\n'
+        config += '\n'
+        config += 'def get_model():\n'
+        config += '\talphabet = b\'' + alphabet + '\'\n'
+        # Add the subtrees to the config
+        config += root.write_config_subtrees(ID, subtree_list)
+        config += '\tmodel = ' + root.write_config(1, ID, subtree_list)[1:-2] + '\n\n'
+        # [1:-2] removes newline and comma following last ModelElement and tabulator preceding first ModelElement
+        config += '\treturn model'
+        return config
+
+    # This method stores the parser model for the AMiner
+    def write_parser(self, root, subtree_list, file_name):
+        with open(file_name, 'wb') as file:
+            file.write(self.get_parser(root, subtree_list).encode())
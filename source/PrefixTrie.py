@@ -0,0 +1,117 @@
+"""This class counts the words of the log lines in a prefix trie, in which log
+lines with the same first words share their trie nodes. The tree is built from
+the counts of the trie nodes instead of the words of every log line.
+
+This program is free software: you can redistribute it and/or modify it under
+the terms of the GNU General Public License as published by the Free Software
+Foundation, either version 3 of the License, or (at your option) any later
+version.
+This program is distributed in the hope that it will be useful, but WITHOUT
+ANY WARRANTY; without even the implied warranty of MERCHANTABILITY or FITNESS
+FOR A PARTICULAR PURPOSE. See the GNU General Public License for more details.
+You should have received a copy of the GNU General Public License along with
+this program. If not, see <http://www.gnu.org/licenses/>.
+"""
+
+from array import array
+from collections import Counter
+import itertools
+
+
+class PrefixTrie:
+    """This class describes a prefix trie of the words of log lines"""
+    def __init__(self):
+        # The trie nodes are numbered in the order in which they are created. Therefore, the numbers of the trie nodes of the same depth
+        # are ordered like the first log lines that pass over them, and sorted numbers can be used like sorted indices of log lines.
+        # Every child has a larger number than its parent
+        self.words = array('i', [-1])  # Word of the edge from the parent to every trie node
+        self.parents = array('I', [0])
+        self.counts = array('Q', [0])  # Number of log lines that pass over every trie node, which is summed up by finish
+        self.ends = array('Q', [0])  # Number of log lines that end at every trie node
+        self.children = None  # Children of all trie nodes ordered by their parents and numbers, which are set by finish
+        self.offsets = None  # Position of the first child of every trie node in the children and the number of children at the end
+        self.index = {}  # Trie node of every parent and word, which is only needed while log lines are inserted
+
+    # This method inserts the words of a log line, which stands for occurrence identical lines
+    def insert(self, words, occurrence):
+        index = self.index
+        node = 0
+        for word in words:
+            key = (node << 32) | word
+            child = index.get(key)
+            if child is None:
+                child = index[key] = len(self.words)
+                self.words.append(word)
+                self.parents.append(node)
+                self.counts.append(0)
+                self.ends.append(0)
+            node = child
+        if node == 0:
+            # Empty log lines pass over the root, but do not end at a word
+            self.counts[0] += occurrence
+        else:
+            self.ends[node] += occurrence
+
+    # This method sums up the counts of the trie nodes from the leaves to the root and orders the children by their parents after all
+    # log lines were inserted. The index is not needed any more and removed
+    def finish(self):
+        self.index = None
+        counts = self.counts
+        ends = self.ends
+        parents = self.parents
+        for node in range(len(self.words) - 1, 0, -1):
+            count = counts[node] + ends[node]
+            counts[node] = count
+            counts[parents[node]] += count
+        # The sort is stable, therefore the children of every parent keep the order in which they were created
+        self.children = array('I', sorted(range(1, len(self.words)), key=parents.__getitem__))
+        child_counts = Counter(itertools.islice(parents, 1, None))
+        self.offsets = array('I', itertools.accumulate((child_counts.get(node, 0) for node in range(len(self.words))), initial=0))
+
+    # This method returns the children of a trie node in the order in which they were created
+    def get_children(self, node):
+        return self.children[self.offsets[node]:self.offsets[node + 1]]
+
+    # This method groups the children of the trie nodes with the given numbers by their words. It returns the same word statistics as
+    # Node.count_words for the log lines that pass over the trie nodes, except that the groups contain the numbers of the children
+    # through which log lines continue. The children of all trie nodes are sorted by their numbers, so that the words are counted in
+    # the order of their first occurrence. The depth is given by the trie nodes and not needed
+    def count_words(self, depth, trie_nodes, delimiter_run_ids):
+        words = self.words
+        counts = self.counts
+        ends = self.ends
+        offsets = self.offsets
+        delimiter_flag = False
+        counter = Counter()
+        ending_counter = Counter()
+        continuing_counter = Counter()
+        groups = {}
+        line_count = 0
+        children = array('I')
+        for node in trie_nodes:
+            # Log lines that end at the trie node do not pass over the node of the tree that receives the trie node
+            line_count += counts[node] - ends[node]
+            children.extend(self.children[offsets[node]:offsets[node + 1]])
+        if len(trie_nodes) > 1:
+            # The children of every trie node are ascending, which the sort merges
+            children = sorted(children)
+        for child in children:
+            word = words[child]
+            count = counts[child]
+            end = ends[child]
+            if word in delimiter_run_ids:
+                delimiter_flag = True
+            counter[word] += count
+            if end > 0:
+                ending_counter[word] += end
+            if count > end:
+                continuing_counter[word] += count - end
+                group = groups.get(word)
+                if group is None:
+                    group = groups[word] = array('I')
+                group.append(child)
+        return counter, ending_counter, continuing_counter, groups, line_count, delimiter_flag
+
+    # This method returns the number of trie nodes
+    def __len__(self):
+        return len(self.words)
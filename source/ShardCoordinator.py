@@ -0,0 +1,211 @@
+"""This class distributes the log lines to shard workers and counts the words
+of the nodes of the tree by merging the counts of all workers, so that the
+tree can be built from log lines that are stored by local worker processes or
+by remote workers. Subtrees whose log lines are all stored by one worker are
+built by that worker. The resulting tree is the same as the tree built in a
+single process.
+
+This program is free software: you can redistribute it and/or modify it under
+the terms of the GNU General Public License as published by the Free Software
+Foundation, either version 3 of the License, or (at your option) any later
+version.
+This program is distributed in the hope that it will be useful, but WITHOUT
+ANY WARRANTY; without even the implied warranty of MERCHANTABILITY or FITNESS
+FOR A PARTICULAR PURPOSE. See the GNU General Public License for more details.
+You should have received a copy of the GNU General Public License along with
+this program. If not, see <http://www.gnu.org/licenses/>.
+"""
+
+from array import array
+from collections import Counter, deque
+import multiprocessing
+from multiprocessing.connection import Client
+import zlib
+
+from source import ShardWorker
+
+
+class ShardCoordinator:
+    """This class describes the connections to the shard workers and the merged word counts of the nodes of a depth"""
+    def __init__(self, processes=0, addresses=None, authkey=None, prefix_words=2, batch_lines=10000):
+        if addresses is None:
+            addresses = []
+        if processes <= 0 and len(addresses) == 0:
+            raise ValueError('The shards engine requires local worker processes or addresses of remote workers')
+        if len(addresses) > 0 and authkey is None:
+            raise ValueError('The connections to remote workers require an authentication key')
+        if processes > 0 and 'fork' not in multiprocessing.get_all_start_methods():
+            raise ValueError('Local worker processes require the fork start method, start remote workers with ShardServer.py instead')
+        self.processes = processes  # Number of local worker processes
+        self.addresses = addresses  # Addresses host:port of the remote workers
+        self.authkey = authkey
+        self.prefix_words = prefix_words  # Number of first words that are not delimiters by which the log lines are assigned to workers
+        self.batch_lines = batch_lines  # Number of log lines that are sent to a worker in one message
+        self.connections = []
+        self.worker_processes = []
+        self.line_count = 0
+        self.depth = None
+        # The pairs of a node and a word of the previous depth, through which log lines continue, and the workers that store these lines
+        self.pairs = []
+        self.pair_workers = []
+        self.node_numbers = None
+        self.level = None  # Number of log lines and statistics of the words of every counted node of the current depth
+
+    # This method starts the local worker processes and connects to the remote workers
+    def connect(self):
+        context = multiprocessing.get_context('fork') if self.processes > 0 else None
+        for _ in range(self.processes):
+            connection, worker_connection = context.Pipe()
+            # The workers are forked, because spawned workers would import and run the main script again
+            process = context.Process(target=ShardWorker.serve_connection, args=(worker_connection,), daemon=True)
+            process.start()
+            worker_connection.close()
+            self.connections.append(connection)
+            self.worker_processes.append(process)
+        authkey = self.authkey.encode() if isinstance(self.authkey, str) else self.authkey
+        for address in self.addresses:
+            host, _, port = address.rpartition(':')
+            self.connections.append(Client((host, int(port)), authkey=authkey))
+
+    # This method sends the words and occurrences of the log lines to the workers. The log lines are assigned to the workers by the hash
+    # of their first words from the depth on that are not delimiters, so that log lines with the same first words are stored by the same
+    # worker and the subtrees below these words are built by one worker. The vocabulary is sent after all log lines, because combining
+    # consecutive delimiters adds words to it
+    def distribute(self, lines, depth, parameters, delimiter_run_ids, vocabulary, keep_statistics, max_exact_words):
+        if len(self.connections) == 0:
+            self.connect()
+        for connection in self.connections:
+            connection.send(('reset',))
+        batches = [[] for _ in self.connections]
+        line_workers = set()
+        line_count = 0
+        for words, occurrence in lines:
+            prefix = [word for word in words[depth:] if word not in delimiter_run_ids][:self.prefix_words]
+            worker = zlib.crc32('\n'.join(vocabulary.get_tokens(prefix)).encode('utf-8')) % len(self.connections)
+            line_workers.add(worker)
+            batches[worker].append((line_count, words, occurrence))
+            line_count += 1
+            if len(batches[worker]) >= self.batch_lines:
+                self.connections[worker].send(('add', batches[worker]))
+                batches[worker] = []
+        for connection, batch in zip(self.connections, batches):
+            if len(batch) > 0:
+                connection.send(('add', batch))
+        self.line_count = line_count
+        self.depth = None
+        # All log lines pass over the root, which is given by the pair (0, None) with the key 0
+        self.pairs = [(0, None)]
+        self.pair_workers = [sorted(line_workers)]
+        for connection in self.connections:
+            connection.send(('finish', vocabulary.tokens, depth, parameters, keep_statistics, max_exact_words))
+        for worker in range(len(self.connections)):
+            self.receive(worker)
+
+    # This method counts the words at this depth of the nodes of the queue, which all have this depth. The nodes are given by the keys
+    # of the pairs of the previous depth whose continuing log lines pass over them. The subtrees of nodes whose log lines are all stored
+    # by one worker are built by the worker, the words of the other nodes are counted by all workers that store their log lines. The
+    # method returns the queue of the counted nodes and the nodes with the results of build_subtree of the subtrees built by workers
+    def count_level(self, depth, queue):
+        self.depth = depth
+        pairs = self.pairs
+        pair_workers = self.pair_workers
+        self.pairs = []
+        self.pair_workers = []
+        self.node_numbers = {}
+        requests = [({}, []) for _ in self.connections]
+        counted_queue = deque()
+        subtree_nodes = []
+        for entry in queue:
+            node, _, keys, theta1 = entry
+            workers = set()
+            for key in keys:
+                workers.update(pair_workers[key])
+            if len(workers) == 1:
+                worker = workers.pop()
+                requests[worker][1].append(([pairs[key] for key in keys], theta1, node.occurrence))
+                subtree_nodes.append((node, worker))
+                continue
+            node_number = len(counted_queue)
+            counted_queue.append(entry)
+            for key in keys:
+                self.node_numbers[key] = node_number
+                for worker in pair_workers[key]:
+                    requests[worker][0][pairs[key]] = node_number
+        # All workers count their log lines before the results are received
+        workers = [worker for worker, (node_pairs, subtrees) in enumerate(requests) if len(node_pairs) > 0 or len(subtrees) > 0]
+        for worker in workers:
+            self.connections[worker].send(('count_level', depth, requests[worker][0], requests[worker][1]))
+        level = {}
+        subtree_results = {}
+        for worker in workers:
+            results, subtree_results[worker] = self.receive(worker)
+            # The results are merged in the order of the workers, so that the sums do not depend on the order of the answers
+            for node_number, (line_count, word_statistics) in results.items():
+                statistics = level.get(node_number)
+                if statistics is None:
+                    statistics = level[node_number] = [0, {}]
+                statistics[0] += line_count
+                for word, first, occurrence, ending_lines, continuing_lines in word_statistics:
+                    merged_statistics = statistics[1].get(word)
+                    if merged_statistics is None:
+                        statistics[1][word] = [first, occurrence, ending_lines, continuing_lines, []]
+                        merged_statistics = statistics[1][word]
+                    else:
+                        merged_statistics[0] = min(merged_statistics[0], first)
+                        merged_statistics[1] += occurrence
+                        merged_statistics[2] += ending_lines
+                        merged_statistics[3] += continuing_lines
+                    if continuing_lines > 0:
+                        merged_statistics[4].append(worker)
+        self.level = level
+        subtree_results = [(node, subtree_results[worker].pop(0)) for node, worker in subtree_nodes]
+        return counted_queue, subtree_results
+
+    # This method returns the word statistics of the node that is given by the keys of the pairs of the previous depth like
+    # Node.count_words, except that the groups contain the keys of the pairs of the node and the words at this depth. The words of the
+    # depth must have been counted by count_level. The words are ordered by their first occurrence
+    def count_words(self, depth, keys, delimiter_run_ids):
+        if depth != self.depth:
+            raise ValueError('The words of depth ' + str(depth) + ' were not counted')
+        node_number = self.node_numbers[keys[0]]
+        line_count, word_statistics = self.level.get(node_number, (0, {}))
+        counter = Counter()
+        ending_counter = Counter()
+        continuing_counter = Counter()
+        groups = {}
+        for word in sorted(word_statistics, key=lambda word: word_statistics[word][0]):
+            _, occurrence, ending_lines, continuing_lines, workers = word_statistics[word]
+            counter[word] = occurrence
+            if ending_lines > 0:
+                ending_counter[word] = ending_lines
+            if continuing_lines > 0:
+                continuing_counter[word] = continuing_lines
+                groups[word] = array('I', [len(self.pairs)])
+                self.pairs.append((node_number, word))
+                self.pair_workers.append(workers)
+        delimiter_flag = not delimiter_run_ids.isdisjoint(word_statistics)
+        return counter, ending_counter, continuing_counter, groups, line_count, delimiter_flag
+
+    # This method returns the answer of a worker. If the worker failed, its error is raised
+    def receive(self, worker):
+        answer = self.connections[worker].recv()
+        if answer[0] == 'error':
+            raise RuntimeError('The shard worker ' + str(worker) + ' failed:\n' + answer[1])
+        return answer[1:] if len(answer) > 2 else answer[1]
+
+    # This method ends the sessions of the workers and stops the local worker processes
+    def close(self):
+        for connection in self.connections:
+            try:
+                connection.send(('close',))
+            except OSError:
+                pass
+            connection.close()
+        for process in self.worker_processes:
+            process.join()
+        self.connections = []
+        self.worker_processes = []
+
+    # This method returns the number of log lines that were distributed
+    def __len__(self):
+        return self.line_count
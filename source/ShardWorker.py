@@ -0,0 +1,148 @@
+"""This class stores a shard of the log lines in a worker process and counts
+the words of the nodes of the tree for a shard coordinator, which builds the
+tree from the counts of all shards. Subtrees whose log lines are all stored in
+the shard are built by the worker. Workers run in local processes or as
+servers that coordinators connect to over TCP, see ShardServer.py.
+
+This program is free software: you can redistribute it and/or modify it under
+the terms of the GNU General Public License as published by the Free Software
+Foundation, either version 3 of the License, or (at your option) any later
+version.
+This program is distributed in the hope that it will be useful, but WITHOUT
+ANY WARRANTY; without even the implied warranty of MERCHANTABILITY or FITNESS
+FOR A PARTICULAR PURPOSE. See the GNU General Public License for more details.
+You should have received a copy of the GNU General Public License along with
+this program. If not, see <http://www.gnu.org/licenses/>.
+"""
+
+from array import array
+import traceback
+
+from source import LogLine, Node, Vocabulary
+
+
+class ShardWorker:
+    """This class describes the log lines of a shard and the nodes of the tree that they pass"""
+    def __init__(self):
+        self.log_lines = []  # Log lines of the shard, whose line ids are their positions in the log lines of the coordinator
+        self.vocabulary = Vocabulary.Vocabulary()
+        self.start_depth = 0
+        self.parameters = None
+        # The log lines that continue to the current depth and the pair of the node of the previous depth and the word at the previous
+        # depth of every log line. At the beginning, all log lines pass over the root, which is given by the pair (0, None)
+        self.line_indices = array('I')
+        self.line_pairs = []
+
+    # This method adds log lines, which are tuples of the line id, the words and the occurrence
+    def add(self, lines):
+        for line_id, words, occurrence in lines:
+            log_line = LogLine.LogLine(line_id, None, None, words)
+            log_line.occurrence = occurrence
+            self.log_lines.append(log_line)
+
+    # This method is called after all log lines were added. It sets the words of the vocabulary of the coordinator, the depth of the
+    # root, the parameters of build_tree and the class attributes of the nodes that change the subtrees, which are built by the worker
+    def finish(self, tokens, depth, parameters, keep_statistics, max_exact_words):
+        self.vocabulary.get_ids(tokens)
+        self.start_depth = depth
+        self.parameters = parameters
+        Node.Node.keep_statistics = keep_statistics
+        Node.Node.max_exact_words = max_exact_words
+        self.line_indices = array('I', range(len(self.log_lines)))
+        self.line_pairs = [(0, None)] * len(self.log_lines)
+
+    # This method counts the words at this depth of the log lines of the nodes, which are given by the pairs of the previous depth whose
+    # continuing log lines pass over them. It returns the number of log lines and the first line id, the occurrence, the ending lines
+    # and the continuing lines of every word of every node. The log lines whose pairs belong to the subtrees are not counted, instead
+    # every subtree is built with its theta1 and occurrence, and the results of build_subtree are returned
+    def count_level(self, depth, pairs, subtrees):
+        subtree_numbers = {}
+        for subtree_number, (subtree_pairs, _, _) in enumerate(subtrees):
+            for pair in subtree_pairs:
+                subtree_numbers[pair] = subtree_number
+        subtree_lines = [array('I') for _ in subtrees]
+        node_statistics = {}
+        line_indices = array('I')
+        line_pairs = []
+        log_lines = self.log_lines
+        for index, pair in zip(self.line_indices, self.line_pairs):
+            log_line = log_lines[index]
+            words = log_line.words
+            # Log lines that end at the previous depth share the pairs with the continuing log lines, but do not pass to the children.
+            # Only empty log lines are counted at the root without a word
+            if depth >= len(words) and depth != self.start_depth:
+                continue
+            subtree_number = subtree_numbers.get(pair)
+            if subtree_number is not None:
+                subtree_lines[subtree_number].append(index)
+                continue
+            node_number = pairs.get(pair)
+            if node_number is None:
+                continue
+            occurrence = log_line.occurrence
+            statistics = node_statistics.get(node_number)
+            if statistics is None:
+                statistics = node_statistics[node_number] = [0, {}]
+            statistics[0] += occurrence
+            if depth >= len(words):
+                continue
+            word = words[depth]
+            word_statistics = statistics[1].get(word)
+            if word_statistics is None:
+                word_statistics = statistics[1][word] = [log_line.line_id, 0, 0, 0]
+            word_statistics[1] += occurrence
+            if len(words) == depth + 1:
+                word_statistics[2] += occurrence
+            else:
+                word_statistics[3] += occurrence
+                line_indices.append(index)
+                line_pairs.append((node_number, word))
+        self.line_indices = line_indices
+        self.line_pairs = line_pairs
+        results = {node_number: (line_count, [(word,) + tuple(word_statistics) for word, word_statistics in words.items()])
+                   for node_number, (line_count, words) in node_statistics.items()}
+        subtree_results = []
+        for (_, theta1, occurrence), indices in zip(subtrees, subtree_lines):
+            arguments = Node.get_subtree_arguments(occurrence, depth, indices, theta1, log_lines, self.parameters, self.vocabulary)
+            subtree_results.append(Node.build_subtree(arguments))
+        return results, subtree_results
+
+
+# This function answers the messages of a coordinator on the connection until it is closed. Every message is a tuple of a command and
+# its arguments; only finish and count_level are answered, and reset removes the log lines of the previous tree. If a message fails,
+# the error is sent instead of the answer and the connection is not served any more
+def serve_connection(connection):
+    worker = ShardWorker()
+    while True:
+        try:
+            message = connection.recv()
+        except EOFError:
+            return
+        command = message[0]
+        try:
+            if command == 'close':
+                return
+            if command == 'reset':
+                worker = ShardWorker()
+            elif command == 'add':
+                worker.add(message[1])
+            elif command == 'finish':
+                worker.finish(*message[1:])
+                connection.send(('ok', len(worker.log_lines)))
+            elif command == 'count_level':
+                connection.send(('ok',) + worker.count_level(*message[1:]))
+            else:
+                raise ValueError('Unknown command ' + str(command))
+        except Exception:
+            connection.send(('error', traceback.format_exc()))
+            return
+
+
+# This function accepts connections of coordinators on the listener and serves them one after another. If sessions is given, the
+# function returns after that many connections were served
+def serve(listener, sessions=None):
+    served = 0
+    while sessions is None or served < sessions:
+        with listener.accept() as connection:
+            serve_connection(connection)
+        served += 1
@@ -0,0 +1,153 @@
+"""This class caches the results of the stages of AECIDpg.py on disk, so that
+a re-run with changed parameters of a late stage resumes from the latest stage
+whose result is still valid instead of importing the log lines and building
+the tree again.
+
+This program is free software: you can redistribute it and/or modify it under
+the terms of the GNU General Public License as published by the Free Software
+Foundation, either version 3 of the License, or (at your option) any later
+version.
+This program is distributed in the hope that it will be useful, but WITHOUT
+ANY WARRANTY; without even the implied warranty of MERCHANTABILITY or FITNESS
+FOR A PARTICULAR PURPOSE. See the GNU General Public License for more details.
+You should have received a copy of the GNU General Public License along with
+this program. If not, see <http://www.gnu.org/licenses/>.
+"""
+
+import hashlib
+import os
+import pickle
+
+from source import LogLine, TreeSnapshot
+
+STAGE_CACHE_VERSION = 1
+# Stages of AECIDpg.py in the order in which they are run. The result of a stage depends on the input files, its own parameters and
+# the parameters of all previous stages
+STAGES = ['import', 'build_tree', 'insert_variables', 'merge_similar_branches', 'insert_lists', 'match_lists', 'get_subtrees',
+          'aggregate_sequences']
+STAGE_FILE_EXTENSION = '.stage'
+
+
+class StageCache:
+    """This class describes the cache of the stage results"""
+    def __init__(self, cache_dir=None, max_size=1073741824, input_files=None, stage_parameters=None):
+        self.cache_dir = cache_dir  # Directory of the cached stage results; None disables the cache
+        self.max_size = max_size  # Maximum number of bytes of all cached stage results
+        self.keys = {}
+        self.restored_stage = None  # Stage whose result was restored, all previous stages are skipped as well
+        if self.cache_dir is None:
+            return
+        os.makedirs(self.cache_dir, exist_ok=True)
+        # The key of a stage is built from the key of the previous stage, therefore changing a parameter invalidates all later stages
+        key = get_fingerprint(input_files)
+        for stage in STAGES:
+            key = hashlib.sha256((key + stage + repr(stage_parameters[stage])).encode()).hexdigest()
+            self.keys[stage] = key
+
+    # This method returns the path of the cached result of a stage
+    def get_file_name(self, stage):
+        return os.path.join(self.cache_dir, self.keys[stage] + STAGE_FILE_EXTENSION)
+
+    # This method returns True if the stage does not have to be run, because the result of this or a later stage was restored
+    def skips(self, stage):
+        return self.restored_stage is not None and STAGES.index(stage) <= STAGES.index(self.restored_stage)
+
+    # This method restores the result of the latest stage that is cached and returns it. Results that can not be loaded, e.g., because
+    # they were written by another version, are removed and the previous stage is tried
+    def restore(self):
+        if self.cache_dir is None:
+            return None
+        for stage in reversed(STAGES):
+            file_name = self.get_file_name(stage)
+            if not os.path.exists(file_name):
+                continue
+            try:
+                if stage == 'import':
+                    result = self.load_log_lines(file_name)
+                else:
+                    tree_snapshot = TreeSnapshot.TreeSnapshot()
+                    tree_snapshot.load(file_name)
+                    result = (tree_snapshot.root, tree_snapshot.subtree_list)
+            except (ValueError, EOFError, pickle.UnpicklingError):
+                os.remove(file_name)
+                continue
+            # The modification time marks the recently used results, which are kept longest when the cache is too large
+            os.utime(file_name)
+            self.restored_stage = stage
+            return result
+        return None
+
+    # This method stores the imported log lines together with the vocabulary, the number of read log lines and the learned time stamp
+    # formats
+    def save_log_lines(self, log_line_dict, vocabulary, lines_read, time_stamp_formats):
+        if self.cache_dir is None:
+            return
+        data = {'version': STAGE_CACHE_VERSION, 'tokens': vocabulary.tokens, 'lines_read': lines_read,
+                'time_stamp_formats': time_stamp_formats,
+                'log_lines': [(log_line.line_id, log_line.words, log_line.occurrence) for log_line in log_line_dict.values()]}
+        temporary_file_name = self.get_file_name('import') + '.tmp'
+        with open(temporary_file_name, 'wb') as f:
+            pickle.dump(data, f, pickle.HIGHEST_PROTOCOL)
+        self.commit(temporary_file_name, 'import')
+
+    # This method loads the imported log lines and returns the log line dictionary, the tokens of the vocabulary, the number of read
+    # log lines and the learned time stamp formats
+    def load_log_lines(self, file_name):
+        with open(file_name, 'rb') as f:
+            data = pickle.load(f)
+        if not isinstance(data, dict) or data.get('version') != STAGE_CACHE_VERSION:
+            raise ValueError('The cached stage ' + str(file_name) + ' has another version')
+        log_line_dict = {}
+        for line_id, words, occurrence in data['log_lines']:
+            log_line = LogLine.LogLine(line_id, None, None, words)
+            log_line.occurrence = occurrence
+            log_line_dict[line_id + 1] = log_line
+        return log_line_dict, data['tokens'], data['lines_read'], data['time_stamp_formats']
+
+    # This method stores the tree after a stage
+    def save_tree(self, stage, root, subtree_list, delimiters):
+        if self.cache_dir is None:
+            return
+        temporary_file_name = self.get_file_name(stage) + '.tmp'
+        TreeSnapshot.TreeSnapshot(root, subtree_list, delimiters).save(temporary_file_name)
+        self.commit(temporary_file_name, stage)
+
+    # This method renames a completely written result to its final name, so that an interrupted run does not leave incomplete results,
+    # and removes the least recently used results until the cache is not larger than its maximum size. The committed result is never
+    # removed, even if its modification time is not the latest or if it is larger than the maximum size on its own
+    def commit(self, temporary_file_name, stage):
+        file_name = self.get_file_name(stage)
+        os.replace(temporary_file_name, file_name)
+        size = os.path.getsize(file_name)
+        files = []
+        for name in os.listdir(self.cache_dir):
+            path = os.path.join(self.cache_dir, name)
+            if name.endswith(STAGE_FILE_EXTENSION) and path != file_name:
+                files.append((os.path.getmtime(path), path, os.path.getsize(path)))
+        size += sum(file_size for _, _, file_size in files)
+        for _, path, file_size in sorted(files):
+            if size <= self.max_size:
+                break
+            os.remove(path)
+            size -= file_size
+
+    # This method removes all cached results
+    def clear(self):
+        if self.cache_dir is None:
+            return
+        for name in os.listdir(self.cache_dir):
+            if name.endswith(STAGE_FILE_EXTENSION):
+                os.remove(os.path.join(self.cache_dir, name))
+
+
+# This function returns a fingerprint of the contents of the input files. Renamed or touched files with the same contents have the
+# same fingerprint
+def get_fingerprint(input_files):
+    fingerprint = hashlib.sha256(str(STAGE_CACHE_VERSION).encode())
+    for input_file in input_files:
+        file_hash = hashlib.sha256()
+        with open(input_file, 'rb') as f:
+            for block in iter(lambda: f.read(1048576), b''):
+                file_hash.update(block)
+        fingerprint.update(file_hash.digest())
+    return fingerprint.hexdigest()
@@ -0,0 +1,182 @@
+"""This class builds the parser tree for many configurations of the
+thresholds from log lines that are only imported and tokenized once, and
+reports the size and the coverage of every resulting parser.
+
+This program is free software: you can redistribute it and/or modify it under
+the terms of the GNU General Public License as published by the Free Software
+Foundation, either version 3 of the License, or (at your option) any later
+version.
+This program is distributed in the hope that it will be useful, but WITHOUT
+ANY WARRANTY; without even the implied warranty of MERCHANTABILITY or FITNESS
+FOR A PARTICULAR PURPOSE. See the GNU General Public License for more details.
+You should have received a copy of the GNU General Public License along with
+this program. If not, see <http://www.gnu.org/licenses/>.
+"""
+
+import itertools
+import multiprocessing
+import time
+
+from source import DatatypeClassifier, LogImporter, Node, ShardCoordinator, TimeStampDetector, WordCountCache
+
+# Parameters of PGConfig that can be changed in a sweep. The other parameters change the log lines or the words, which are only
+# imported once
+SWEEP_PARAMETERS = ['theta1', 'theta2', 'theta3', 'theta4', 'theta5', 'theta6', 'damping', 'force_branch', 'force_var', 'merge_similarity',
+                    'merge_branches', 'merge_subtrees_min_similarity', 'find_subtrees', 'subtree_min_height', 'element_list_similarity']
+# The engine is inherited by the forked worker processes, so that the log lines are not passed to the workers for every configuration
+current_engine = None
+
+
+class SweepEngine:
+    """This class describes a sweep over the parameters of the tree"""
+    def __init__(self, parameters, processes=1, cache_lines=10000000):
+        if parameters['external_sort_dir'] is not None:
+            raise ValueError('The log lines of a sweep are stored in memory, therefore external_sort_dir must be None')
+        if parameters['build_processes'] > 1 and processes > 1:
+            raise ValueError('The trees are built by one process each if several configurations are evaluated in parallel')
+        self.parameters = parameters  # Parameters of PGConfig, which are used for all parameters that a configuration does not set
+        self.processes = processes  # Number of processes that evaluate configurations in parallel
+        self.cache_lines = cache_lines  # Maximum number of line indices in the word statistics that every process caches
+        self.log_line_dict = None
+        self.vocabulary = None
+        self.lines_read = 0
+        self.trie = None  # Prefix trie of the log lines, which is shared by all trees if they are built by the trie engine
+        self.shards = None  # Shard coordinator, whose workers are used for all trees if they are built by the shards engine
+        self.pool = None
+
+    # This method imports the log lines and the unique log lines are stored. The datatype classifier, the word count cache and the prefix
+    # trie of the trie engine are shared by all trees that are built afterwards
+    def import_log_lines(self, input_file):
+        time_stamp_detector = None
+        if self.parameters['time_stamp_detection']:
+            time_stamp_detector = TimeStampDetector.TimeStampDetector()
+        log_importer = LogImporter.LogImporter(
+            self.parameters['delimiters'], self.parameters['time_stamp_length'], self.parameters['chunk_size'],
+            self.parameters['import_processes'], time_stamp_detector=time_stamp_detector,
+            collapse_delimiters=self.parameters['collapse_delimiters'])
+        unique_log_lines = {}
+        self.log_line_dict = {}
+        for log_line in log_importer.import_file(input_file):
+            words = log_line.words.tobytes()
+            if words in unique_log_lines:
+                unique_log_lines[words].occurrence += log_line.occurrence
+            else:
+                unique_log_lines[words] = log_line
+                self.log_line_dict[log_line.line_id + 1] = log_line
+        self.vocabulary = log_importer.vocabulary
+        self.lines_read = log_importer.lines_read
+        Node.Node.datatype_classifier = DatatypeClassifier.DatatypeClassifier(self.parameters['datatype_cache_size'],
+                                                                              self.parameters['datatype_cache_file'])
+        Node.Node.datatype_classifier.datetime_detector.learn(self.vocabulary.tokens)
+        Node.Node.word_count_cache = WordCountCache.WordCountCache(self.cache_lines)
+        Node.Node.max_exact_words = self.parameters['max_exact_words']
+        if self.parameters['build_engine'] == 'trie':
+            self.trie = Node.build_prefix_trie(list(self.log_line_dict.values()), 0, self.parameters['delimiters'], self.vocabulary)
+        elif self.parameters['build_engine'] == 'shards':
+            if self.processes > 1:
+                raise ValueError('The trees of the shards engine are built one after another by the workers of the shard coordinator')
+            self.shards = ShardCoordinator.ShardCoordinator(
+                self.parameters['build_shard_processes'], self.parameters['build_shard_workers'], self.parameters['build_shard_authkey'],
+                self.parameters['build_shard_prefix_words'])
+        return log_importer.get_statistics()
+
+    # This method builds and refines the tree of a configuration like AECIDpg.py and returns the number of nodes, the number of
+    # templates, the fraction of the log lines that are parsed by the tree and the runtime in seconds
+    def evaluate(self, configuration):
+        parameters = dict(self.parameters)
+        parameters.update(configuration)
+        delimiters = parameters['delimiters']
+        start_time = time.time()
+        root = Node.Node()
+        root.occurrence = self.lines_read
+        root.build_tree(0, self.log_line_dict, delimiters, parameters['theta1'], parameters['theta2'], parameters['theta3'],
+                        parameters['theta4'], parameters['theta5'], parameters['theta6'], parameters['damping'],
+                        parameters['force_branch'], parameters['force_var'], self.vocabulary, parameters['build_order'],
+                        parameters['build_processes'], parameters['build_min_subtree_lines'], parameters['build_engine'], trie=self.trie,
+                        shards=self.shards)
+        # The refinement adds up the occurrences of merged nodes, therefore the coverage is counted in the tree built by build_tree
+        coverage = root.count_ending_lines() / float(max(self.lines_read, 1))
+        root.sort_children()
+        root.insert_variables(parameters['merge_similarity'], delimiters, 0, parameters['force_branch'])
+        if parameters['merge_branches']:
+            root.merge_similar_branches(delimiters, parameters['merge_subtrees_min_similarity'])
+        root.insert_lists()
+        root.match_lists(parameters['element_list_similarity'])
+        subtree_list = []
+        if parameters['find_subtrees']:
+            subtree_list = root.get_subtrees(parameters['subtree_min_height'])
+        root.sort_children()
+        root.aggregate_sequences(subtree_list)
+        return {'nodes': root.count_nodes(), 'templates': len(root.get_templates('')), 'coverage': coverage,
+                'runtime': time.time() - start_time}
+
+    # This method evaluates the configurations and returns the results in the same order. Neighbouring configurations are evaluated by
+    # the same process, because they share most word statistics if they only differ in the last parameters
+    def evaluate_all(self, configurations):
+        global current_engine
+        if self.processes <= 1 or len(configurations) <= 1 or 'fork' not in multiprocessing.get_all_start_methods():
+            return [self.evaluate(configuration) for configuration in configurations]
+        if self.pool is None:
+            current_engine = self
+            self.pool = multiprocessing.get_context('fork').Pool(self.processes)
+        chunk_size = max(1, -(-len(configurations) // (2 * self.processes)))
+        return self.pool.map(evaluate_configuration, configurations, chunk_size)
+
+    # This method searches the value of a parameter between low and high, for which the tree has the number of nodes closest to the
+    # target. The number of nodes is assumed to change monotonically with the parameter. In every step, the interval between the two
+    # values that enclose the target is divided by as many values as there are processes. It returns all evaluated values and results
+    def search(self, configuration, name, low, high, target_nodes, steps=5):
+        if name not in SWEEP_PARAMETERS:
+            raise ValueError('The parameter ' + name + ' can not be searched, use one of ' + ', '.join(SWEEP_PARAMETERS))
+        values = [low, high]
+        evaluated = []
+        for _ in range(steps):
+            count = max(self.processes, 1) + 1
+            values = [value for value in values + [low + (high - low) * i / count for i in range(1, count)]
+                      if value not in [evaluated_value for evaluated_value, _ in evaluated]]
+            configurations = []
+            for value in values:
+                new_configuration = dict(configuration)
+                new_configuration[name] = value
+                configurations.append(new_configuration)
+            evaluated.extend(zip(values, self.evaluate_all(configurations)))
+            evaluated.sort(key=lambda entry: entry[0])
+            values = []
+            if any(result['nodes'] == target_nodes for _, result in evaluated):
+                break
+            # Find the neighbouring values whose numbers of nodes enclose the target, otherwise the interval around the closest value
+            for (value1, result1), (value2, result2) in zip(evaluated, evaluated[1:]):
+                if min(result1['nodes'], result2['nodes']) <= target_nodes <= max(result1['nodes'], result2['nodes']):
+                    low, high = value1, value2
+                    break
+            else:
+                index = min(range(len(evaluated)), key=lambda i: abs(evaluated[i][1]['nodes'] - target_nodes))
+                low = evaluated[max(index - 1, 0)][0]
+                high = evaluated[min(index + 1, len(evaluated) - 1)][0]
+        return evaluated
+
+    # This method stops the worker processes and the workers of the shard coordinator
+    def close(self):
+        global current_engine
+        if self.shards is not None:
+            self.shards.close()
+            self.shards = None
+        if self.pool is not None:
+            self.pool.close()
+            self.pool.join()
+            self.pool = None
+            current_engine = None
+
+
+# This function evaluates a configuration with the engine that was inherited by the worker process
+def evaluate_configuration(configuration):
+    return current_engine.evaluate(configuration)
+
+
+# This function returns all combinations of the values of the parameters. The values of the last parameter change first
+def get_configurations(grid):
+    for name, _ in grid:
+        if name not in SWEEP_PARAMETERS:
+            raise ValueError('The parameter ' + name + ' can not be swept, use one of ' + ', '.join(SWEEP_PARAMETERS))
+    names = [name for name, _ in grid]
+    return [dict(zip(names, values)) for values in itertools.product(*[values for _, values in grid])]
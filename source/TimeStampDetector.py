@@ -0,0 +1,144 @@
+"""This class learns the formats of the time stamps at the beginning of log
+lines from a sample and removes the time stamps from all log lines.
+
+This program is free software: you can redistribute it and/or modify it under
+the terms of the GNU General Public License as published by the Free Software
+Foundation, either version 3 of the License, or (at your option) any later
+version.
+This program is distributed in the hope that it will be useful, but WITHOUT
+ANY WARRANTY; without even the implied warranty of MERCHANTABILITY or FITNESS
+FOR A PARTICULAR PURPOSE. See the GNU General Public License for more details.
+You should have received a copy of the GNU General Public License along with
+this program. If not, see <http://www.gnu.org/licenses/>.
+"""
+
+import calendar
+import re
+import time
+from datetime import datetime
+
+MONTHS = {'Jan': 1, 'Feb': 2, 'Mar': 3, 'Apr': 4, 'May': 5, 'Jun': 6, 'Jul': 7, 'Aug': 8, 'Sep': 9, 'Oct': 10, 'Nov': 11, 'Dec': 12}
+MONTH_PATTERN = '(?P<month>' + '|'.join(MONTHS) + ')'
+TIME_PATTERN = r'(?P<hour>\d{2}):(?P<minute>\d{2}):(?P<second>\d{2})(?P<fraction>[.,]\d+)?'
+ZONE_PATTERN = r'(?P<zone>Z|[+-]\d{2}:?\d{2})'
+# A time stamp must be followed by a space, a tabulator or the end of the line. Only this separator is removed with the time stamp like
+# time_stamp_length removes one character after the time stamp, further whitespace belongs to the line
+END_PATTERN = r"(?:[ \t]|$)"
+
+# Time stamp formats that are tried when the formats are learned. Plain unix time stamps are only accepted between the years 2000 and
+# 2100, because other numbers at the beginning of lines are rarely time stamps.
+TIME_STAMP_FORMATS = {
+    'iso8601': re.compile(r'(?P<year>\d{4})-(?P<month>\d{2})-(?P<day>\d{2})[T ]' + TIME_PATTERN + ZONE_PATTERN + '?' + END_PATTERN),
+    'slashes': re.compile(r'(?P<year>\d{4})/(?P<month>\d{2})/(?P<day>\d{2}) ' + TIME_PATTERN + END_PATTERN),
+    'us': re.compile(r'(?P<month>\d{2})/(?P<day>\d{2})/(?P<year>\d{4}) ' + TIME_PATTERN + END_PATTERN),
+    'syslog': re.compile(MONTH_PATTERN + r' (?P<day>[ \d]\d) ' + TIME_PATTERN + END_PATTERN),
+    'ctime': re.compile(r'(?:Mon|Tue|Wed|Thu|Fri|Sat|Sun) ' + MONTH_PATTERN + r' (?P<day>[ \d]\d) ' + TIME_PATTERN +
+                        r' (?P<year>\d{4})' + END_PATTERN),
+    'apache': re.compile(r'\[(?P<day>\d{2})/' + MONTH_PATTERN + r'/(?P<year>\d{4}):' + TIME_PATTERN + ' ' + ZONE_PATTERN + r'\]' +
+                         END_PATTERN),
+    'epoch': re.compile(r'(?P<epoch>\d{9,10})(?P<fraction>\.\d+)?' + END_PATTERN)}
+MIN_EPOCH = 946684800
+MAX_EPOCH = 4102444800
+
+
+class TimeStampDetector:
+    """This class describes the detection of time stamps"""
+    def __init__(self, sample_size=10000, min_fraction=0.01):
+        self.sample_size = sample_size  # Number of log lines from the beginning of the input that are used to learn the formats
+        self.min_fraction = min_fraction  # Minimum fraction of sample lines that must match a format
+        self.formats = []  # Names of the learned formats, ordered by the number of matching sample lines
+        self.formats_learned = False
+        self.last_format = None
+        self.last_key = None
+        self.last_epoch = None
+        # Syslog time stamps do not contain a year; the year of the detection is used instead. The last leap year is used for February 29
+        self.year = time.gmtime().tm_year
+        self.leap_year = self.year
+        while not calendar.isleap(self.leap_year):
+            self.leap_year -= 1
+
+    # This method learns the time stamp formats that occur in the sample lines
+    def learn(self, lines):
+        counts = {}
+        for line in lines:
+            for name, pattern in TIME_STAMP_FORMATS.items():
+                match = pattern.match(line)
+                if match is not None and self.get_epoch(name, match) is not None:
+                    counts[name] = counts.get(name, 0) + 1
+                    break
+        min_count = max(1, self.min_fraction * len(lines))
+        self.set_formats(sorted((name for name in counts if counts[name] >= min_count), key=lambda name: counts[name], reverse=True))
+
+    # This method sets formats that were learned before, e.g., in a previous run
+    def set_formats(self, formats):
+        self.formats = formats
+        self.formats_learned = True
+        if len(self.formats) > 0:
+            self.last_format = self.formats[0]
+
+    # This method returns the time stamp of a line as epoch value and the line without the time stamp. The time stamp is None if the
+    # line does not start with a time stamp of a learned format
+    def split(self, line):
+        if self.last_format is None:
+            return None, line
+        # Most lines have the same format as the previous line
+        match = TIME_STAMP_FORMATS[self.last_format].match(line)
+        if match is not None:
+            epoch = self.get_epoch(self.last_format, match)
+            if epoch is not None:
+                return epoch, line[match.end():]
+        for name in self.formats:
+            if name == self.last_format:
+                continue
+            match = TIME_STAMP_FORMATS[name].match(line)
+            if match is not None:
+                epoch = self.get_epoch(name, match)
+                if epoch is not None:
+                    self.last_format = name
+                    return epoch, line[match.end():]
+        return None, line
+
+    # This method converts a matching time stamp into seconds since the epoch or returns None if the time stamp is invalid. Consecutive
+    # lines often have time stamps of the same second, therefore the last conversion is reused
+    def get_epoch(self, name, match):
+        groups = match.groupdict()
+        fraction = groups.get('fraction')
+        if fraction is None:
+            fraction = 0.0
+        else:
+            fraction = float('0.' + fraction[1:])
+        if name == 'epoch':
+            epoch = int(groups['epoch'])
+            if epoch < MIN_EPOCH or epoch >= MAX_EPOCH:
+                return None
+            return epoch + fraction
+
+        key = (name, groups.get('year'), groups['month'], groups['day'], groups['hour'], groups['minute'], groups['second'],
+               groups.get('zone'))
+        if key == self.last_key:
+            return self.last_epoch + fraction
+
+        month = groups['month']
+        if month in MONTHS:
+            month = MONTHS[month]
+        year = groups.get('year')
+        if year is None:
+            year = self.year
+            if int(month) == 2 and int(groups['day']) == 29:
+                year = self.leap_year
+        try:
+            date = datetime(int(year), int(month), int(groups['day']), int(groups['hour']), int(groups['minute']), int(groups['second']))
+        except ValueError:
+            return None
+        epoch = calendar.timegm(date.timetuple())
+        zone = groups.get('zone')
+        if zone is not None and zone != 'Z':
+            zone = zone.replace(':', '')
+            offset = int(zone[1:3]) * 3600 + int(zone[3:5]) * 60
+            if zone[0] == '+':
+                epoch -= offset
+            else:
+                epoch += offset
+        self.last_key = key
+        self.last_epoch = epoch
+        return epoch + fraction
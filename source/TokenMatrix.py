@@ -0,0 +1,123 @@
+"""This class stores the words of the log lines in numpy arrays and counts the
+words of all nodes of a depth of the tree together, so that the log lines are
+not counted one by one.
+
+This program is free software: you can redistribute it and/or modify it under
+the terms of the GNU General Public License as published by the Free Software
+Foundation, either version 3 of the License, or (at your option) any later
+version.
+This program is distributed in the hope that it will be useful, but WITHOUT
+ANY WARRANTY; without even the implied warranty of MERCHANTABILITY or FITNESS
+FOR A PARTICULAR PURPOSE. See the GNU General Public License for more details.
+You should have received a copy of the GNU General Public License along with
+this program. If not, see <http://www.gnu.org/licenses/>.
+"""
+
+from array import array
+from collections import Counter
+try:
+    import numpy
+except ImportError:
+    numpy = None
+
+
+class TokenMatrix:
+    """This class describes the words of the log lines as numpy arrays"""
+    def __init__(self, words_list, occurrences, vocabulary_size, depth=0):
+        # The words of every log line are an array of unsigned integers
+        if numpy is None:
+            raise ImportError('The numpy engine requires numpy, install it with pip3 install numpy')
+        # The words of all log lines are stored one after another, the words of a log line start at its offset
+        self.lengths = numpy.fromiter((len(words) for words in words_list), dtype=numpy.int64, count=len(words_list))
+        self.offsets = numpy.zeros(len(words_list), dtype=numpy.int64)
+        numpy.cumsum(self.lengths[:-1], out=self.offsets[1:])
+        self.words = numpy.frombuffer(b''.join(words.tobytes() for words in words_list), dtype=numpy.uint32)
+        self.occurrences = numpy.asarray(occurrences)
+        # The occurrences are summed up as floats in the order of the log lines like by Node.count_words. Sums of integers are exact up to
+        # 2 ** 53 and converted back to integers
+        self.integer_occurrences = numpy.issubdtype(self.occurrences.dtype, numpy.integer)
+        self.vocabulary_size = max(vocabulary_size, 1)
+        self.start_depth = depth  # Depth of the first words of the log lines
+        # The log lines that pass over the nodes of the current depth and the number of the pair of a node and a word of the previous
+        # depth of every log line. At the beginning, all log lines pass over the root, which has the number 0
+        self.line_indices = numpy.arange(len(words_list), dtype=numpy.int64)
+        self.line_keys = numpy.zeros(len(words_list), dtype=numpy.int64)
+        self.depth = None
+        self.node_numbers = None
+        self.level = None
+
+    # This method counts the words at this depth of all nodes of the depth together. Every node is given by the numbers of the pairs of
+    # the previous depth, whose continuing log lines pass over the node. The pairs of this depth are sorted by the nodes and the words
+    # with a stable sort, therefore the first position of every pair is the first occurrence of the word at its node
+    def count_level(self, depth, node_keys_list):
+        self.depth = depth
+        node_numbers = numpy.full(int(self.line_keys.max()) + 1 if len(self.line_keys) > 0 else 1, -1, dtype=numpy.int64)
+        for node_number, node_keys in enumerate(node_keys_list):
+            if len(node_keys) > 0:
+                node_numbers[numpy.frombuffer(node_keys, dtype=numpy.uint32)] = node_number
+        self.node_numbers = node_numbers
+        line_indices = self.line_indices
+        line_nodes = node_numbers[self.line_keys]
+        lengths = self.lengths[line_indices]
+        # Log lines that end at the previous depth share the pairs with the continuing log lines, but do not pass to the children. Only
+        # empty log lines are counted at the root without a word
+        if depth == self.start_depth:
+            passing = line_nodes >= 0
+        else:
+            passing = (line_nodes >= 0) & (lengths > depth - self.start_depth)
+        line_indices = line_indices[passing]
+        line_nodes = line_nodes[passing]
+        lengths = lengths[passing]
+        occurrences = self.occurrences[line_indices]
+        line_counts = numpy.bincount(line_nodes, weights=occurrences, minlength=len(node_keys_list))
+        position = depth - self.start_depth
+        with_word = lengths > position
+        line_indices = line_indices[with_word]
+        line_nodes = line_nodes[with_word]
+        lengths = lengths[with_word]
+        occurrences = occurrences[with_word]
+        words = self.words[self.offsets[line_indices] + position].astype(numpy.int64)
+        keys, first_positions, line_keys = numpy.unique(line_nodes * self.vocabulary_size + words, return_index=True,
+                                                        return_inverse=True)
+        line_keys = line_keys.reshape(-1)
+        counts = numpy.bincount(line_keys, weights=occurrences, minlength=len(keys))
+        # The continuing lines are summed up separately, because the difference of sums of floats may differ from their sum
+        ending = lengths == position + 1
+        ending_counts = numpy.bincount(line_keys, weights=numpy.where(ending, occurrences, 0), minlength=len(keys))
+        continuing_counts = numpy.bincount(line_keys, weights=numpy.where(ending, 0, occurrences), minlength=len(keys))
+        if self.integer_occurrences:
+            line_counts = numpy.rint(line_counts).astype(numpy.int64)
+            counts = numpy.rint(counts).astype(numpy.int64)
+            ending_counts = numpy.rint(ending_counts).astype(numpy.int64)
+            continuing_counts = numpy.rint(continuing_counts).astype(numpy.int64)
+        key_nodes = keys // self.vocabulary_size
+        # The pairs of every node are ordered by the first occurrences of their words
+        order = numpy.lexsort((first_positions, key_nodes))
+        bounds = numpy.searchsorted(key_nodes[order], numpy.arange(len(node_keys_list) + 1))
+        self.level = (line_counts, order, bounds, keys % self.vocabulary_size, counts, ending_counts, continuing_counts)
+        self.line_indices = line_indices
+        self.line_keys = line_keys
+
+    # This method returns the word statistics of the node that is given by the numbers of the pairs of the previous depth like
+    # Node.count_words, except that the groups contain the numbers of the pairs of the node and the words at this depth. The words of
+    # the depth must have been counted by count_level
+    def count_words(self, depth, node_keys, delimiter_run_ids):
+        if depth != self.depth:
+            raise ValueError('The words of depth ' + str(depth) + ' were not counted')
+        line_counts, order, bounds, key_words, counts, ending_counts, continuing_counts = self.level
+        node_number = int(self.node_numbers[node_keys[0]])
+        pairs = order[bounds[node_number]:bounds[node_number + 1]]
+        words = key_words[pairs].tolist()
+        counter = Counter(dict(zip(words, counts[pairs].tolist())))
+        ending_counter = Counter()
+        continuing_counter = Counter()
+        groups = {}
+        for word, pair, ending_lines, continuing_lines in zip(words, pairs.tolist(), ending_counts[pairs].tolist(),
+                                                             continuing_counts[pairs].tolist()):
+            if ending_lines > 0:
+                ending_counter[word] = ending_lines
+            if continuing_lines > 0:
+                continuing_counter[word] = continuing_lines
+                groups[word] = array('I', [pair])
+        delimiter_flag = not delimiter_run_ids.isdisjoint(words)
+        return counter, ending_counter, continuing_counter, groups, line_counts[node_number].item(), delimiter_flag
@@ -0,0 +1,41 @@
+"""This class splits log lines into words. The delimiters are compiled once
+into a regular expression, so that the splitting is done at C speed.
+
+This program is free software: you can redistribute it and/or modify it under
+the terms of the GNU General Public License as published by the Free Software
+Foundation, either version 3 of the License, or (at your option) any later
+version.
+This program is distributed in the hope that it will be useful, but WITHOUT
+ANY WARRANTY; without even the implied warranty of MERCHANTABILITY or FITNESS
+FOR A PARTICULAR PURPOSE. See the GNU General Public License for more details.
+You should have received a copy of the GNU General Public License along with
+this program. If not, see <http://www.gnu.org/licenses/>.
+"""
+
+import re
+
+
+class Tokenizer:
+    """This class describes the tokenizer for log lines"""
+    def __init__(self, delimiters, collapse_delimiters=False):
+        self.delimiters = delimiters
+        # If True, consecutive delimiters form one word. Otherwise every delimiter is a word of its own and build_tree combines
+        # consecutive delimiters when it reaches them
+        self.collapse_delimiters = collapse_delimiters
+        if len(delimiters) == 0:
+            self.pattern = None
+        else:
+            # All characters between two delimiters form one word
+            delimiter_class = ''.join(re.escape(delimiter) for delimiter in delimiters)
+            if collapse_delimiters:
+                self.pattern = re.compile('[' + delimiter_class + ']+|[^' + delimiter_class + ']+')
+            else:
+                self.pattern = re.compile('[' + delimiter_class + ']|[^' + delimiter_class + ']+')
+
+    # This method splits a line at the delimiters, but makes the delimiters also words
+    def tokenize(self, line):
+        if self.pattern is None:
+            if line == '':
+                return []
+            return [line]
+        return self.pattern.findall(line)
@@ -0,0 +1,126 @@
+"""This class stores the refined tree in a versioned binary snapshot and loads
+it again, so that the output files can be written without building the tree
+from the log lines.
+
+This program is free software: you can redistribute it and/or modify it under
+the terms of the GNU General Public License as published by the Free Software
+Foundation, either version 3 of the License, or (at your option) any later
+version.
+This program is distributed in the hope that it will be useful, but WITHOUT
+ANY WARRANTY; without even the implied warranty of MERCHANTABILITY or FITNESS
+FOR A PARTICULAR PURPOSE. See the GNU General Public License for more details.
+You should have received a copy of the GNU General Public License along with
+this program. If not, see <http://www.gnu.org/licenses/>.
+"""
+
+import pickle
+import struct
+
+from source import Node
+
+SNAPSHOT_MAGIC = b'AECIDPGS'
+SNAPSHOT_VERSION = 1
+# Number of nodes that are pickled at once. The nodes are written and read in chunks, so that the memory needed for the pickled data
+# does not grow with the size of the tree
+CHUNK_SIZE = 10000
+
+
+class TreeSnapshot:
+    """This class describes a snapshot of a tree"""
+    def __init__(self, root=None, subtree_list=None, delimiters=None):
+        self.root = root
+        self.subtree_list = subtree_list  # Lists of the roots of equal subtrees, which are written as subtrees of the parser
+        self.delimiters = delimiters  # Delimiters that were used to build the tree, which are needed to write the parser
+
+    # This method stores the tree in a file. Every node is stored as a record with the indices of its children and its parent, so that
+    # neither storing nor loading recurses over the depth of the tree
+    def save(self, file_name):
+        if self.subtree_list is None:
+            self.subtree_list = []
+        nodes, indices = self.get_nodes()
+        datatypes = {}
+        with open(file_name, 'wb') as f:
+            f.write(SNAPSHOT_MAGIC + struct.pack('<I', SNAPSHOT_VERSION))
+            pickle.dump({'delimiters': self.delimiters, 'nodes': len(nodes)}, f, pickle.HIGHEST_PROTOCOL)
+            for start in range(0, len(nodes), CHUNK_SIZE):
+                records = []
+                for node in nodes[start:start + CHUNK_SIZE]:
+                    # Equal datatypes are stored only once per chunk
+                    datatype = datatypes.setdefault(tuple(node.datatype), tuple(node.datatype))
+                    records.append(([indices[id(child)] for child in node.children], indices.get(id(node.parent), -1), node.element,
+                                    node.is_list, node.is_variable, datatype, node.datetime_format, node.occurrence, node.end,
+                                    node.ending_lines, node.theta1))
+                pickle.dump(records, f, pickle.HIGHEST_PROTOCOL)
+            pickle.dump({'optional_node_pairs': encode_nodes(self.root.optional_node_pairs, indices),
+                         'merge_tuple': encode_nodes(self.root.merge_tuple, indices),
+                         'subtree_list': encode_nodes(self.subtree_list, indices)}, f, pickle.HIGHEST_PROTOCOL)
+
+    # This method returns the nodes of the tree in preorder and the positions of the nodes in this list. The nodes that are referenced
+    # by the optional node pairs, the merge tuples and the subtree list are also stored
+    def get_nodes(self):
+        nodes = []
+        indices = {}
+        start_nodes = [self.root]
+        for references in [self.root.optional_node_pairs, self.root.merge_tuple, self.subtree_list]:
+            for reference in references:
+                start_nodes.extend(reference)
+        stack = list(reversed(start_nodes))
+        while len(stack) > 0:
+            node = stack.pop()
+            if node is None or id(node) in indices:
+                continue
+            indices[id(node)] = len(nodes)
+            nodes.append(node)
+            stack.extend(reversed(node.children))
+        return nodes, indices
+
+    # This method loads the tree from a file
+    def load(self, file_name):
+        with open(file_name, 'rb') as f:
+            magic = f.read(len(SNAPSHOT_MAGIC))
+            if magic != SNAPSHOT_MAGIC:
+                raise ValueError(str(file_name) + ' is not a tree snapshot')
+            version = struct.unpack('<I', f.read(4))[0]
+            if version != SNAPSHOT_VERSION:
+                raise ValueError('The tree snapshot ' + str(file_name) + ' has version ' + str(version) + ', expected ' + str(
+                    SNAPSHOT_VERSION))
+            header = pickle.load(f)
+            self.delimiters = header['delimiters']
+            optional_node_pairs = []
+            merge_tuple = []
+            nodes = []
+            links = []
+            while len(nodes) < header['nodes']:
+                for children, parent, element, is_list, is_variable, datatype, datetime_format, occurrence, end, ending_lines, \
+                        theta1 in pickle.load(f):
+                    node = Node.Node(optional_node_pairs, merge_tuple)
+                    node.element = element
+                    node.is_list = is_list
+                    node.is_variable = is_variable
+                    node.datatype = list(datatype)
+                    node.datetime_format = datetime_format
+                    node.occurrence = occurrence
+                    node.end = end
+                    node.ending_lines = ending_lines
+                    node.theta1 = theta1
+                    nodes.append(node)
+                    links.append((children, parent))
+            references = pickle.load(f)
+        for node, (children, parent) in zip(nodes, links):
+            node.children = [nodes[child] for child in children]
+            if parent != -1:
+                node.parent = nodes[parent]
+        optional_node_pairs.extend(decode_nodes(references['optional_node_pairs'], nodes))
+        merge_tuple.extend(decode_nodes(references['merge_tuple'], nodes))
+        self.subtree_list = decode_nodes(references['subtree_list'], nodes)
+        self.root = nodes[0]
+
+
+# This function replaces the nodes in a list of lists of nodes by their indices
+def encode_nodes(lists, indices):
+    return [[indices.get(id(node), -1) for node in nodes] for nodes in lists]
+
+
+# This function replaces the indices in a list of lists of indices by the nodes
+def decode_nodes(lists, nodes):
+    return [[nodes[index] if index != -1 else None for index in indices] for indices in lists]
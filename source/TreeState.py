@@ -0,0 +1,57 @@
+"""This class stores the tree created by build_tree together with the log
+lines and the vocabulary, so that new log lines can be inserted into the tree
+later instead of building the tree from all log lines again.
+
+This program is free software: you can redistribute it and/or modify it under
+the terms of the GNU General Public License as published by the Free Software
+Foundation, either version 3 of the License, or (at your option) any later
+version.
+This program is distributed in the hope that it will be useful, but WITHOUT
+ANY WARRANTY; without even the implied warranty of MERCHANTABILITY or FITNESS
+FOR A PARTICULAR PURPOSE. See the GNU General Public License for more details.
+You should have received a copy of the GNU General Public License along with
+this program. If not, see <http://www.gnu.org/licenses/>.
+"""
+
+import pickle
+
+from source import LogLine, Node, Vocabulary
+
+TREE_STATE_VERSION = 1
+
+
+class TreeState:
+    """This class describes the stored state of a tree"""
+    def __init__(self, root=None, log_lines=None, vocabulary=None, parameters=None):
+        self.root = root  # Root of the tree before the tree is refined, the nodes must contain their word statistics
+        self.log_lines = log_lines  # Unique log lines in the order of their first occurrence
+        self.vocabulary = vocabulary
+        self.parameters = parameters  # Parameters of build_tree, new log lines can only be inserted with the same parameters
+
+    # This method stores the state in a file. The nodes are stored as flat list, so that the depth of the tree is not limited by the
+    # recursion limit of pickle
+    def save(self, file_name):
+        data = {'version': TREE_STATE_VERSION, 'parameters': self.parameters, 'tokens': self.vocabulary.tokens,
+                'root': (self.root.occurrence, self.root.theta1, self.root.statistics), 'nodes': self.root.get_descendants(),
+                'log_lines': [(log_line.line_id, log_line.words, log_line.occurrence) for log_line in self.log_lines]}
+        with open(file_name, 'wb') as f:
+            pickle.dump(data, f, pickle.HIGHEST_PROTOCOL)
+
+    # This method loads the state from a file
+    def load(self, file_name):
+        with open(file_name, 'rb') as f:
+            data = pickle.load(f)
+        if data.get('version') != TREE_STATE_VERSION:
+            raise ValueError('The tree state in ' + str(file_name) + ' has version ' + str(data.get('version')) + ', expected ' + str(
+                TREE_STATE_VERSION))
+        self.parameters = data['parameters']
+        self.vocabulary = Vocabulary.Vocabulary()
+        self.vocabulary.get_ids(data['tokens'])
+        self.root = Node.Node()
+        self.root.occurrence, self.root.theta1, self.root.statistics = data['root']
+        self.root.add_descendants(data['nodes'])
+        self.log_lines = []
+        for line_id, words, occurrence in data['log_lines']:
+            log_line = LogLine.LogLine(line_id, None, None, words)
+            log_line.occurrence = occurrence
+            self.log_lines.append(log_line)
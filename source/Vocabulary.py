@@ -0,0 +1,51 @@
+"""This class assigns a small integer id to every distinct word. Log lines
+store their words as compact arrays of these ids.
+
+This program is free software: you can redistribute it and/or modify it under
+the terms of the GNU General Public License as published by the Free Software
+Foundation, either version 3 of the License, or (at your option) any later
+version.
+This program is distributed in the hope that it will be useful, but WITHOUT
+ANY WARRANTY; without even the implied warranty of MERCHANTABILITY or FITNESS
+FOR A PARTICULAR PURPOSE. See the GNU General Public License for more details.
+You should have received a copy of the GNU General Public License along with
+this program. If not, see <http://www.gnu.org/licenses/>.
+"""
+
+from array import array
+
+
+class Vocabulary:
+    """This class describes the vocabulary of all words"""
+    def __init__(self):
+        self.ids = {}
+        self.tokens = []
+
+    # This method returns the id of a word and adds the word to the vocabulary if it does not exist yet
+    def get_id(self, token):
+        token_id = self.ids.get(token)
+        if token_id is None:
+            token_id = len(self.tokens)
+            self.ids[token] = token_id
+            self.tokens.append(token)
+        return token_id
+
+    # This method returns the ids of a list of words as an array
+    def get_ids(self, tokens):
+        ids = self.ids
+        try:
+            return array('I', [ids[token] for token in tokens])
+        except KeyError:
+            return array('I', [self.get_id(token) for token in tokens])
+
+    # This method returns the word of an id
+    def get_token(self, token_id):
+        return self.tokens[token_id]
+
+    # This method returns the words of a list of ids
+    def get_tokens(self, token_ids):
+        tokens = self.tokens
+        return [tokens[token_id] for token_id in token_ids]
+
+    def __len__(self):
+        return len(self.tokens)
@@ -0,0 +1,63 @@
+"""This class caches the word statistics of the nodes of the tree, so that
+trees that are built with other thresholds from the same log lines do not
+count the words of the log lines again.
+
+This program is free software: you can redistribute it and/or modify it under
+the terms of the GNU General Public License as published by the Free Software
+Foundation, either version 3 of the License, or (at your option) any later
+version.
+This program is distributed in the hope that it will be useful, but WITHOUT
+ANY WARRANTY; without even the implied warranty of MERCHANTABILITY or FITNESS
+FOR A PARTICULAR PURPOSE. See the GNU General Public License for more details.
+You should have received a copy of the GNU General Public License along with
+this program. If not, see <http://www.gnu.org/licenses/>.
+"""
+
+from collections import OrderedDict
+import hashlib
+
+
+class WordCountCache:
+    """This class describes the cache of the word statistics"""
+    def __init__(self, max_lines=10000000):
+        # Maximum number of line indices in the groups of all cached statistics; the least recently used statistics are removed first
+        self.max_lines = max_lines
+        # The word statistics of a node only depend on the depth and the log lines that pass over the node, but not on the thresholds
+        self.cache = OrderedDict()
+        self.lines = 0
+        self.hits = 0
+        self.misses = 0
+
+    # This method returns the key of the log lines with the given indices at a depth
+    def get_key(self, depth, line_indices):
+        return depth, len(line_indices), hashlib.blake2b(line_indices.tobytes(), digest_size=16).digest()
+
+    # This method returns the cached word statistics of the log lines with the given indices at a depth or None
+    def get(self, depth, line_indices):
+        key = self.get_key(depth, line_indices)
+        entry = self.cache.get(key)
+        if entry is None:
+            self.misses += 1
+            return None
+        self.hits += 1
+        self.cache.move_to_end(key)
+        return entry[1]
+
+    # This method adds the word statistics of the log lines with the given indices at a depth. The statistics must not be changed after
+    # they were added, because they are returned to all nodes with the same log lines
+    def add(self, depth, line_indices, statistics):
+        lines = sum(len(group) for group in statistics[3].values())
+        if lines > self.max_lines:
+            return
+        key = self.get_key(depth, line_indices)
+        if key in self.cache:
+            return
+        self.cache[key] = (lines, statistics)
+        self.lines += lines
+        while self.lines > self.max_lines:
+            _, (removed_lines, _) = self.cache.popitem(last=False)
+            self.lines -= removed_lines
+
+    # This method returns a string with the number of cache hits and misses
+    def get_statistics(self):
+        return 'Word count cache: ' + str(len(self.cache)) + ' nodes, ' + str(self.hits) + ' hits, ' + str(self.misses) + ' misses'
@@ -0,0 +1,326 @@
+from array import array
+from multiprocessing.connection import Listener
+import os
+import threading
+import unittest
+import random
+
+from source import CardinalitySketch, LogLine, Node, ShardCoordinator, ShardWorker, TokenMatrix, Tokenizer, TreeState, Vocabulary
+
+
+class BuildTreeTest(unittest.TestCase):
+    """The goal of this test class is to test if different representations of the log lines result in the same parser tree."""
+
+    delimiters = [' ', '=']
+    parameters = [(0.1, 0.9, 0.9, 0.0001, 0.0001, 0.001, 0.0, [], []), (0.05, 0.99, 0.1, 0.0001, 0.0001, 0.001, 0.1, [], []),
+                  (0.1, 0.99, 0.5, 0.0001, 0.0001, 0.001, 0.1, [2], []), (0.3, 0.8, 0.5, 0.01, 0.05, 0.1, 0.5, [], [4])]
+
+    def test1deduplicated_log_lines(self):
+        """This unittest checks if the tree built from unique log lines with occurrences is equal to the tree built from all lines."""
+        lines = self.generate_lines(2000)
+        for parameters in self.parameters:
+            self.assertEqual(self.build_tree(lines, parameters, False), self.build_tree(lines, parameters, True))
+
+    def test2count_lines(self):
+        """This unittest checks if counting all log lines in the tree results in the occurrences computed by build_tree, also if the depth
+        of the tree exceeds the recursion limit."""
+        lines = self.generate_lines(2000)
+        deep_lines = [' '.join('key%d=%d' % (j, (i + j) % 3) for j in range(1000)) for i in range(30)]
+        tokenizer = Tokenizer.Tokenizer(self.delimiters)
+        for parameters, log_lines in [(parameters, lines) for parameters in self.parameters] + [(self.parameters[0], deep_lines)]:
+            root = self.build_tree(log_lines, parameters, True, False)
+            expected_counts = self.get_counts(root)
+            root.reset_counts()
+            for line in log_lines:
+                root.count_line(tokenizer.tokenize(line), set(self.delimiters))
+            self.assertEqual(expected_counts, self.get_counts(root))
+        self.assertFalse(root.count_line(tokenizer.tokenize('unknown line'), set(self.delimiters)))
+
+    def test3build_order(self):
+        """This unittest checks if building the tree breadth first results in the same tree as building it depth first."""
+        lines = self.generate_lines(2000)
+        for parameters in self.parameters:
+            self.assertEqual(self.build_tree(lines, parameters, True), self.build_tree(lines, parameters, True, order='bfs'))
+
+    def test4deep_tree(self):
+        """This unittest checks if the depth of the tree is not limited by the recursion limit."""
+        lines = [' '.join('key%d=%d' % (j, (i + j) % 3) for j in range(1000)) for i in range(30)]
+        root = self.build_tree(lines, self.parameters[0], True, False)
+        depth = 0
+        node = root
+        while len(node.children) > 0:
+            node = node.children[0]
+            depth += 1
+        self.assertEqual(3999, depth)
+
+    def test5parallel_build(self):
+        """This unittest checks if building subtrees in worker processes results in the same tree as building it in one process."""
+        lines = self.generate_lines(2000)
+        for parameters in self.parameters:
+            self.assertEqual(self.build_tree(lines, parameters, False), self.build_tree(lines, parameters, False, processes=3))
+
+    def test6collapsed_delimiters(self):
+        """This unittest checks if the tree built from words with combined delimiters is equal to the tree that combines the delimiters
+        while it is built, and that the words are not changed."""
+        lines = self.generate_lines(2000)
+        for parameters in self.parameters:
+            self.assertEqual(self.build_tree(lines, parameters, True),
+                             self.build_tree(lines, parameters, True, collapse_delimiters=True))
+        for collapse_delimiters in [False, True]:
+            tokenizer = Tokenizer.Tokenizer(self.delimiters, collapse_delimiters)
+            vocabulary = Vocabulary.Vocabulary()
+            log_line_dict = {}
+            for line_id, line in enumerate(lines):
+                log_line_dict[line_id + 1] = LogLine.LogLine(line_id, '', line, vocabulary.get_ids(tokenizer.tokenize(line)))
+            words_list = [log_line.words[:] for log_line in log_line_dict.values()]
+            for processes in [1, 2]:
+                root = Node.Node()
+                root.occurrence = len(lines)
+                root.build_tree(0, log_line_dict, self.delimiters, *self.parameters[0], vocabulary, processes=processes,
+                                min_subtree_lines=50)
+                self.assertEqual(words_list, [log_line.words for log_line in log_line_dict.values()])
+
+    def test7update_tree(self):
+        """This unittest checks if inserting log lines into a stored tree results in the same tree as building it from all lines."""
+        lines = self.generate_lines(2000) + ['new kind of line %d' % (i % 10) for i in range(300)]
+        new_lines = lines[1000:]
+        random.shuffle(new_lines)
+        lines[1000:] = new_lines
+        for parameters in self.parameters:
+            for collapse_delimiters in [False, True]:
+                expected = self.build_tree(lines, parameters, True, collapse_delimiters=collapse_delimiters)
+                for split in [100, 1000, 2100]:
+                    self.assertEqual(expected, self.update_tree(lines[:split], lines[split:], parameters, collapse_delimiters))
+
+    def test8bounded_word_counts(self):
+        """This unittest checks if counting only the frequent words exactly results in the same tree as counting all words exactly."""
+        lines = self.generate_lines(2000) + ['request id=%d' % i for i in range(500)]
+        for parameters in self.parameters:
+            for collapse_delimiters in [False, True]:
+                expected = self.build_tree(lines, parameters, True, collapse_delimiters=collapse_delimiters)
+                for max_exact_words in [1, 5]:
+                    Node.Node.max_exact_words = max_exact_words
+                    try:
+                        self.assertEqual(expected, self.build_tree(lines, parameters, True, collapse_delimiters=collapse_delimiters))
+                    finally:
+                        Node.Node.max_exact_words = 0
+
+    def test9prefix_trie(self):
+        """This unittest checks if the tree built from the word counts of a prefix trie is equal to the tree built from the log lines."""
+        lines = self.generate_lines(2000) + ['request id=%d' % i for i in range(500)] + ['', 'status', 'status  ']
+        for parameters in self.parameters:
+            for collapse_delimiters in [False, True]:
+                for deduplicate in [False, True]:
+                    expected = self.build_tree(lines, parameters, deduplicate, collapse_delimiters=collapse_delimiters)
+                    self.assertEqual(expected, self.build_tree(lines, parameters, deduplicate, collapse_delimiters=collapse_delimiters,
+                                                               engine='trie'))
+            self.assertEqual(self.build_tree(lines, parameters, True), self.build_tree(lines, parameters, True, order='bfs', engine='trie'))
+        self.assertRaises(ValueError, self.build_tree, lines, self.parameters[0], True, processes=2, engine='trie')
+
+    def test10sorted_log_lines(self):
+        """This unittest checks if the tree built from log lines that are sorted on disk is equal to the tree built from the log lines in
+        memory, also if the lines are sorted in many runs."""
+        lines = self.generate_lines(2000) + ['request id=%d' % i for i in range(500)] + ['', 'status', 'status  ']
+        for parameters in self.parameters:
+            for collapse_delimiters in [False, True]:
+                expected = self.build_tree(lines, parameters, True, collapse_delimiters=collapse_delimiters)
+                for max_memory in [268435456, 5000]:
+                    self.assertEqual(expected, self.build_tree(lines, parameters, False, collapse_delimiters=collapse_delimiters,
+                                                               max_memory=max_memory))
+        self.assertEqual(self.build_tree([], self.parameters[0], True), self.build_tree([], self.parameters[0], True, max_memory=5000))
+
+    @unittest.skipIf(TokenMatrix.numpy is None, 'numpy is not installed')
+    def test11numpy_engine(self):
+        """This unittest checks if the tree built by counting all nodes of a depth together with numpy is equal to the tree built from the
+        log lines one by one, also for fractional occurrences of sampled log lines and for deep trees."""
+        lines = self.generate_lines(2000) + ['request id=%d' % i for i in range(500)] + ['', 'status', 'status  ']
+        for parameters in self.parameters:
+            for collapse_delimiters in [False, True]:
+                for deduplicate in [False, True]:
+                    expected = self.build_tree(lines, parameters, deduplicate, collapse_delimiters=collapse_delimiters)
+                    self.assertEqual(expected, self.build_tree(lines, parameters, deduplicate, collapse_delimiters=collapse_delimiters,
+                                                               engine='numpy'))
+            self.assertEqual(self.build_tree(lines, parameters, True, occurrence=0.1),
+                             self.build_tree(lines, parameters, True, engine='numpy', occurrence=0.1))
+        lines = [' '.join('key%d=%d' % (j, (i + j) % 3) for j in range(100)) for i in range(30)]
+        self.assertEqual(self.build_tree(lines, self.parameters[0], True), self.build_tree(lines, self.parameters[0], True, engine='numpy'))
+        self.assertEqual(self.build_tree([], self.parameters[0], True), self.build_tree([], self.parameters[0], True, engine='numpy'))
+
+    def test12sharded_build(self):
+        """This unittest checks if the tree built from the merged word counts of local and remote shard workers is equal to the tree built
+        in a single process, also if the workers build whole subtrees or the whole tree."""
+        lines = self.generate_lines(2000) + ['request id=%d' % i for i in range(500)] + ['', 'status', 'status  ']
+        for prefix_words in [0, 1, 2]:
+            shards = ShardCoordinator.ShardCoordinator(processes=3, prefix_words=prefix_words, batch_lines=100)
+            try:
+                for parameters in self.parameters:
+                    for collapse_delimiters in [False, True]:
+                        expected = self.build_tree(lines, parameters, True, collapse_delimiters=collapse_delimiters)
+                        self.assertEqual(expected, self.build_tree(lines, parameters, True, collapse_delimiters=collapse_delimiters,
+                                                                   engine='shards', shards=shards))
+            finally:
+                shards.close()
+        # The remote workers are served by threads that listen on localhost
+        listeners = [Listener(('127.0.0.1', 0), authkey=b'test') for _ in range(2)]
+        threads = [threading.Thread(target=ShardWorker.serve, args=(listener, 2)) for listener in listeners]
+        for thread in threads:
+            thread.start()
+        addresses = ['%s:%d' % listener.address for listener in listeners]
+        try:
+            for parameters in self.parameters[:2]:
+                shards = ShardCoordinator.ShardCoordinator(addresses=addresses, authkey='test', prefix_words=1)
+                try:
+                    self.assertEqual(self.build_tree(lines, parameters, False), self.build_tree(lines, parameters, False, engine='shards',
+                                                                                                   shards=shards))
+                finally:
+                    shards.close()
+        finally:
+            for thread in threads:
+                thread.join()
+            for listener in listeners:
+                listener.close()
+        self.assertRaises(ValueError, self.build_tree, lines, self.parameters[0], True, engine='shards')
+        self.assertRaises(ValueError, ShardCoordinator.ShardCoordinator, addresses=addresses)
+
+    def test13early_variable(self):
+        """This unittest checks if the words of a node where no word can exceed theta1 are aggregated after the first pass of the bounded
+        counting, if the datatypes of the aggregated words are the datatypes of all words and if the distinct words are estimated."""
+        vocabulary = Vocabulary.Vocabulary()
+        log_lines = [LogLine.LogLine(i, None, None, vocabulary.get_ids(['id', str(i)] + ['=', 'x'] * (i % 2))) for i in range(5000)]
+        Node.Node.max_exact_words = 10
+        try:
+            for last_word, datatype in [('5000', ['string', 'integer', 'float']), ('abc', ['string'])]:
+                log_lines[-1].words = vocabulary.get_ids(['id', last_word, '=', 'x'])
+                word_counts, other_words = Node.Node().count_frequent_words(1, array('I', range(5000)), log_lines, set(), set(),
+                                                                              vocabulary, 0.1)
+                counter, ending_counter, continuing_counter, groups, line_count, delimiter_flag = word_counts
+                self.assertEqual(({Node.OTHER_WORDS: 5000}, {Node.OTHER_WORDS: 2500}, {Node.OTHER_WORDS: 2500}, 5000),
+                                 (counter, ending_counter, continuing_counter, line_count))
+                self.assertEqual(list(range(1, 5000, 2)), list(groups[Node.OTHER_WORDS]))
+                self.assertEqual('0', vocabulary.get_token(other_words.first_word))
+                node = Node.Node()
+                node.determine_datatype([], other_words)
+                self.assertEqual(datatype, node.datatype)
+        finally:
+            Node.Node.max_exact_words = 0
+            Node.Node.datatype_classifier = None
+        cardinality_sketch = CardinalitySketch.CardinalitySketch()
+        for word in range(100000):
+            cardinality_sketch.add(word % 500)
+        self.assertEqual(500, cardinality_sketch.estimate())
+        self.assertTrue(cardinality_sketch.is_exact())
+        for word in range(100000):
+            cardinality_sketch.add(word)
+        self.assertAlmostEqual(1, cardinality_sketch.estimate() / 100000, delta=0.1)
+        self.assertFalse(cardinality_sketch.is_exact())
+
+    def test14frequent_word_among_distinct_words(self):
+        """This unittest checks if a word that exceeds theta1 only slightly among many distinct words is counted exactly instead of being
+        aggregated as OTHER_WORDS when the number of distinct words is only estimated and if the tree is the same as with exact counting."""
+        for parameters in self.parameters:
+            frequent_lines = int(parameters[0] * 5000) + 1
+            lines = ['id %d' % i for i in range(5000 - frequent_lines)]
+            for i in range(frequent_lines):
+                lines.insert(i * len(lines) // frequent_lines + i, 'id frequent')
+            vocabulary = Vocabulary.Vocabulary()
+            log_lines = [LogLine.LogLine(i, None, line, vocabulary.get_ids(line.split(' '))) for i, line in enumerate(lines)]
+            expected = self.build_tree(lines, parameters, True)
+            Node.Node.max_exact_words = 1
+            try:
+                word_counts, other_words = Node.Node().count_frequent_words(1, array('I', range(5000)), log_lines, set(), set(),
+                                                                              vocabulary, parameters[0])
+                self.assertEqual({vocabulary.get_id('frequent'): frequent_lines, Node.OTHER_WORDS: 5000 - frequent_lines}, word_counts[0])
+                self.assertEqual(expected, self.build_tree(lines, parameters, True))
+            finally:
+                Node.Node.max_exact_words = 0
+                Node.Node.datatype_classifier = None
+
+    def update_tree(self, lines, new_lines, parameters, collapse_delimiters):
+        state_file_name = 'unit/out/tree_state'
+        Node.Node.keep_statistics = True
+        try:
+            tokenizer = Tokenizer.Tokenizer(self.delimiters, collapse_delimiters)
+            vocabulary = Vocabulary.Vocabulary()
+            root = self.build_tree(lines, parameters, True, False, collapse_delimiters=collapse_delimiters, vocabulary=vocabulary)
+            log_lines = self.log_lines
+            TreeState.TreeState(root, log_lines, vocabulary, parameters).save(state_file_name)
+            tree_state = TreeState.TreeState()
+            tree_state.load(state_file_name)
+            root, log_lines, vocabulary = tree_state.root, tree_state.log_lines, tree_state.vocabulary
+            unique_log_lines = {log_line.words.tobytes(): log_line for log_line in log_lines}
+            new_log_lines = {}
+            for line in new_lines:
+                words = vocabulary.get_ids(tokenizer.tokenize(line)).tobytes()
+                if words in unique_log_lines:
+                    unique_log_lines[words].occurrence += 1
+                if words in new_log_lines:
+                    new_log_lines[words].occurrence += 1
+                    continue
+                new_log_lines[words] = LogLine.LogLine(len(log_lines), '', line, vocabulary.get_ids(tokenizer.tokenize(line)))
+                if words not in unique_log_lines:
+                    log_lines.append(new_log_lines[words])
+            root.occurrence += len(new_lines)
+            root.update_tree(0, list(new_log_lines.values()), log_lines, self.delimiters, *parameters, vocabulary)
+            return root.to_string(0)
+        finally:
+            Node.Node.keep_statistics = False
+            if os.path.exists(state_file_name):
+                os.remove(state_file_name)
+
+    def build_tree(self, lines, parameters, deduplicate, to_string=True, order='dfs', processes=1, collapse_delimiters=False,
+                   vocabulary=None, engine='lines', max_memory=None, occurrence=1, shards=None):
+        tokenizer = Tokenizer.Tokenizer(self.delimiters, collapse_delimiters)
+        if vocabulary is None:
+            vocabulary = Vocabulary.Vocabulary()
+        log_line_dict = {}
+        unique_log_lines = {}
+        for line_id, line in enumerate(lines):
+            log_line = LogLine.LogLine(line_id, '', line, vocabulary.get_ids(tokenizer.tokenize(line)))
+            log_line.occurrence = occurrence
+            if deduplicate and line in unique_log_lines:
+                unique_log_lines[line].occurrence += occurrence
+                continue
+            unique_log_lines[line] = log_line
+            log_line_dict[line_id + 1] = log_line
+        root = Node.Node()
+        root.occurrence = len(lines)
+        self.log_lines = list(log_line_dict.values())
+        if max_memory is None:
+            root.build_tree(0, log_line_dict, self.delimiters, *parameters, vocabulary, order, processes, 50, engine, shards=shards)
+        else:
+            line_sorter = Node.sort_log_lines(log_line_dict.values(), self.delimiters, vocabulary, 'unit/out', max_memory)
+            try:
+                root.build_tree(0, line_sorter, self.delimiters, *parameters, vocabulary, order)
+            finally:
+                line_sorter.close()
+        if to_string:
+            return root.to_string(0)
+        return root
+
+    def get_counts(self, node):
+        counts = []
+        stack = [node]
+        while len(stack) > 0:
+            node = stack.pop()
+            counts.append((node.element, node.occurrence, node.ending_lines))
+            stack.extend(reversed(node.children))
+        return counts
+
+    def generate_lines(self, count):
+        random.seed(count)
+        lines = []
+        for i in range(count):
+            r = random.randint(0, 3)
+            if r == 0:
+                lines.append('user=%s action=%s' % (random.choice(['root', 'www-data', 'admin']), random.choice(['login', 'logout'])))
+            elif r == 1:
+                lines.append('connection from 10.0.0.%d port %d' % (random.randint(1, 5), random.randint(1000, 1010)))
+            elif r == 2:
+                lines.append('status  %s  %s' % (random.choice(['ok', 'failed', 'unknown']), random.choice(['', 'retry', '1', '2'])))
+            else:
+                lines.append('msg=%s' % ''.join(random.choice('abc') for _ in range(random.randint(1, 4))))
+        return lines
+
+
+if __name__ == "__main__":
+    unittest.main()
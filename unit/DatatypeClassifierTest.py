@@ -0,0 +1,93 @@
+import os
+import random
+import unittest
+
+from source import DatatypeClassifier, Node
+
+
+class DatatypeClassifierTest(unittest.TestCase):
+    """The goal of this test class is to test if the cached datatypes are equal to the datatypes of the words."""
+
+    cache_file_name = 'unit/out/datatypes.json'
+    words = ['1', '-12', '1.5', '0x1f', 'ff', '10.0.0.1', '::1', '2020-03-02', '12:30:00', 'abc', '', '1.2.3', '.', '-']
+
+    def tearDown(self):
+        if os.path.exists(self.cache_file_name):
+            os.remove(self.cache_file_name)
+
+    def test1filter_datatypes(self):
+        """This unittest checks if the cached datatypes are equal to checking every datatype for every word."""
+        random.seed(1)
+        datatype_classifier = DatatypeClassifier.DatatypeClassifier(max_size=5)
+        for _ in range(300):
+            datatype = ['string'] + random.sample(['integer', 'float', 'hex', 'datetime', 'ipaddress'], random.randint(0, 5))
+            words = random.sample(self.words, random.randint(1, 4))
+            expected = list(datatype)
+            for word in words:
+                for typ in DatatypeClassifier.DATATYPES:
+                    if typ in expected and not datatype_classifier.checks[typ](word):
+                        expected.remove(typ)
+            self.assertEqual(expected, datatype_classifier.filter_datatypes(datatype, words))
+        self.assertLessEqual(len(datatype_classifier.cache), 5)
+
+    def test2classify_batch(self):
+        """This unittest checks if the datatypes of the batch classification are equal to the datatypes of the checks for every word."""
+        random.seed(2)
+        alphabet = '0123456789abcdefxX.:-+_=/ \tAZ\xe4\r'
+        words = list(self.words) + ['+1f', ' 0x_1f', '0x', '1__f', '01.2.3.4', '255.255.255.255', '256.1.1.1', 'fe80::1%eth0', 'abcd',
+                                    'abc', 'ab==', 'abc=', 'a===', '====', '!!!!', 'YWJj\xe4', '1\u0663']
+        for _ in range(2000):
+            words.append(''.join(random.choice(alphabet) for _ in range(random.randint(0, 8))))
+        datatype_classifier = DatatypeClassifier.DatatypeClassifier()
+        candidates = sum(DatatypeClassifier.DATATYPE_BITS.values())
+        masks = datatype_classifier.classify_batch(words, candidates)
+        for word, mask in zip(words, masks):
+            for typ in DatatypeClassifier.DATATYPES:
+                self.assertEqual(datatype_classifier.checks[typ](word), bool(mask & DatatypeClassifier.DATATYPE_BITS[typ]), (word, typ))
+
+    def test3least_recently_used(self):
+        """This unittest checks if the least recently used words are removed from the cache."""
+        datatype_classifier = DatatypeClassifier.DatatypeClassifier(max_size=2)
+        datatype_classifier.filter_datatypes(['string', 'integer'], ['1'])
+        datatype_classifier.filter_datatypes(['string', 'integer'], ['2'])
+        datatype_classifier.filter_datatypes(['string', 'integer'], ['1'])
+        datatype_classifier.filter_datatypes(['string', 'integer'], ['3'])
+        self.assertEqual(['1', '3'], list(datatype_classifier.cache))
+        self.assertEqual(1, datatype_classifier.hits)
+
+    def test4cache_file(self):
+        """This unittest checks if the cache is stored and loaded."""
+        datatype_classifier = DatatypeClassifier.DatatypeClassifier(cache_file=self.cache_file_name)
+        self.assertEqual(['string', 'ipaddress'], datatype_classifier.filter_datatypes(['string', 'integer', 'ipaddress'], ['10.0.0.1']))
+        datatype_classifier.save()
+        datatype_classifier = DatatypeClassifier.DatatypeClassifier(cache_file=self.cache_file_name)
+        self.assertEqual(['string', 'ipaddress'], datatype_classifier.filter_datatypes(['string', 'integer', 'ipaddress'], ['10.0.0.1']))
+        self.assertEqual(1, datatype_classifier.hits)
+        self.assertEqual(0, datatype_classifier.misses)
+
+    def test5datetime_format(self):
+        """This unittest checks if variable nodes are only classified as datetimes if the datetimes have a common format, also after the
+        nodes were merged."""
+        Node.Node.datatype_classifier = DatatypeClassifier.DatatypeClassifier()
+        try:
+            nodes = []
+            for words in [['12:30:00', '23:00:01'], ['12:30:00', '2020-03-02T12:30:00'], ['2020-03-02T12:30:00']]:
+                node = Node.Node()
+                node.element = '§'
+                node.is_variable = True
+                node.determine_datatype(words)
+                nodes.append(node)
+            self.assertEqual(['datetime'], nodes[0].count_datatypes())
+            self.assertEqual('%H:%M:%S', nodes[0].datetime_format)
+            self.assertEqual(['string'], nodes[1].count_datatypes())
+            self.assertNotIn('datetime', nodes[1].datatype)
+            self.assertEqual(['datetime'], nodes[2].count_datatypes())
+            nodes[0].merge_node(nodes[2])
+            self.assertEqual(['string'], nodes[0].count_datatypes())
+            self.assertNotIn('datetime', nodes[0].datatype)
+        finally:
+            Node.Node.datatype_classifier = None
+
+
+if __name__ == "__main__":
+    unittest.main()
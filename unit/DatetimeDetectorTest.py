@@ -0,0 +1,62 @@
+import random
+import unittest
+
+from dateutil.parser import parse as datetimeparse
+
+from source import DatetimeDetector
+
+
+class DatetimeDetectorTest(unittest.TestCase):
+    """The goal of this test class is to test if the datetime formats are learned and if datetimes are detected like with dateutil."""
+
+    def test1learn(self):
+        """This unittest checks if the formats of the sample words are learned in the order of their frequency."""
+        datetime_detector = DatetimeDetector.DatetimeDetector(min_fraction=0.1)
+        words = ['12:30:00'] * 5 + ['2020-03-02T12:30:00.123+01:00'] * 10 + ['2020-03-02T12:30:00'] + ['user', 'a:b', 'a:b', 'a:b']
+        datetime_detector.learn(words)
+        self.assertEqual(['%Y-%m-%dT%H:%M:%S.%f%z', '%H:%M:%S'], datetime_detector.formats)
+
+    def test2is_datetime(self):
+        """This unittest checks if the words that are datetimes are the words that are accepted by dateutil and contain colons."""
+        random.seed(3)
+        alphabet = '0123456789:-+.TZ /'
+        words = ['12:30:00', '23:59:59', '24:00:00', '00:00:60', '12:30', '1:2', '2020-02-29T12:30:00', '2019-02-29T12:30:00',
+                 '2020-04-31T00:00:00', '0000-01-01T00:00:00', '2020-03-02T12:30:00Z', '2020-03-02T12:30:00+2400', '12:30:00.1234567',
+                 '2020/03/02 12:30:00', 'a:b', '']
+        for _ in range(3000):
+            words.append(''.join(random.choice(alphabet) for _ in range(random.randint(0, 12))))
+        # Words of all formats with random digits, which are often out of range
+        directive_lengths = {'%Y': 4, '%f': 7, '%z': 5}
+        for datetime_format in DatetimeDetector.DATETIME_FORMATS:
+            for _ in range(50):
+                word = datetime_format
+                for directive in DatetimeDetector.DIRECTIVE_PATTERNS:
+                    digits = ''.join(random.choice('0123456') for _ in range(random.randint(1, directive_lengths.get(directive, 2))))
+                    if directive == '%z':
+                        digits = random.choice('+-') + digits
+                    word = word.replace(directive, digits)
+                words.append(word)
+        # All formats are checked before dateutil, because the formats are not learned
+        datetime_detector = DatetimeDetector.DatetimeDetector()
+        for word in words:
+            try:
+                datetimeparse(word)
+                expected = ':' in word
+            except (ValueError, OverflowError):
+                expected = False
+            self.assertEqual(expected, datetime_detector.is_datetime(word), word)
+        self.assertGreater(datetime_detector.matches, 0)
+
+    def test3get_format(self):
+        """This unittest checks if the format of the words is the first learned format that all words match."""
+        datetime_detector = DatetimeDetector.DatetimeDetector()
+        datetime_detector.learn(['12:30:00', '12:30:00.5', '12:30:00.5'])
+        self.assertEqual(['%H:%M:%S.%f', '%H:%M:%S'], datetime_detector.formats)
+        self.assertEqual('%H:%M:%S', datetime_detector.get_format(['12:30:00', '23:00:01']))
+        self.assertEqual('%H:%M:%S.%f', datetime_detector.get_format(['12:30:00.1', '23:00:01.123456']))
+        self.assertIsNone(datetime_detector.get_format(['12:30:00', '12:30:00.1']))
+        self.assertIsNone(datetime_detector.get_format(['12:30']))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,41 @@
+import unittest
+
+from source import LineSampler, LogLine
+
+
+class LineSamplerTest(unittest.TestCase):
+    """The goal of this test class is to test if the sampled log lines represent all log lines."""
+
+    def test1reservoir_sampling(self):
+        """This unittest checks if the sample size is bounded and the occurrences of the sampled lines sum up to all lines."""
+        line_sampler = LineSampler.LineSampler(100)
+        for i in range(10000):
+            line_sampler.add(LogLine.LogLine(i, '', None, ['line', ' ', str(i % 7)]))
+        log_lines = line_sampler.get_log_lines()
+        self.assertEqual(100, len(log_lines))
+        self.assertEqual(10000, line_sampler.lines_seen)
+        self.assertAlmostEqual(10000, sum(log_line.occurrence for log_line in log_lines))
+        self.assertEqual(sorted(log_line.line_id for log_line in log_lines), [log_line.line_id for log_line in log_lines])
+
+    def test2stratified_sampling(self):
+        """This unittest checks if the stratified sample contains rare log lines with their exact occurrences."""
+        line_sampler = LineSampler.LineSampler(100, 'stratified')
+        for i in range(10000):
+            if i % 1000 == 0:
+                line_sampler.add(LogLine.LogLine(i, '', None, ['rare']))
+            else:
+                line_sampler.add(LogLine.LogLine(i, '', None, ['frequent', ' ', str(i)]))
+        log_lines = line_sampler.get_log_lines()
+        self.assertLessEqual(len(log_lines), 100)
+        rare_log_lines = [log_line for log_line in log_lines if log_line.words == ['rare']]
+        self.assertEqual(10, len(rare_log_lines))
+        self.assertAlmostEqual(10, sum(log_line.occurrence for log_line in rare_log_lines))
+        self.assertAlmostEqual(10000, sum(log_line.occurrence for log_line in log_lines))
+
+    def test3unknown_method(self):
+        """This unittest checks if unknown sampling methods are rejected."""
+        self.assertRaises(ValueError, LineSampler.LineSampler, 100, 'systematic')
+
+
+if __name__ == "__main__":
+    unittest.main()
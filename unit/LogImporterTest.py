@@ -0,0 +1,143 @@
+import unittest
+import os
+import io
+import sys
+import gzip
+import bz2
+import lzma
+
+from source import LogImporter, TimeStampDetector
+
+
+class LogImporterTest(unittest.TestCase):
+    """The goal of this test class is to test if the chunked import of the LogImporter creates the same log lines as the character based
+    import of text files."""
+
+    log_file_name = 'unit/in/import.log'
+    delimiters = [' ', '=']
+    log_data = b'2020-02-29 00:03:40 first line with=value\n\n2020-02-29 00:03:41  two  spaces\r\n2020-02-29 00:03:42 ctrl\x01char' \
+               b'\r2020-02-29 00:03:43 utf8 \xc3\xa9 char\n\t2020-02-29 00:03:44 tabs \t\nx\n\x01\n2020-02-29 00:03:45 last'
+
+    def tearDown(self):
+        os.remove(self.log_file_name)
+
+    def test1import_equals_text_import(self):
+        """This unittest checks if the imported lines are equal for different chunk sizes and time stamp lengths."""
+        with open(self.log_file_name, 'wb') as f:
+            f.write(self.log_data)
+        for time_stamp_length in [-1, 19]:
+            expected = self.import_text_file(time_stamp_length)
+            for chunk_size in [1, 2, 7, 64, 1048576]:
+                log_importer = LogImporter.LogImporter(self.delimiters, time_stamp_length, chunk_size, keep_line_text=True)
+                log_lines = self.import_log_lines(log_importer, self.log_file_name)
+                self.assertEqual(expected, log_lines)
+                self.assertEqual(len(expected), log_importer.lines_read)
+                self.assertEqual(len(self.log_data), log_importer.bytes_read)
+
+    def test2last_line(self):
+        """This unittest checks if the last line is only imported if it is not terminated and has at least two characters."""
+        for log_data, expected in [(b'ab', 1), (b'a', 0), (b'ab\n', 1), (b'a\n', 1), (b'\n', 0), (b'', 0)]:
+            with open(self.log_file_name, 'wb') as f:
+                f.write(log_data)
+            log_importer = LogImporter.LogImporter(self.delimiters, -1)
+            self.assertEqual(expected, len(list(log_importer.import_file(self.log_file_name))))
+
+    def test3parallel_import(self):
+        """This unittest checks if the parallel import creates the same lines with the same line ids as the sequential import."""
+        with open(self.log_file_name, 'wb') as f:
+            for _ in range(20):
+                f.write(self.log_data + b'\r\n')
+        expected = self.import_text_file(19)
+        for chunk_size in [1, 16, 100, 1048576]:
+            log_importer = LogImporter.LogImporter(self.delimiters, 19, chunk_size, 3, keep_line_text=True)
+            log_lines = self.import_log_lines(log_importer, self.log_file_name)
+            self.assertEqual(expected, log_lines)
+
+    def test4compressed_and_rotated_files(self):
+        """This unittest checks if compressed files, rotated sets of files and stdin are imported in the right order."""
+        with open(self.log_file_name, 'wb') as f:
+            f.write(self.log_data)
+        expected = [log_line[1:] for log_line in self.import_text_file(19)]
+        rotated_files = [('unit/in/rotated.log', open), ('unit/in/rotated.log.1', gzip.open), ('unit/in/rotated.log.2.bz2', bz2.open),
+                         ('unit/in/rotated.log.10', lzma.open)]
+        try:
+            for i, (path, open_function) in enumerate(rotated_files):
+                with open_function(path, 'wb') as f:
+                    f.write(self.log_data.replace(b'2020', b'200' + str(i).encode()))
+            log_importer = LogImporter.LogImporter(self.delimiters, 19, 16, keep_line_text=True)
+            log_lines = [log_line[1:] for log_line in self.import_log_lines(log_importer, ['unit/in/rotated.log*', self.log_file_name])]
+            expected_rotated = []
+            for i in [3, 2, 1, 0]:
+                expected_rotated.extend([(log_line[0].replace('2020', '200' + str(i)), log_line[1], log_line[2]) for log_line in expected])
+            self.assertEqual(expected_rotated + expected, log_lines)
+            self.assertRaises(FileNotFoundError, list, log_importer.import_file('unit/in/missing*'))
+        finally:
+            for path, _ in rotated_files:
+                os.remove(path)
+
+        stdin = sys.stdin
+        sys.stdin = io.TextIOWrapper(io.BytesIO(self.log_data))
+        try:
+            log_importer = LogImporter.LogImporter(self.delimiters, 19, keep_line_text=True)
+            log_lines = [log_line[1:] for log_line in self.import_log_lines(log_importer, '-')]
+        finally:
+            sys.stdin = stdin
+        self.assertEqual(expected, log_lines)
+
+    def test5time_stamp_detection(self):
+        """This unittest checks if time stamps of different formats are removed and converted to epoch values, and that only one
+        separator after the time stamp is removed."""
+        log_data = b'2020-02-29 00:03:40 first line\nFeb 29 00:03:41  second line\n2020-02-29T00:03:42.5+01:00 third line\n' \
+                   b'no time stamp\n1582934623 fourth line\n2020-02-29 00:03:44\n[29/Feb/2020:00:03:45 +0000] sixth line\n'
+        with open(self.log_file_name, 'wb') as f:
+            f.write(log_data)
+        time_stamp_detector = TimeStampDetector.TimeStampDetector()
+        log_importer = LogImporter.LogImporter(self.delimiters, -1, time_stamp_detector=time_stamp_detector, keep_line_text=True)
+        log_lines = [log_line[1:3] for log_line in self.import_log_lines(log_importer, self.log_file_name)]
+        self.assertEqual(['iso8601', 'syslog', 'epoch', 'apache'], time_stamp_detector.formats)
+        self.assertEqual([(1582934620, 'first line'), (log_lines[1][0], ' second line'), (1582934622.5 - 3600, 'third line'),
+                          (None, 'no time stamp'), (1582934623, 'fourth line'), (1582934624, ''), (1582934625, 'sixth line')], log_lines)
+        self.assertEqual(41, log_lines[1][0] % 60)
+
+    def test6line_text(self):
+        """This unittest checks if the line texts are only stored if they are needed."""
+        with open(self.log_file_name, 'wb') as f:
+            f.write(self.log_data)
+        for processes in [1, 2]:
+            log_importer = LogImporter.LogImporter(self.delimiters, 19, 16, processes)
+            log_lines = list(log_importer.import_file(self.log_file_name))
+            self.assertEqual(len(self.import_text_file(19)), len(log_lines))
+            self.assertTrue(all(log_line.line_text is None for log_line in log_lines))
+
+    def import_log_lines(self, log_importer, input_file):
+        return [(log_line.line_id, log_line.time_stamp, log_line.line_text, log_importer.vocabulary.get_tokens(log_line.words)) for
+                log_line in log_importer.import_file(input_file)]
+
+    def import_text_file(self, time_stamp_length):
+        log_lines = []
+        line_id = 0
+        with open(self.log_file_name, encoding='utf-8') as f:
+            for line in f:
+                if len(line) < 2:
+                    continue
+                line = ''.join([x for x in line if (31 < ord(x) < 127 or ord(x) == 9)])
+                line = line.strip(' \t\n\r')
+                word = ''
+                words = []
+                for c in line[time_stamp_length + 1:]:
+                    if c in self.delimiters:
+                        if word != '':
+                            words.append(word)
+                        words.append(c)
+                        word = ''
+                    else:
+                        word += c
+                if word != '':
+                    words.append(word)
+                log_lines.append((line_id, line[0:time_stamp_length], line[time_stamp_length + 1:], words))
+                line_id += 1
+        return log_lines
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -2,7 +2,13 @@ input_file = 'unit/in/test1.log'
 tree_file = 'unit/out/tree.txt'
 parser_file = 'unit/out/GeneratedParserModel.py'
 templates_file = 'unit/out/logTemplates.txt'
+snapshot_file = None
+chunk_size = 1048576
+import_processes = 1
 time_stamp_length = -1
+time_stamp_detection = False
+sample_size = 0
+sampling_method = 'reservoir'
 theta1 = 0.1
 theta2 = 0.9
 theta3 = 0.9
@@ -10,8 +16,26 @@ theta4 = 0.0001
 theta5 = 0.0001
 theta6 = 0.001  # Threshold for optional nodes in branches.
 damping = 0.0
+build_order = 'dfs'
+build_processes = 1
+build_min_subtree_lines = 10000
+build_engine = 'lines'
+build_shard_processes = 2
+build_shard_workers = []
+build_shard_authkey = None
+build_shard_prefix_words = 2
+max_exact_words = 0
+external_sort_dir = None
+external_sort_memory = 268435456
+datatype_cache_size = 1000000
+datatype_cache_file = None
+tree_state_file = None
+stage_cache_dir = None
+stage_cache_size = 1073741824
+stage_cache_invalidate = False
 merge_similarity = 1.1
 delimiters = [' ', '=']
+collapse_delimiters = True
 force_branch = []
 force_var = []
 merge_branches = False # Merge similar branches to one branch
@@ -0,0 +1,96 @@
+import os
+import shutil
+import unittest
+
+from source import LogLine, Node, StageCache, Vocabulary
+
+
+class StageCacheTest(unittest.TestCase):
+    """The goal of this test class is to test if the results of the stages are cached and restored."""
+
+    cache_dir = 'unit/out/stage_cache'
+    log_file_name = 'unit/in/stage_cache.log'
+
+    def setUp(self):
+        with open(self.log_file_name, 'w') as f:
+            f.write('user=root action=login\n')
+
+    def tearDown(self):
+        shutil.rmtree(self.cache_dir, ignore_errors=True)
+        os.remove(self.log_file_name)
+
+    def test1keys(self):
+        """This unittest checks if a changed parameter only invalidates its own stage and all later stages."""
+        keys = self.get_stage_cache({}).keys
+        changed_keys = self.get_stage_cache({'match_lists': (0.5,)}).keys
+        for stage in StageCache.STAGES:
+            if StageCache.STAGES.index(stage) < StageCache.STAGES.index('match_lists'):
+                self.assertEqual(keys[stage], changed_keys[stage])
+            else:
+                self.assertNotEqual(keys[stage], changed_keys[stage])
+        with open(self.log_file_name, 'a') as f:
+            f.write('user=admin action=logout\n')
+        self.assertNotEqual(keys['import'], self.get_stage_cache({}).keys['import'])
+
+    def test2restore(self):
+        """This unittest checks if the latest valid stage is restored."""
+        stage_cache = self.get_stage_cache({})
+        self.assertIsNone(stage_cache.restore())
+        self.assertFalse(stage_cache.skips('import'))
+        vocabulary = Vocabulary.Vocabulary()
+        log_line = LogLine.LogLine(0, None, None, vocabulary.get_ids(['user', '=', 'root']))
+        log_line.occurrence = 3
+        stage_cache.save_log_lines({1: log_line}, vocabulary, 3, ['iso8601'])
+        root = Node.Node()
+        root.occurrence = 3
+        stage_cache.save_tree('build_tree', root, [], [' ', '='])
+        with open(stage_cache.get_file_name('insert_variables'), 'wb') as f:
+            f.write(b'incomplete')
+
+        stage_cache = self.get_stage_cache({})
+        root, subtree_list = stage_cache.restore()
+        self.assertEqual('build_tree', stage_cache.restored_stage)
+        self.assertTrue(stage_cache.skips('import'))
+        self.assertFalse(stage_cache.skips('insert_variables'))
+        self.assertEqual(3, root.occurrence)
+        self.assertFalse(os.path.exists(stage_cache.get_file_name('insert_variables')))
+
+        os.remove(stage_cache.get_file_name('build_tree'))
+        stage_cache = self.get_stage_cache({})
+        log_line_dict, tokens, lines_read, time_stamp_formats = stage_cache.restore()
+        self.assertEqual('import', stage_cache.restored_stage)
+        self.assertEqual(['user', '=', 'root'], tokens)
+        self.assertEqual((3, ['iso8601']), (lines_read, time_stamp_formats))
+        self.assertEqual([(0, [0, 1, 2], 3)], [(log_line.line_id, list(log_line.words), log_line.occurrence)
+                                               for log_line in log_line_dict.values()])
+
+    def test3eviction(self):
+        """This unittest checks if the least recently used results are removed when the cache is too large."""
+        stage_cache = self.get_stage_cache({})
+        root = Node.Node()
+        stage_cache.save_tree('build_tree', root, [], [' '])
+        size = os.path.getsize(stage_cache.get_file_name('build_tree'))
+        stage_cache.max_size = 2 * size
+        stage_cache.save_tree('insert_variables', root, [], [' '])
+        os.utime(stage_cache.get_file_name('build_tree'), (0, 0))
+        stage_cache.save_tree('insert_lists', root, [], [' '])
+        self.assertEqual([False, True, True], [os.path.exists(stage_cache.get_file_name(stage)) for stage in [
+            'build_tree', 'insert_variables', 'insert_lists']])
+        # The committed result is kept, although the other results were used more recently and it exceeds the maximum size on its own
+        for stage in ['insert_variables', 'insert_lists']:
+            os.utime(stage_cache.get_file_name(stage), (4000000000, 4000000000))
+        stage_cache.max_size = size // 2
+        stage_cache.save_tree('match_lists', root, [], [' '])
+        self.assertEqual([False, False, True], [os.path.exists(stage_cache.get_file_name(stage)) for stage in [
+            'insert_variables', 'insert_lists', 'match_lists']])
+        stage_cache.clear()
+        self.assertEqual([], os.listdir(self.cache_dir))
+
+    def get_stage_cache(self, changed_parameters):
+        stage_parameters = {stage: () for stage in StageCache.STAGES}
+        stage_parameters.update(changed_parameters)
+        return StageCache.StageCache(self.cache_dir, 1073741824, [self.log_file_name], stage_parameters)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,83 @@
+import os
+import random
+import runpy
+import unittest
+
+from source import Node, SweepEngine, WordCountCache
+
+
+class SweepEngineTest(unittest.TestCase):
+    """The goal of this test class is to test if the configurations of a sweep are evaluated like single runs."""
+
+    log_file_name = 'unit/in/sweep.log'
+    config_file_name = 'unit/PGTestConfig.py'
+
+    def setUp(self):
+        random.seed(2)
+        with open(self.log_file_name, 'w') as f:
+            for _ in range(500):
+                r = random.randint(0, 2)
+                if r == 0:
+                    f.write('user=%s action=%s\n' % (random.choice(['root', 'www-data', 'admin', 'guest']),
+                                                       random.choice(['login', 'logout'])))
+                elif r == 1:
+                    f.write('connection from host%d port %d\n' % (random.randint(1, 20), random.randint(1000, 1010)))
+                else:
+                    f.write('status %s code %d\n' % (random.choice(['ok', 'failed', 'unknown']), random.randint(1, 3)))
+
+    def tearDown(self):
+        os.remove(self.log_file_name)
+        Node.Node.word_count_cache = None
+        Node.Node.datatype_classifier = None
+
+    def test1cached_word_counts(self):
+        """This unittest checks if the trees built with cached word statistics are equal to the trees built without the cache."""
+        sweep_engine = self.get_sweep_engine()
+        configurations = SweepEngine.get_configurations([('theta1', [0.05, 0.2]), ('theta3', [0.1, 0.9])])
+        results = sweep_engine.evaluate_all(configurations)
+        self.assertGreater(Node.Node.word_count_cache.hits, 0)
+        for configuration, result in zip(configurations, results):
+            Node.Node.word_count_cache = WordCountCache.WordCountCache()
+            expected_result = sweep_engine.evaluate(configuration)
+            for name in ['nodes', 'templates', 'coverage']:
+                self.assertEqual(expected_result[name], result[name])
+        self.assertEqual(1.0, results[0]['coverage'])
+
+    def test2configurations(self):
+        """This unittest checks if all combinations of the values are created and if parameters of the import are rejected."""
+        self.assertEqual([{'theta1': 0.1, 'damping': 0}, {'theta1': 0.1, 'damping': 0.5}, {'theta1': 0.2, 'damping': 0},
+                          {'theta1': 0.2, 'damping': 0.5}], SweepEngine.get_configurations([('theta1', [0.1, 0.2]), ('damping', [0, 0.5])]))
+        self.assertEqual([{}], SweepEngine.get_configurations([]))
+        self.assertRaises(ValueError, SweepEngine.get_configurations, [('delimiters', [[' ']])])
+
+    def test3search(self):
+        """This unittest checks if the search finds the value of the parameter that results in the number of nodes of a single run."""
+        sweep_engine = self.get_sweep_engine()
+        target_nodes = sweep_engine.evaluate({'theta1': 0.3})['nodes']
+        evaluated = sweep_engine.search({}, 'theta1', 0.01, 0.49, target_nodes, 5)
+        self.assertIn(target_nodes, [result['nodes'] for _, result in evaluated])
+
+    def test4build_options(self):
+        """This unittest checks if the build order and the build processes of the parameters result in the same trees and if options
+        that the sweep does not support are rejected."""
+        expected_results = self.get_sweep_engine().evaluate_all([{'theta1': 0.05}, {'theta1': 0.3}])
+        for build_options in [{'build_order': 'bfs'}, {'build_processes': 2, 'build_min_subtree_lines': 1}]:
+            results = self.get_sweep_engine(build_options).evaluate_all([{'theta1': 0.05}, {'theta1': 0.3}])
+            for expected_result, result in zip(expected_results, results):
+                for name in ['nodes', 'templates', 'coverage']:
+                    self.assertEqual(expected_result[name], result[name])
+        self.assertRaises(ValueError, self.get_sweep_engine, {'external_sort_dir': 'unit/out'})
+        self.assertRaises(ValueError, self.get_sweep_engine, {'build_processes': 2}, 2)
+
+    def get_sweep_engine(self, options=None, processes=1):
+        # The parameters are read from the file of the test configuration like the tests that copy it to PGConfig.py
+        parameters = {name: value for name, value in runpy.run_path(self.config_file_name).items() if not name.startswith('_')}
+        if options is not None:
+            parameters.update(options)
+        sweep_engine = SweepEngine.SweepEngine(parameters, processes)
+        sweep_engine.import_log_lines(self.log_file_name)
+        return sweep_engine
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,53 @@
+import unittest
+import random
+
+from source import Tokenizer
+
+
+class TokenizerTest(unittest.TestCase):
+    """The goal of this test class is to test if the Tokenizer splits lines exactly like the character based splitting loop."""
+
+    def test1tokenize(self):
+        """This unittest checks if the words are equal for random lines and delimiters that have a special meaning in regular
+        expressions."""
+        alphabet = 'ab =<>()-^]\\[.\t'
+        for delimiters in [[' ', '='], [' ', '=', '<', '>'], [' ', '=', '(', ')'], ['-', '^', ']', '\\', '['], ['.'], []]:
+            tokenizer = Tokenizer.Tokenizer(delimiters)
+            for _ in range(200):
+                line = ''.join(random.choice(alphabet) for _ in range(random.randint(0, 30)))
+                self.assertEqual(self.tokenize(line, delimiters), tokenizer.tokenize(line))
+
+    def test2collapse_delimiters(self):
+        """This unittest checks if consecutive delimiters are combined to one word."""
+        alphabet = 'ab =<>()-^]\\[.\t'
+        for delimiters in [[' ', '='], [' ', '=', '<', '>'], ['-', '^', ']', '\\', '['], ['.'], []]:
+            tokenizer = Tokenizer.Tokenizer(delimiters, True)
+            for _ in range(200):
+                line = ''.join(random.choice(alphabet) for _ in range(random.randint(0, 30)))
+                words = []
+                for word in self.tokenize(line, delimiters):
+                    if len(words) > 0 and word in delimiters and words[-1].strip(''.join(delimiters)) == '':
+                        words[-1] += word
+                    else:
+                        words.append(word)
+                self.assertEqual(words, tokenizer.tokenize(line))
+        self.assertEqual(['a', ' =', 'b', '  ', 'c'], Tokenizer.Tokenizer([' ', '='], True).tokenize('a =b  c'))
+
+    def tokenize(self, line, delimiters):
+        word = ''
+        words = []
+        for c in line:
+            if c in delimiters:
+                if word != '':
+                    words.append(word)
+                words.append(c)
+                word = ''
+            else:
+                word += c
+        if word != '':
+            words.append(word)
+        return words
+
+
+if __name__ == "__main__":
+    unittest.main()
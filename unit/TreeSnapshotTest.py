@@ -0,0 +1,91 @@
+import os
+import random
+import unittest
+
+from source import LogLine, Node, OutputWriter, Tokenizer, TreeSnapshot, Vocabulary
+
+
+class TreeSnapshotTest(unittest.TestCase):
+    """The goal of this test class is to test if a tree that is loaded from a snapshot results in the same output files."""
+
+    snapshot_file_name = 'unit/out/tree.snapshot'
+    delimiters = [' ', '=']
+
+    def tearDown(self):
+        if os.path.exists(self.snapshot_file_name):
+            os.remove(self.snapshot_file_name)
+
+    def test1refined_tree(self):
+        """This unittest checks if the tree, the templates and the parser of the loaded tree are equal to those of the stored tree."""
+        random.seed(1)
+        lines = []
+        for _ in range(1000):
+            r = random.randint(0, 2)
+            if r == 0:
+                lines.append('user=%s action=%s' % (random.choice(['root', 'www-data', 'admin']), random.choice(['login', 'logout'])))
+            elif r == 1:
+                lines.append('connection from 10.0.0.%d port %d' % (random.randint(1, 5), random.randint(1000, 1010)))
+            else:
+                lines.append('status %s code %d' % (random.choice(['ok', 'failed']), random.randint(1, 3)))
+        root = self.build_tree(lines)
+        root.sort_children()
+        root.insert_variables(0.8, self.delimiters, 0, [])
+        root.insert_lists()
+        root.match_lists(0.8)
+        subtree_list = root.get_subtrees(2)
+        root.sort_children()
+        root.aggregate_sequences(subtree_list)
+        TreeSnapshot.TreeSnapshot(root, subtree_list, self.delimiters).save(self.snapshot_file_name)
+        tree_snapshot = TreeSnapshot.TreeSnapshot()
+        tree_snapshot.load(self.snapshot_file_name)
+        self.assertEqual(self.delimiters, tree_snapshot.delimiters)
+        self.assertTrue(tree_snapshot.root.check_consistency())
+        self.assertEqual(root.to_string(0), tree_snapshot.root.to_string(0))
+        self.assertEqual(root.get_templates(''), tree_snapshot.root.get_templates(''))
+        output_writer = OutputWriter.OutputWriter(self.delimiters)
+        self.assertEqual(output_writer.get_parser(root, subtree_list),
+                         output_writer.get_parser(tree_snapshot.root, tree_snapshot.subtree_list))
+
+    def test2deep_tree(self):
+        """This unittest checks if the depth of the stored tree and the output files of the loaded tree are not limited by the recursion
+        limit."""
+        root = self.build_tree([' '.join('key%d=%d' % (j, (i + j) % 3) for j in range(1000)) for i in range(30)])
+        TreeSnapshot.TreeSnapshot(root, [], self.delimiters).save(self.snapshot_file_name)
+        tree_snapshot = TreeSnapshot.TreeSnapshot()
+        tree_snapshot.load(self.snapshot_file_name)
+        stack = [(root, tree_snapshot.root)]
+        while len(stack) > 0:
+            node, loaded_node = stack.pop()
+            self.assertEqual((node.element, node.occurrence, node.end, node.datatype, len(node.children)),
+                             (loaded_node.element, loaded_node.occurrence, loaded_node.end, loaded_node.datatype,
+                              len(loaded_node.children)))
+            stack.extend(zip(node.children, loaded_node.children))
+        self.assertEqual(4000, len(tree_snapshot.root.to_string(0).splitlines()))
+        self.assertEqual(root.to_string(0), tree_snapshot.root.to_string(0))
+        self.assertEqual(root.get_templates(''), tree_snapshot.root.get_templates(''))
+        output_writer = OutputWriter.OutputWriter(self.delimiters)
+        self.assertEqual(output_writer.get_parser(root, []), output_writer.get_parser(tree_snapshot.root, []))
+
+    def test3version(self):
+        """This unittest checks if snapshots of other versions and other files are rejected."""
+        with open(self.snapshot_file_name, 'wb') as f:
+            f.write(TreeSnapshot.SNAPSHOT_MAGIC + b'\xff\xff\xff\xff')
+        self.assertRaises(ValueError, TreeSnapshot.TreeSnapshot().load, self.snapshot_file_name)
+        with open(self.snapshot_file_name, 'wb') as f:
+            f.write(b'root (1)\n')
+        self.assertRaises(ValueError, TreeSnapshot.TreeSnapshot().load, self.snapshot_file_name)
+
+    def build_tree(self, lines):
+        tokenizer = Tokenizer.Tokenizer(self.delimiters, True)
+        vocabulary = Vocabulary.Vocabulary()
+        log_line_dict = {}
+        for line_id, line in enumerate(lines):
+            log_line_dict[line_id + 1] = LogLine.LogLine(line_id, None, None, vocabulary.get_ids(tokenizer.tokenize(line)))
+        root = Node.Node()
+        root.occurrence = len(lines)
+        root.build_tree(0, log_line_dict, self.delimiters, 0.1, 0.9, 0.9, 0.0001, 0.0001, 0.001, 0.1, [], [], vocabulary)
+        return root
+
+
+if __name__ == "__main__":
+    unittest.main()